@@ -0,0 +1,115 @@
+"""Comandos de mantenimiento: python -m app.cli <comando>"""
+import argparse
+import sys
+from sqlalchemy import func
+from app.core.database import SessionLocal
+from app.crud import stats as crud_stats
+from app.models.user_manga_volumes import UserMangaVolume
+from app.services.catalog_import import import_catalog
+from app.services.query_plans import check_hot_queries
+
+
+def rebuild_collection_stats(args: argparse.Namespace) -> int:
+    """Recalcula user_collection_stats y muestra las derivas encontradas"""
+    db = SessionLocal()
+    try:
+        drift = crud_stats.rebuild_collection_stats(db, user_id=args.user_id, fix=not args.verify)
+    finally:
+        db.close()
+
+    for item in drift:
+        print(f"user {item['user_id']}: stored={item['stored']} expected={item['expected']}")
+
+    action = "found" if args.verify else "fixed"
+    print(f"{len(drift)} user(s) with drift {action}")
+
+    # En modo verificación la deriva es un error (útil en cron/CI)
+    return 1 if args.verify and drift else 0
+
+
+def import_catalog_file(args: argparse.Namespace) -> int:
+    """Importa un catálogo CSV/NDJSON mostrando el progreso por bloque"""
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+
+    def progress(report: dict) -> None:
+        print(f"\r{report['rows']} rows | {report['volumes_created']} created | {report['volumes_updated']} updated | "
+              f"{report['volumes_skipped']} skipped | {report['errors_count']} errors", end="", file=sys.stderr, flush=True)
+
+    db = SessionLocal()
+    try:
+        stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+        with stream:
+            report = import_catalog(db, stream, fmt, chunk_size=args.chunk_size, dry_run=args.dry_run,
+                                    on_conflict=args.on_conflict, progress=progress)
+    finally:
+        db.close()
+
+    print(file=sys.stderr)
+    for error in report["errors"]:
+        print(f"line {error['line']}: {error['detail']}")
+
+    prefix = "[dry-run] " if args.dry_run else ""
+    print(f"{prefix}{report['rows']} rows: {report['publishers_created']} publishers and {report['series_created']} series created, "
+          f"{report['volumes_created']} volumes created, {report['volumes_updated']} updated, {report['volumes_skipped']} skipped, "
+          f"{report['errors_count']} errors")
+    return 1 if report["errors_count"] else 0
+
+
+def check_query_plans(args: argparse.Namespace) -> int:
+    """EXPLAIN de las consultas calientes de la colección; falla si alguna recorre entera una tabla vigilada"""
+    db = SessionLocal()
+    try:
+        user_id = args.user_id
+        if user_id is None:
+            # Por defecto, el usuario con la colección más grande
+            user_id = db.query(UserMangaVolume.user_id).group_by(UserMangaVolume.user_id).order_by(
+                func.count().desc()
+            ).limit(1).scalar()
+            if user_id is None:
+                print("No collection entries: seed some data first")
+                return 1
+        report = check_hot_queries(db, user_id, set(args.table) if args.table else None)
+    finally:
+        db.close()
+
+    failures = [item for item in report if item["full_scans"]]
+    for item in report:
+        if args.verbose or item["full_scans"]:
+            marker = "FULL SCAN " + ", ".join(item["full_scans"]) if item["full_scans"] else "ok"
+            print(f"[{marker}] {item['query']}")
+            for line in item["plan"]:
+                print(f"    {line}")
+
+    print(f"{len(report)} statement(s) checked for user {user_id}, {len(failures)} with full scans")
+    return 1 if failures else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Manga Shelf API maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    stats_parser = subparsers.add_parser("rebuild-collection-stats", help="Recompute per-user collection counters from scratch")
+    stats_parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user")
+    stats_parser.add_argument("--verify", action="store_true", help="Report drift without writing")
+    stats_parser.set_defaults(handler=rebuild_collection_stats)
+
+    import_parser = subparsers.add_parser("import-catalog", help="Stream a CSV/NDJSON catalog into publishers, series and volumes")
+    import_parser.add_argument("path", help="File to import ('-' for stdin)")
+    import_parser.add_argument("--format", choices=["csv", "ndjson"], default=None, help="Defaults to the file extension")
+    import_parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per transaction")
+    import_parser.add_argument("--on-conflict", choices=["skip", "update"], default="update", help="What to do with existing volumes")
+    import_parser.add_argument("--dry-run", action="store_true", help="Validate and count without committing")
+    import_parser.set_defaults(handler=import_catalog_file)
+
+    plans_parser = subparsers.add_parser("check-query-plans", help="EXPLAIN the hot collection queries and fail on full table scans")
+    plans_parser.add_argument("--user-id", type=int, default=None, help="Defaults to the user with the largest collection")
+    plans_parser.add_argument("--table", action="append", default=None, help="Table that must not be fully scanned (repeatable, default user_manga_volumes)")
+    plans_parser.add_argument("--verbose", action="store_true", help="Print every plan, not only failures")
+    plans_parser.set_defaults(handler=check_query_plans)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Engine asíncrono opcional (DB_ASYNC_MODE).
+
+Solo se importa con el modo activado: necesita el driver asíncrono del
+dialecto (asyncpg para PostgreSQL, aiosqlite para SQLite) y greenlet. Comparte
+los ajustes del pool y la instrumentación por petición del engine síncrono.
+"""
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from .config import settings
+from .database import instrument_engine
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL con el driver asíncrono del dialecto (postgresql:// -> postgresql+asyncpg://)"""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def async_engine_options(url: str) -> dict:
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        return {}
+
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        # asyncpg no acepta `options`: el timeout va como parámetro de servidor
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+    return options
+
+
+ASYNC_DATABASE_URL = settings.DATABASE_ASYNC_URL or async_database_url(settings.DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **async_engine_options(ASYNC_DATABASE_URL))
+instrument_engine(async_engine.sync_engine)
+
+# Sin expirar tras commit: un atributo expirado obligaría a un lazy load, que en async falla
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
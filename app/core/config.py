@@ -12,8 +12,72 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+
+    # Caché del usuario autenticado (get_current_user), por worker: el TTL es lo
+    # que tarda otro worker en ver un cambio de rol/estado; 0 la desactiva
+    AUTH_CACHE_TTL_SECONDS: int = 5
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
+    # Hash de contraseñas: coste argon2 (cambiarlo re-hashea en el siguiente login)
+    # y pool dedicado; con la cola llena se responde 503 + Retry-After
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+
+    # Caché de respuestas del catálogo: "memory" (LRU por worker) o "redis" (compartida)
+    CATALOG_CACHE_BACKEND: str = "memory"
+    CATALOG_CACHE_URL: str = "redis://localhost:6379/0"
+    CATALOG_CACHE_TTL_SECONDS: int = 300
+    CATALOG_CACHE_MAX_ENTRIES: int = 5000
+    # max-age de Cache-Control en las lecturas de catálogo (CDN / cliente)
+    CATALOG_HTTP_MAX_AGE_SECONDS: int = 60
+
+    # Pool de conexiones (no aplica a SQLite). Con varios workers de uvicorn el
+    # máximo por servidor es workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT_SECONDS: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # Comprueba la conexión al sacarla del pool (evita errores tras un failover)
+    DB_POOL_PRE_PING: bool = True
+    # statement_timeout de PostgreSQL por sesión (0 lo desactiva)
+    DB_STATEMENT_TIMEOUT_MS: int = 15000
+
+    # Réplicas de lectura (separadas por comas). Los GET van a la réplica en
+    # rotación; una réplica con más retraso que DB_REPLICA_MAX_LAG_SECONDS sale
+    # de la rotación. Tras una escritura, ese cliente lee del primario durante
+    # DB_READ_AFTER_WRITE_SECONDS
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_MAX_LAG_SECONDS: float = 10
+    DB_REPLICA_CHECK_INTERVAL_SECONDS: float = 2
+    DB_READ_AFTER_WRITE_SECONDS: float = 10
+
+    # Modo asíncrono (AsyncEngine + asyncpg/aiosqlite) para las lecturas calientes.
+    # Sin DATABASE_ASYNC_URL se deriva de DATABASE_URL cambiando el driver
+    DB_ASYNC_MODE: bool = False
+    DATABASE_ASYNC_URL: str = ""
+
+    # Instrumentación de BD: consultas por encima de este umbral (ms) se registran
+    # con la ruta que las origina (0 lo desactiva); Server-Timing en las respuestas
+    DB_SLOW_QUERY_MS: int = 200
+    SERVER_TIMING_ENABLED: bool = True
+    METRICS_ENABLED: bool = True
+    # /metrics y /health/db piden un admin o este token (Bearer) para el scraper
+    # de Prometheus y las sondas; vacío = solo admins
+    MONITORING_TOKEN: str = ""
+
+    # Búsqueda de catálogo: "auto" (trigram en PostgreSQL si está disponible) o "memory"
+    SEARCH_BACKEND: str = "auto"
+    SEARCH_INDEX_TTL_SECONDS: int = 300
 
     # OAuth Settings
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
     APPLE_CLIENT_ID: str = os.getenv("APPLE_CLIENT_ID", "")
+    GOOGLE_JWKS_URL: str = "https://www.googleapis.com/oauth2/v3/certs"
+    APPLE_JWKS_URL: str = "https://appleid.apple.com/auth/keys"
+    OAUTH_JWKS_DEFAULT_TTL_SECONDS: int = 3600
+    OAUTH_JWKS_MIN_REFRESH_SECONDS: int = 60
 settings = Settings()
\ No newline at end of file
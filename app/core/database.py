@@ -1,16 +1,188 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from typing import Callable, TypeVar
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from fastapi import Request, Response
+from sqlalchemy.pool import QueuePool
 from .config import settings
+from .metrics import CallbackGauge, db_pool_checkout_timeouts, db_pool_checkout_wait, registry, request_query_stats
+from .replicas import READ_AFTER_WRITE_COOKIE, READ_AFTER_WRITE_HEADER, SAFE_METHODS, ReadAfterWritePins, Replica, ReplicaSet
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Cuenta sentencias/tiempo/filas afectadas en la petición en curso y registra las consultas lentas"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        stats = request_query_stats.get()
+        slow = settings.DB_SLOW_QUERY_MS > 0 and elapsed * 1000 >= settings.DB_SLOW_QUERY_MS
+
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+            # Solo escrituras: el rowcount de un SELECT depende del driver
+            if (context.isinsert or context.isupdate or context.isdelete) and cursor.rowcount > 0:
+                stats.rows_affected += cursor.rowcount
+            stats.slow_queries += slow
+
+        if slow:
+            logger.warning(
+                "Slow query (%.1f ms) on route %s: %s",
+                elapsed * 1000, stats.route if stats is not None else "-", " ".join(statement.split())[:1000]
+            )
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mide la espera hasta obtener una conexión (saturación del pool)"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            db_pool_checkout_timeouts.inc(1)
+            raise
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - start)
+
+
+def engine_options(url: str) -> dict:
+    """Opciones de create_engine según Settings.
+
+    El tamaño del pool y el statement_timeout solo se aplican a servidores de
+    BD; SQLite se queda con el pool por defecto de SQLAlchemy.
+    """
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        return {}
+
+    options = {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def pool_status(engine: Engine) -> dict:
+    """Ocupación del pool; `saturation` = conexiones en uso / máximo (pool_size + max_overflow)"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__}
+
+    # max_overflow -1 = sin límite
+    max_overflow = pool._max_overflow
+    capacity = pool.size() + max_overflow if max_overflow >= 0 else 0
+    checked_out = pool.checkedout()
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": max_overflow,
+        "checked_in": pool.checkedin(),
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 3) if capacity > 0 else None
+    }
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite no aplica las FK salvo que se active por conexión; las altas en la
+    # colección dependen de ellas para detectar tomos inexistentes
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def build_engine(url: str) -> Engine:
+    """Engine con las opciones de pool, la instrumentación y (en SQLite) las FK activadas"""
+    new_engine = create_engine(url, **engine_options(url))
+    instrument_engine(new_engine)
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine, "connect", _enable_sqlite_foreign_keys)
+    return new_engine
+
+
+engine = build_engine(settings.DATABASE_URL)
+
+registry.register(CallbackGauge(
+    "db_pool_checked_out_connections", "Connections currently checked out from the pool",
+    lambda: pool_status(engine).get("checked_out")
+))
+
+replica_urls = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+replica_set = ReplicaSet(engine, [
+    Replica(make_url(url).render_as_string(hide_password=True), build_engine(url)) for url in replica_urls
+]) if replica_urls else None
+read_after_write = ReadAfterWritePins(settings.SECRET_KEY)
 
-engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-def get_db():
+
+def _session_engine(request: Request, response: Response) -> Engine:
+    """Primario para escrituras y para quien acaba de escribir; réplica para el resto de lecturas"""
+    if replica_set is None:
+        return engine
+
+    key = ReadAfterWritePins.client_key(request.headers, request.client.host if request.client else None)
+    if request.method not in SAFE_METHODS:
+        read_after_write.pin(key)
+        seal = read_after_write.seal()
+        response.set_cookie(READ_AFTER_WRITE_COOKIE, seal, max_age=settings.DB_READ_AFTER_WRITE_SECONDS + 1, httponly=True, samesite="lax")
+        response.headers[READ_AFTER_WRITE_HEADER] = seal
+        return engine
+
+    seal = request.headers.get(READ_AFTER_WRITE_HEADER) or request.cookies.get(READ_AFTER_WRITE_COOKIE)
+    if read_after_write.is_pinned(key) or read_after_write.seal_is_valid(seal):
+        return engine
+    return replica_set.choose() or engine
+
+
+def get_db(request: Request, response: Response):
+    db = SessionLocal(bind=_session_engine(request, response))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_primary_db():
+    """Sesión siempre en el primario (lecturas que no toleran retraso de réplica)"""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def read_with_primary_fallback(db: Session, load: Callable[[Session], T | None]) -> T | None:
+    """load(db); si la sesión va a una réplica y no encuentra nada, repite en el primario.
+
+    Para lecturas por clave de filas que el propio cliente puede haber creado
+    en otro worker (sin el sello de lectura tras escritura) y que la réplica
+    aún no tiene.
+    """
+    result = load(db)
+    if result is None and db.get_bind() is not engine:
+        with SessionLocal() as primary:
+            result = load(primary)
+    return result
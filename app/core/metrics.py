@@ -0,0 +1,203 @@
+"""Métricas HTTP/BD por ruta en formato de exposición de Prometheus.
+
+Los valores son por proceso (cada worker de uvicorn expone los suyos), igual
+que las estadísticas de /internal/stats.
+"""
+import time
+from contextvars import ContextVar
+from threading import Lock
+from typing import Callable
+from app.core.config import settings
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = []
+    for name, value in zip(labelnames, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [cuentas por bucket..., suma, total]
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    bucket_labels = _format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {series[-1]}")
+                plain_labels = _format_labels(self.labelnames, labels)
+                lines.append(f"{self.name}_sum{plain_labels} {series[-2]}")
+                lines.append(f"{self.name}_count{plain_labels} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = Lock()
+
+    def inc(self, amount: float, *labels) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class CallbackGauge:
+    """Gauge sin etiquetas cuyo valor se lee al exportar (None lo omite)"""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float | None]):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self) -> list[str]:
+        value = self.callback()
+        if value is None:
+            return []
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list[Histogram | Counter | CallbackGauge] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ("method", "route", "status"), DURATION_BUCKETS
+))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request",
+    ("method", "route"), QUERY_COUNT_BUCKETS
+))
+db_time_per_request = registry.register(Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per HTTP request",
+    ("method", "route"), DURATION_BUCKETS
+))
+db_rows_affected = registry.register(Counter(
+    "db_rows_affected_total", "Rows affected by INSERT/UPDATE/DELETE statements", ("method", "route")
+))
+db_slow_queries = registry.register(Counter(
+    "db_slow_queries_total", "SQL statements slower than DB_SLOW_QUERY_MS", ("method", "route")
+))
+db_pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time waiting for a pooled connection", (),
+    (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+))
+db_pool_checkout_timeouts = registry.register(Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that hit DB_POOL_TIMEOUT_SECONDS", ()
+))
+
+
+class QueryStats:
+    """SQL de una petición: sentencias, tiempo en BD y filas afectadas.
+
+    `rows_affected` solo suma el rowcount de INSERT/UPDATE/DELETE: en los
+    SELECT el driver no lo informa igual (-1 en SQLite, las filas en psycopg2)
+    y las filas leídas no se cuentan.
+    """
+
+    def __init__(self, scope: dict | None = None):
+        self.scope = scope
+        self.queries = 0
+        self.seconds = 0.0
+        self.rows_affected = 0
+        self.slow_queries = 0
+
+    @property
+    def route(self) -> str:
+        """Plantilla de la ruta (p. ej. /collection/{volume_id}); solo se conoce tras el enrutado"""
+        route = self.scope.get("route") if self.scope else None
+        return getattr(route, "path", None) or "unmatched"
+
+
+# La fija el middleware por petición y la alimentan los eventos del engine
+# (app.core.database); las rutas síncronas la heredan en el threadpool (copia
+# del contexto) y comparten el mismo objeto
+request_query_stats: ContextVar[QueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+class RequestMetricsMiddleware:
+    """Middleware ASGI: abre un QueryStats por petición, añade Server-Timing y observa las métricas"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        token = request_query_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.SERVER_TIMING_ENABLED:
+                    total_ms = (time.perf_counter() - start) * 1000
+                    timing = f'db;dur={stats.seconds * 1000:.1f};desc="{stats.queries} queries", app;dur={total_ms:.1f}'
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_query_stats.reset(token)
+            method, route = scope["method"], stats.route
+            http_request_duration.observe(time.perf_counter() - start, method, route, status_code)
+            db_queries_per_request.observe(stats.queries, method, route)
+            db_time_per_request.observe(stats.seconds, method, route)
+            if stats.rows_affected:
+                db_rows_affected.inc(stats.rows_affected, method, route)
+            if stats.slow_queries:
+                db_slow_queries.inc(stats.slow_queries, method, route)
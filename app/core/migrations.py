@@ -0,0 +1,166 @@
+"""Pasos de esquema idempotentes que `Base.metadata.create_all` no cubre.
+
+create_all solo crea tablas que no existen; aquí van extensiones, índices de
+expresión y columnas nuevas en tablas ya creadas. Cada paso corre en su propia
+transacción y un fallo (p. ej. falta de permisos para CREATE EXTENSION) se
+registra sin impedir el arranque.
+"""
+import logging
+from typing import Callable
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from app.utils.isbn import to_isbn13
+
+logger = logging.getLogger(__name__)
+
+_steps: list[tuple[str, Callable[[Connection], None]]] = []
+
+
+def migration(name: str):
+    """Registra un paso de migración (se ejecutan en orden de declaración)"""
+    def decorator(fn: Callable[[Connection], None]):
+        _steps.append((name, fn))
+        return fn
+    return decorator
+
+
+def run_migrations(engine: Engine) -> None:
+    for name, step in _steps:
+        try:
+            with engine.begin() as conn:
+                step(conn)
+        except Exception as e:
+            logger.warning("Migration step %r failed: %s", name, e)
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl_type: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN si falta; devuelve True si la ha creado"""
+    if column in {c["name"] for c in inspect(conn).get_columns(table)}:
+        return False
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+    return True
+
+
+# ========== BÚSQUEDA ==========
+
+# Normalización usada por los índices trigram: minúsculas, sin acentos, sin
+# puntuación y con las vocales largas del romaji plegadas (ō/ou/oo -> o, ū/uu -> u).
+# Debe coincidir con app.services.search.fold
+SEARCH_FOLD_FUNCTION = r"""
+CREATE OR REPLACE FUNCTION shelf_search_fold(text) RETURNS text AS $$
+    SELECT btrim(regexp_replace(regexp_replace(regexp_replace(
+        lower(public.unaccent('public.unaccent', $1)),
+        '[^[:alnum:]]+', ' ', 'g'),
+        'o[ou]', 'o', 'g'),
+        'uu', 'u', 'g'))
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+"""
+
+SEARCH_INDEXES = {
+    "ix_manga_series_title_trgm": ("manga_series", "shelf_search_fold(title)"),
+    "ix_manga_series_author_trgm": ("manga_series", "shelf_search_fold(author)"),
+    "ix_manga_volumes_title_trgm": ("manga_volumes", "shelf_search_fold(title)"),
+    "ix_manga_volumes_isbn_trgm": ("manga_volumes", "isbn"),
+    "ix_publishers_name_trgm": ("publishers", "shelf_search_fold(name)"),
+}
+
+
+@migration("search: pg_trgm/unaccent indexes")
+def _search_indexes(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql":
+        return
+
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+    conn.execute(text(SEARCH_FOLD_FUNCTION))
+
+    for name, (table, expression) in SEARCH_INDEXES.items():
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({expression} gin_trgm_ops)"))
+
+
+# ========== VERSIONES (ETag) ==========
+
+@migration("manga_series.volumes_version / user_collection_stats.version")
+def _version_counters(conn: Connection) -> None:
+    _add_column(conn, "manga_series", "volumes_version", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "user_collection_stats", "version", "INTEGER NOT NULL DEFAULT 0")
+
+
+# ========== SINCRONIZACIÓN DE COLECCIÓN ==========
+
+@migration("user_manga_volumes.updated_at")
+def _collection_updated_at(conn: Connection) -> None:
+    ddl_type = "TIMESTAMP WITH TIME ZONE" if conn.dialect.name == "postgresql" else "DATETIME"
+    if _add_column(conn, "user_manga_volumes", "updated_at", ddl_type):
+        # Sin historial previo: la última escritura conocida es el alta
+        conn.execute(text("UPDATE user_manga_volumes SET updated_at = added_at WHERE updated_at IS NULL"))
+
+
+@migration("user_manga_volumes / user_collection_tombstones sync_version")
+def _collection_sync_version(conn: Connection) -> None:
+    # Import diferido: los modelos importan app.core.database
+    from app.models.user_collection_tombstones import UserCollectionTombstone
+    from app.models.user_manga_volumes import UserMangaVolume
+
+    # Las filas anteriores quedan en 0: los tokens de fecha ya no valen y el
+    # cliente hace una sincronización completa
+    _add_column(conn, "user_manga_volumes", "sync_version", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "user_collection_tombstones", "sync_version", "INTEGER NOT NULL DEFAULT 0")
+    conn.execute(text("DROP INDEX IF EXISTS ix_user_manga_volumes_user_updated"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_user_collection_tombstones_user_deleted"))
+    for index in (*UserMangaVolume.__table__.indexes, *UserCollectionTombstone.__table__.indexes):
+        if index.name.endswith("_user_sync"):
+            index.create(conn, checkfirst=True)
+
+
+# ========== ÍNDICES DE COLECCIÓN ==========
+
+@migration("user_manga_volumes status/ordering indexes, manga_series.publisher_id")
+def _collection_indexes(conn: Connection) -> None:
+    # Import diferido: los modelos importan app.core.database
+    from app.models.manga_series import MangaSeries
+    from app.models.user_manga_volumes import UserMangaVolume
+
+    indexes = list(UserMangaVolume.__table__.indexes) + [
+        index for index in MangaSeries.__table__.indexes if index.name == "ix_manga_series_publisher_id"
+    ]
+    # manga_volumes.series_id ya está cubierto por unique_series_volume (series_id, volume_number)
+    for index in indexes:
+        index.create(conn, checkfirst=True)
+
+
+# ========== ISBN ==========
+
+@migration("manga_volumes.isbn13")
+def _volume_isbn13(conn: Connection) -> None:
+    _add_column(conn, "manga_volumes", "isbn13", "VARCHAR(13)")
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_manga_volumes_isbn13 ON manga_volumes (isbn13)"))
+
+    # Relleno de filas anteriores a la columna
+    rows = conn.execute(text("SELECT id, isbn FROM manga_volumes WHERE isbn IS NOT NULL AND isbn13 IS NULL")).all()
+    updates = [{"id": row.id, "isbn13": to_isbn13(row.isbn)} for row in rows]
+    updates = [update for update in updates if update["isbn13"]]
+    if updates:
+        conn.execute(text("UPDATE manga_volumes SET isbn13 = :isbn13 WHERE id = :id"), updates)
+
+
+@migration("manga_volumes.isbn13 unique")
+def _volume_isbn13_unique(conn: Connection) -> None:
+    indexes = {index["name"]: index for index in inspect(conn).get_indexes("manga_volumes")}
+    current = indexes.get("ix_manga_volumes_isbn13")
+    if current is not None and current["unique"]:
+        return
+
+    # Tomos dados de alta con distintas formas del mismo ISBN: el más antiguo
+    # conserva el isbn13 y los demás dejan de encontrarse por escaneo
+    duplicates = conn.execute(text(
+        "SELECT id, isbn13 FROM manga_volumes v WHERE isbn13 IS NOT NULL AND EXISTS ("
+        "SELECT 1 FROM manga_volumes o WHERE o.isbn13 = v.isbn13 AND o.id < v.id)"
+    )).all()
+    if duplicates:
+        logger.warning("Clearing isbn13 on %d duplicate volumes: %s", len(duplicates), [(row.id, row.isbn13) for row in duplicates])
+        conn.execute(text("UPDATE manga_volumes SET isbn13 = NULL WHERE id = :id"), [{"id": row.id} for row in duplicates])
+
+    if current is not None:
+        conn.execute(text("DROP INDEX ix_manga_volumes_isbn13"))
+    conn.execute(text("CREATE UNIQUE INDEX ix_manga_volumes_isbn13 ON manga_volumes (isbn13)"))
@@ -0,0 +1,167 @@
+"""Réplicas de lectura (DATABASE_REPLICA_URLS).
+
+Las lecturas seguras (GET/HEAD) se reparten en round-robin entre las réplicas
+en rotación; las escrituras y las lecturas de un cliente que acaba de escribir
+van al primario (ver app.core.database.get_db), igual que la carga del usuario
+autenticado.
+
+El retraso se mide con un latido: cada comprobación lee `db_heartbeat` en cada
+réplica y escribe la hora actual en el primario. Una réplica que ya tiene el
+latido anterior se considera al día; si no, su retraso es la antigüedad del
+último latido que ve. Funciona igual con réplicas de PostgreSQL que con
+ficheros SQLite copiados periódicamente (`sqlite3 primary.db ".backup replica.db"`).
+La comprobación corre en un hilo en segundo plano cada
+DB_REPLICA_CHECK_INTERVAL_SECONDS; hasta la primera, todo va al primario.
+"""
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.utils.security import verify_token
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Sello de lectura tras escritura que el cliente devuelve (cookie o cabecera)
+READ_AFTER_WRITE_COOKIE = "shelf_raw"
+READ_AFTER_WRITE_HEADER = "X-Read-After-Write"
+
+
+class Replica:
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        self.lag: float | None = None
+        self.in_rotation = False
+        self.error: str | None = None
+
+
+class ReplicaSet:
+    def __init__(self, primary: Engine, replicas: list[Replica]):
+        self.primary = primary
+        self.replicas = replicas
+        self._lock = threading.Lock()
+        self._checking = False
+        self._last_check = 0.0
+        self._last_beat: float | None = None
+        self._next = 0
+
+    def _read_beat(self, engine: Engine) -> float | None:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT beat_at FROM db_heartbeat WHERE id = 1")).scalar()
+
+    def _write_beat(self, beat: float) -> None:
+        with self.primary.begin() as conn:
+            updated = conn.execute(text("UPDATE db_heartbeat SET beat_at = :beat WHERE id = 1"), {"beat": beat}).rowcount
+            if not updated:
+                conn.execute(text("INSERT INTO db_heartbeat (id, beat_at) VALUES (1, :beat)"), {"beat": beat})
+
+    def check(self) -> None:
+        """Mide el retraso de cada réplica y actualiza la rotación"""
+        now = time.time()
+        for replica in self.replicas:
+            try:
+                beat = self._read_beat(replica.engine)
+            except Exception as e:
+                replica.lag, replica.in_rotation, replica.error = None, False, type(e).__name__
+                logger.warning("Replica %s unavailable: %s", replica.name, e)
+                continue
+
+            if beat is None:
+                lag = None
+            elif self._last_beat is not None and beat >= self._last_beat:
+                lag = 0.0
+            else:
+                lag = max(now - beat, 0.0)
+
+            in_rotation = lag is not None and lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+            if replica.in_rotation and not in_rotation:
+                logger.warning("Replica %s out of rotation (lag %s s)", replica.name, lag)
+            replica.lag, replica.in_rotation, replica.error = lag, in_rotation, None
+
+        try:
+            self._write_beat(now)
+            self._last_beat = now
+        except Exception as e:
+            logger.warning("Could not write replication heartbeat: %s", e)
+
+    def _check_in_background(self) -> None:
+        with self._lock:
+            if self._checking or time.monotonic() - self._last_check < settings.DB_REPLICA_CHECK_INTERVAL_SECONDS:
+                return
+            self._checking = True
+            self._last_check = time.monotonic()
+
+        def run():
+            try:
+                self.check()
+            finally:
+                with self._lock:
+                    self._checking = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def choose(self) -> Engine | None:
+        """Siguiente réplica en rotación (round-robin) o None si no hay ninguna"""
+        self._check_in_background()
+        healthy = [replica for replica in self.replicas if replica.in_rotation]
+        if not healthy:
+            return None
+        with self._lock:
+            self._next += 1
+            return healthy[self._next % len(healthy)].engine
+
+    def status(self) -> list[dict]:
+        return [
+            {"name": replica.name, "in_rotation": replica.in_rotation, "lag_seconds": replica.lag, "error": replica.error}
+            for replica in self.replicas
+        ]
+
+
+class ReadAfterWritePins:
+    """Clientes que han escrito hace menos de DB_READ_AFTER_WRITE_SECONDS: leen del primario.
+
+    Dos mecanismos:
+      - En memoria del worker, por principal (`sub` del JWT) o, sin token, por
+        IP: cubre al mismo usuario con otro token o desde otro dispositivo.
+      - Un sello firmado con la hora límite que cada escritura devuelve en la
+        cookie `shelf_raw` y en la cabecera X-Read-After-Write. Vale en cualquier
+        worker, también tras un login o alta cuyo token aún no conoce el primero.
+    """
+
+    def __init__(self, secret: str):
+        self._secret = secret.encode()
+        self._pins = TTLCache(maxsize=50000, ttl=settings.DB_READ_AFTER_WRITE_SECONDS)
+
+    @staticmethod
+    def client_key(headers, client_host: str | None) -> str:
+        scheme, _, token = (headers.get("authorization") or "").partition(" ")
+        payload = verify_token(token) if scheme.lower() == "bearer" and token else None
+        if payload and payload.get("sub") is not None:
+            return f"user:{payload['sub']}"
+        return "ip:" + hashlib.sha256((client_host or "").encode()).hexdigest()
+
+    def pin(self, key: str) -> None:
+        self._pins.set(key, True)
+
+    def is_pinned(self, key: str) -> bool:
+        return self._pins.get(key) is not None
+
+    def _sign(self, until: int) -> str:
+        return hmac.new(self._secret, f"read-after-write:{until}".encode(), hashlib.sha256).hexdigest()
+
+    def seal(self) -> str:
+        until = int(time.time() + settings.DB_READ_AFTER_WRITE_SECONDS) + 1
+        return f"{until}.{self._sign(until)}"
+
+    def seal_is_valid(self, value: str | None) -> bool:
+        until, _, signature = (value or "").partition(".")
+        if not until.isdigit() or int(until) < time.time():
+            return False
+        return hmac.compare_digest(signature, self._sign(int(until)))
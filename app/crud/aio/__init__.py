@@ -0,0 +1,5 @@
+"""Versiones asíncronas (AsyncSession) de las lecturas calientes de app.crud.
+
+En async no hay lazy loads: cada consulta carga por adelantado las relaciones
+que serializan los esquemas de respuesta.
+"""
@@ -0,0 +1,28 @@
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.models.manga_series import MangaSeries
+
+
+async def get_series_by_id(db: AsyncSession, series_id: int) -> MangaSeries | None:
+    """Busca una serie por ID (con su editorial)"""
+    result = await db.execute(
+        select(MangaSeries).options(joinedload(MangaSeries.publisher)).where(MangaSeries.id == series_id)
+    )
+    return result.scalars().first()
+
+
+async def get_all_series(db: AsyncSession, skip: int = 0, limit: int = 100, after: tuple | None = None) -> list[MangaSeries]:
+    """Obtiene todas las series (paginado por offset o por cursor `(title, id)`)"""
+    query = select(MangaSeries).options(joinedload(MangaSeries.publisher)).order_by(MangaSeries.title, MangaSeries.id)
+    if after:
+        query = query.where(tuple_(MangaSeries.title, MangaSeries.id) > tuple_(*after))
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
+
+
+async def get_volumes_version(db: AsyncSession, series_id: int) -> int | None:
+    """Versión de los tomos de una serie (None si la serie no existe)"""
+    return await db.scalar(select(MangaSeries.volumes_version).where(MangaSeries.id == series_id))
@@ -0,0 +1,38 @@
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.models.manga_series import MangaSeries
+from app.models.manga_volumes import MangaVolume
+
+
+def _select_volumes():
+    """Tomos con serie y editorial (lo que serializa MangaVolumeResponse)"""
+    return select(MangaVolume).options(joinedload(MangaVolume.series).joinedload(MangaSeries.publisher))
+
+
+async def get_volume_by_id(db: AsyncSession, volume_id: int) -> MangaVolume | None:
+    """Busca un tomo por ID"""
+    result = await db.execute(_select_volumes().where(MangaVolume.id == volume_id))
+    return result.scalars().first()
+
+
+async def get_volumes_by_series(db: AsyncSession, series_id: int, skip: int = 0, limit: int = 200, after: tuple | None = None) -> list[MangaVolume]:
+    """Obtiene los tomos de una serie (paginado por offset o por cursor `(volume_number, id)`)"""
+    query = _select_volumes().where(MangaVolume.series_id == series_id).order_by(MangaVolume.volume_number, MangaVolume.id)
+    if after:
+        query = query.where(tuple_(MangaVolume.volume_number, MangaVolume.id) > tuple_(*after))
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
+
+
+async def get_all_volumes(db: AsyncSession, skip: int = 0, limit: int = 100, after: tuple | None = None) -> list[MangaVolume]:
+    """Obtiene todos los tomos (paginado por offset o por cursor `(id,)`)"""
+    query = _select_volumes().order_by(MangaVolume.id)
+    if after:
+        query = query.where(MangaVolume.id > after[0])
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
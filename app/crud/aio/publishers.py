@@ -0,0 +1,19 @@
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.publishers import Publisher
+
+
+async def get_publisher_by_id(db: AsyncSession, publisher_id: int) -> Publisher | None:
+    """Busca una editorial por ID"""
+    return await db.scalar(select(Publisher).where(Publisher.id == publisher_id))
+
+
+async def get_all_publishers(db: AsyncSession, skip: int = 0, limit: int = 100, after: tuple | None = None) -> list[Publisher]:
+    """Obtiene todas las editoriales (paginado por offset o por cursor `(name, id)`)"""
+    query = select(Publisher).order_by(Publisher.name, Publisher.id)
+    if after:
+        query = query.where(tuple_(Publisher.name, Publisher.id) > tuple_(*after))
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
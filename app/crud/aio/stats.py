@@ -0,0 +1,13 @@
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user_collection_stats import UserCollectionStats
+
+
+async def get_collection_version(db: AsyncSession, user_id: int) -> tuple[int, datetime | None]:
+    """(version, updated_at) de la colección, sin cargar entradas (para ETag / Last-Modified)"""
+    result = await db.execute(
+        select(UserCollectionStats.version, UserCollectionStats.updated_at).where(UserCollectionStats.user_id == user_id)
+    )
+    row = result.first()
+    return (row.version, row.updated_at) if row else (0, None)
@@ -0,0 +1,21 @@
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from app.models.manga_series import MangaSeries
+from app.models.manga_volumes import MangaVolume
+from app.models.user_manga_volumes import UserMangaVolume
+
+
+async def get_user_collection(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100, after: tuple | None = None) -> list[UserMangaVolume]:
+    """Obtiene la colección de un usuario (paginado por offset o por cursor `(added_at, volume_id)`)"""
+    query = select(UserMangaVolume).options(
+        joinedload(UserMangaVolume.volume).joinedload(MangaVolume.series).joinedload(MangaSeries.publisher)
+    ).where(
+        UserMangaVolume.user_id == user_id
+    ).order_by(UserMangaVolume.added_at, UserMangaVolume.volume_id)
+    if after:
+        query = query.where(tuple_(UserMangaVolume.added_at, UserMangaVolume.volume_id) > tuple_(*after))
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
@@ -1,6 +1,9 @@
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from app.models.manga_series import MangaSeries
 from app.schemas.manga_series import MangaSeriesCreate
+from app.services.catalog_cache import catalog_cache
+from app.services.search import series_search
 
 def create_series(db: Session, series: MangaSeriesCreate) -> MangaSeries:
     """Crea una serie de manga"""
@@ -19,20 +22,40 @@ def create_series(db: Session, series: MangaSeriesCreate) -> MangaSeries:
     db.add(db_series)
     db.commit()
     db.refresh(db_series)
+    series_search.add(db_series)
+    catalog_cache.invalidate("series")
     return db_series
 
+def bump_volumes_version(db: Session, series_ids) -> None:
+    """Marca como cambiados los tomos de estas series. No hace commit: va en la transacción del llamador"""
+    series_ids = set(series_ids)
+    if series_ids:
+        db.query(MangaSeries).filter(MangaSeries.id.in_(series_ids)).update(
+            {MangaSeries.volumes_version: MangaSeries.volumes_version + 1}, synchronize_session=False
+        )
+
+def get_volumes_version(db: Session, series_id: int) -> int | None:
+    """Versión de los tomos de una serie (None si la serie no existe)"""
+    return db.query(MangaSeries.volumes_version).filter(MangaSeries.id == series_id).scalar()
+
 def get_series_by_id(db: Session, series_id: int) -> MangaSeries | None:
     """Busca una serie por ID"""
     return db.query(MangaSeries).filter(MangaSeries.id == series_id).first()
 
 def search_series(db: Session, query: str, skip: int = 0, limit: int = 20) -> list[MangaSeries]:
-    """Busca series por título o autor"""
-    search_pattern = f"%{query}%"
-    return db.query(MangaSeries).filter((MangaSeries.title.ilike(search_pattern)) | (MangaSeries.author.ilike(search_pattern))).offset(skip).limit(limit).all() # type: ignore
+    """Busca series por título o autor (ordenadas por relevancia)"""
+    return series_search.search(db, query, skip, limit)
+
+def autocomplete_series(db: Session, prefix: str, limit: int = 10) -> list[dict]:
+    """Sugerencias de series por prefijo de título o autor (índice en memoria)"""
+    return series_search.autocomplete(db, prefix, limit)
 
-def get_all_series(db: Session, skip: int = 0, limit: int = 100) -> list[MangaSeries]:
-    """Obtiene todas las series (paginado)"""
-    return db.query(MangaSeries).offset(skip).limit(limit).all() # type: ignore
+def get_all_series(db: Session, skip: int = 0, limit: int = 100, after: tuple | None = None) -> list[MangaSeries]:
+    """Obtiene todas las series (paginado por offset o por cursor `(title, id)`)"""
+    query = db.query(MangaSeries).order_by(MangaSeries.title, MangaSeries.id)
+    if after:
+        return query.filter(tuple_(MangaSeries.title, MangaSeries.id) > tuple_(*after)).limit(limit).all() # type: ignore
+    return query.offset(skip).limit(limit).all() # type: ignore
 
 def get_series_by_publisher(db: Session, publisher_id: int, skip: int = 0, limit: int = 100) -> list[MangaSeries]:
     """Obtiene series de una editorial específica"""
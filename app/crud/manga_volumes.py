@@ -1,6 +1,19 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 from app.models.manga_volumes import MangaVolume
+from app.models.manga_series import MangaSeries
 from app.schemas.manga_volumes import MangaVolumeCreate
+from app.crud.manga_series import bump_volumes_version
+from app.services.catalog_cache import catalog_cache
+from app.services.search import volume_search
+from app.utils.sql import dialect_insert
+from app.utils.isbn import to_isbn13
+
+# Detalles de las filas de un lote que no se ha escrito
+BATCH_REJECTED = "Batch rejected"
+WRITE_CONFLICT = "Conflicts with a concurrent write"
+
 
 def create_volume(db: Session, volume: MangaVolumeCreate) -> MangaVolume:
     """Crea un tomo de manga"""
@@ -8,6 +21,7 @@ def create_volume(db: Session, volume: MangaVolumeCreate) -> MangaVolume:
         series_id=volume.series_id,
         volume_number=volume.volume_number,
         isbn=volume.isbn,
+        isbn13=to_isbn13(volume.isbn),
         title=volume.title,
         pages=volume.pages,
         chapters=volume.chapters,
@@ -15,34 +29,147 @@ def create_volume(db: Session, volume: MangaVolumeCreate) -> MangaVolume:
         cover_image_url=volume.cover_image_url
     )
     db.add(db_volume)
+    bump_volumes_version(db, [volume.series_id])
     db.commit()
     db.refresh(db_volume)
+    volume_search.add(db_volume)
+    catalog_cache.invalidate("volumes")
     return db_volume
 
 
-def create_volumes_bulk(db: Session, volumes: list[MangaVolumeCreate]) -> list[MangaVolume]:
-    """Crea múltiples tomos de una vez (bulk insert)"""
-    db_volumes = [
-        MangaVolume(
-            series_id=volume.series_id,
-            volume_number=volume.volume_number,
-            isbn=volume.isbn,
-            title=volume.title,
-            pages=volume.pages,
-            chapters=volume.chapters,
-            release_date=volume.release_date,
-            cover_image_url=volume.cover_image_url
-        )
-        for volume in volumes
-    ]
-
-    db.add_all(db_volumes)
-    db.commit()
+# Columnas que ON CONFLICT DO UPDATE sobrescribe (la clave (series_id, volume_number) no)
+_BULK_UPDATE_COLUMNS = ("isbn", "isbn13", "title", "pages", "chapters", "release_date", "cover_image_url")
+
+
+def create_volumes_bulk(db: Session, volumes: list[MangaVolumeCreate], on_conflict: str = "error", commit: bool = True) -> list[dict]:
+    """Crea múltiples tomos con un INSERT ... RETURNING por lotes.
+
+    Valida el lote con dos consultas (series existentes y tomos que ya ocupan
+    la clave o el ISBN) y devuelve un resultado por fila en el orden recibido:
+    created / updated / skipped / error.
+
+    Si el INSERT choca con una escritura concurrente no se escribe ninguna
+    fila: las que iban a escribirse salen como error y el resto "Batch rejected".
+
+    on_conflict:
+      - "error": si alguna fila falla no se escribe ninguna.
+      - "skip": las filas que chocan con un tomo existente se omiten (ON CONFLICT DO NOTHING).
+      - "update": las que chocan por (series_id, volume_number) se actualizan (ON CONFLICT DO UPDATE).
+    """
+    results = [{"index": index, "status": "created", "detail": None, "volume": None} for index in range(len(volumes))]
+    if not volumes:
+        return results
+
+    keys = {(volume.series_id, volume.volume_number) for volume in volumes}
+    # Un mismo libro puede llegar como ISBN-10 o ISBN-13, con o sin guiones:
+    # se compara por su ISBN-13 canónico y, si no tiene forma de ISBN, por el valor tal cual
+    isbn13s = [to_isbn13(volume.isbn) for volume in volumes]
+    isbns = {volume.isbn for volume in volumes if volume.isbn}
+    canonical_isbns = {isbn13 for isbn13 in isbn13s if isbn13}
+
+    known_series = {row.id for row in db.query(MangaSeries.id).filter(MangaSeries.id.in_({key[0] for key in keys}))}
+
+    conflict_filter = tuple_(MangaVolume.series_id, MangaVolume.volume_number).in_(keys)
+    if isbns:
+        conflict_filter = conflict_filter | MangaVolume.isbn.in_(isbns)
+    if canonical_isbns:
+        conflict_filter = conflict_filter | MangaVolume.isbn13.in_(canonical_isbns)
+    existing = db.query(MangaVolume.id, MangaVolume.series_id, MangaVolume.volume_number, MangaVolume.isbn, MangaVolume.isbn13).filter(conflict_filter).all()
+    existing_by_key = {(row.series_id, row.volume_number): row for row in existing}
+    existing_by_isbn = {row.isbn: row for row in existing if row.isbn}
+    existing_by_isbn13 = {row.isbn13: row for row in existing if row.isbn13}
+
+    seen_keys: set[tuple[int, int]] = set()
+    seen_isbns: set[str] = set()
+    rows = []
+    for result, volume, isbn13 in zip(results, volumes, isbn13s):
+        key = (volume.series_id, volume.volume_number)
+        current = existing_by_key.get(key)
+        isbn_key = isbn13 or volume.isbn
+        isbn_owner = (existing_by_isbn13.get(isbn13) if isbn13 else None) or (existing_by_isbn.get(volume.isbn) if volume.isbn else None)
+
+        if volume.series_id not in known_series:
+            result.update(status="error", detail="Series not found")
+        elif key in seen_keys:
+            result.update(status="error", detail="Duplicate (series_id, volume_number) in batch")
+        elif isbn_key and isbn_key in seen_isbns:
+            result.update(status="error", detail="Duplicate ISBN in batch")
+        elif isbn_owner is not None and (current is None or isbn_owner.id != current.id):
+            result.update(status="skipped" if on_conflict == "skip" else "error", detail=f"ISBN already used by volume {isbn_owner.id}")
+        elif current is not None:
+            if on_conflict == "update":
+                result.update(status="updated")
+            else:
+                result.update(status="skipped" if on_conflict == "skip" else "error", detail=f"Volume {current.id} already exists")
+
+        seen_keys.add(key)
+        if isbn_key:
+            seen_isbns.add(isbn_key)
+
+        if result["status"] in ("created", "updated"):
+            rows.append(volume.model_dump() | {"isbn13": isbn13})
 
-    for volume in db_volumes:
-        db.refresh(volume)
+    if on_conflict == "error" and any(result["status"] == "error" for result in results):
+        for result in results:
+            if result["status"] != "error":
+                result.update(status="skipped", detail=BATCH_REJECTED)
+        return results
 
-    return db_volumes
+    if rows:
+        stmt = dialect_insert(db, MangaVolume)
+        if on_conflict == "skip":
+            stmt = stmt.on_conflict_do_nothing()
+        elif on_conflict == "update":
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[MangaVolume.series_id, MangaVolume.volume_number],
+                set_={column: stmt.excluded[column] for column in _BULK_UPDATE_COLUMNS}
+            )
+
+        # Un único INSERT por lote (insertmanyvalues) que devuelve las filas escritas.
+        # Un savepoint: si otra transacción ocupa una clave o un ISBN entre la
+        # validación y el INSERT, se rechaza el lote sin tirar la transacción del llamador
+        try:
+            with db.begin_nested():
+                written = db.scalars(stmt.returning(MangaVolume), rows, execution_options={"populate_existing": True}).all()
+        except IntegrityError:
+            for result in results:
+                if result["status"] in ("created", "updated"):
+                    result.update(status="error", detail=WRITE_CONFLICT)
+                elif result["status"] != "error":
+                    result.update(status="skipped", detail=BATCH_REJECTED)
+            return results
+        written_by_key = {(volume.series_id, volume.volume_number): volume for volume in written}
+
+        for result, volume in zip(results, volumes):
+            if result["status"] not in ("created", "updated"):
+                continue
+            db_volume = written_by_key.get((volume.series_id, volume.volume_number))
+            if db_volume is None:
+                # Otra transacción lo insertó entre la validación y el INSERT
+                result.update(status="skipped", detail="Volume already exists")
+            else:
+                result["volume"] = db_volume
+
+        bump_volumes_version(db, {result["volume"].series_id for result in results if result["volume"] is not None})
+
+    if commit:
+        written_ids = [result["volume"].id for result in results if result["volume"] is not None]
+        db.commit()
+
+        # Una sola consulta recarga los tomos expirados por el commit (con su serie)
+        if written_ids:
+            db.query(MangaVolume).options(
+                joinedload(MangaVolume.series).joinedload(MangaSeries.publisher)
+            ).filter(MangaVolume.id.in_(written_ids)).all()
+
+        # Los actualizados se reindexan: add() sustituye las claves del título anterior
+        for result in results:
+            if result["volume"] is not None:
+                volume_search.add(result["volume"])
+        if written_ids:
+            catalog_cache.invalidate("volumes")
+
+    return results
 
 
 def get_volume_by_id(db: Session, volume_id: int) -> MangaVolume | None:
@@ -51,20 +178,62 @@ def get_volume_by_id(db: Session, volume_id: int) -> MangaVolume | None:
 
 
 def get_volume_by_isbn(db: Session, isbn: str) -> MangaVolume | None:
-    """Busca un tomo por ISBN (para escaneo)"""
-    return db.query(MangaVolume).filter(MangaVolume.isbn == isbn).first()
+    """Busca un tomo por ISBN (para escaneo); acepta ISBN-10/13 con o sin guiones"""
+    canonical = to_isbn13(isbn)
+    if canonical is None:
+        return db.query(MangaVolume).filter(MangaVolume.isbn == isbn).first()
+    return db.query(MangaVolume).filter(MangaVolume.isbn13 == canonical).first()
 
 
-def get_volumes_by_series(db: Session, series_id: int, skip: int = 0, limit: int = 200) -> list[MangaVolume]:
-    """Obtiene todos los tomos de una serie"""
-    return db.query(MangaVolume).filter(MangaVolume.series_id == series_id).order_by(MangaVolume.volume_number).offset(skip).limit(limit).all() # type: ignore
+def get_volumes_by_isbns(db: Session, isbns: list[str]) -> dict[str, MangaVolume]:
+    """Resuelve muchos ISBN en una consulta; devuelve {isbn13: tomo}.
+
+    Como en get_volume_by_isbn, los códigos que to_isbn13 no sabe normalizar se
+    buscan por `isbn` tal cual; en el resultado su clave es ese mismo código.
+    """
+    canonical = {isbn13 for isbn13 in map(to_isbn13, isbns) if isbn13}
+    raw = {isbn for isbn in isbns if isbn and not to_isbn13(isbn)}
+    if not canonical and not raw:
+        return {}
+
+    conditions = []
+    if canonical:
+        conditions.append(MangaVolume.isbn13.in_(canonical))
+    if raw:
+        conditions.append(MangaVolume.isbn.in_(raw))
+
+    volumes = db.query(MangaVolume).options(
+        joinedload(MangaVolume.series).joinedload(MangaSeries.publisher)
+    ).filter(or_(*conditions)).order_by(MangaVolume.id).all()
+
+    found: dict[str, MangaVolume] = {}
+    for volume in volumes:
+        if volume.isbn13 in canonical:
+            found.setdefault(volume.isbn13, volume)
+        if volume.isbn in raw:
+            found.setdefault(volume.isbn, volume)
+    return found
+
+
+def get_volumes_by_series(db: Session, series_id: int, skip: int = 0, limit: int = 200, after: tuple | None = None) -> list[MangaVolume]:
+    """Obtiene todos los tomos de una serie (paginado por offset o por cursor `(volume_number, id)`)"""
+    query = db.query(MangaVolume).filter(MangaVolume.series_id == series_id).order_by(MangaVolume.volume_number, MangaVolume.id)
+    if after:
+        return query.filter(tuple_(MangaVolume.volume_number, MangaVolume.id) > tuple_(*after)).limit(limit).all() # type: ignore
+    return query.offset(skip).limit(limit).all() # type: ignore
 
 
 def search_volumes(db: Session, query: str, skip: int = 0, limit: int = 20) -> list[MangaVolume]:
-    """Busca tomos por título o ISBN"""
-    search_pattern = f"%{query}%"
-    return db.query(MangaVolume).filter((MangaVolume.title.ilike(search_pattern)) | (MangaVolume.isbn.ilike(search_pattern))).offset(skip).limit(limit).all() # type: ignore
+    """Busca tomos por título o ISBN (ordenados por relevancia)"""
+    return volume_search.search(db, query, skip, limit)
+
+def autocomplete_volumes(db: Session, prefix: str, limit: int = 10) -> list[dict]:
+    """Sugerencias de tomos por prefijo de título o ISBN (índice en memoria)"""
+    return volume_search.autocomplete(db, prefix, limit)
 
-def get_all_volumes(db: Session, skip: int = 0, limit: int = 100) -> list[MangaVolume]:
-    """Get all mangas with pagination"""
-    return db.query(MangaVolume).offset(skip).limit(limit).all() # type: ignore
\ No newline at end of file
+def get_all_volumes(db: Session, skip: int = 0, limit: int = 100, after: tuple | None = None) -> list[MangaVolume]:
+    """Get all mangas with pagination (offset or `(id,)` cursor)"""
+    query = db.query(MangaVolume).order_by(MangaVolume.id)
+    if after:
+        return query.filter(MangaVolume.id > after[0]).limit(limit).all() # type: ignore
+    return query.offset(skip).limit(limit).all() # type: ignore
\ No newline at end of file
@@ -1,6 +1,9 @@
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from app.models.publishers import Publisher
 from app.schemas.publishers import PublisherCreate
+from app.services.catalog_cache import catalog_cache
+from app.services.search import publisher_search
 
 def create_publisher(db: Session, publisher: PublisherCreate) -> Publisher:
     """Crea una editorial"""
@@ -12,6 +15,8 @@ def create_publisher(db: Session, publisher: PublisherCreate) -> Publisher:
     db.add(db_publisher)
     db.commit()
     db.refresh(db_publisher)
+    publisher_search.add(db_publisher)
+    catalog_cache.invalidate("publishers")
     return db_publisher
 
 def get_publisher_by_id(db: Session, publisher_id: int) -> Publisher | None:
@@ -22,11 +27,17 @@ def get_publisher_by_name(db: Session, name: str) -> Publisher | None:
     """Busca una editorial por nombre"""
     return db.query(Publisher).filter(Publisher.name == name).first()
 
-def get_all_publishers(db: Session, skip: int = 0, limit: int = 100) -> list[Publisher]:
-    """Obtiene todas las editoriales (paginado)"""
-    return db.query(Publisher).offset(skip).limit(limit).all() # type: ignore
+def get_all_publishers(db: Session, skip: int = 0, limit: int = 100, after: tuple | None = None) -> list[Publisher]:
+    """Obtiene todas las editoriales (paginado por offset o por cursor `(name, id)`)"""
+    query = db.query(Publisher).order_by(Publisher.name, Publisher.id)
+    if after:
+        return query.filter(tuple_(Publisher.name, Publisher.id) > tuple_(*after)).limit(limit).all() # type: ignore
+    return query.offset(skip).limit(limit).all() # type: ignore
 
 def search_publishers(db: Session, query: str, skip: int = 0, limit: int = 20) -> list[Publisher]:
-    """Busca editoriales por nombre"""
-    search_pattern = f"%{query}%"
-    return db.query(Publisher).filter(Publisher.name.ilike(search_pattern)).offset(skip).limit(limit).all() # type: ignore
\ No newline at end of file
+    """Busca editoriales por nombre (ordenadas por relevancia)"""
+    return publisher_search.search(db, query, skip, limit)
+
+def autocomplete_publishers(db: Session, prefix: str, limit: int = 10) -> list[dict]:
+    """Sugerencias de editoriales por prefijo de nombre (índice en memoria)"""
+    return publisher_search.autocomplete(db, prefix, limit)
\ No newline at end of file
@@ -0,0 +1,89 @@
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.refresh_tokens import RefreshToken
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_token(token: str) -> str:
+    # El token tiene 256 bits aleatorios: basta un SHA-256 (sin argon2)
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _add_token(db: Session, user_id: int, family_id: str) -> tuple[RefreshToken, str]:
+    token = secrets.token_urlsafe(32)
+    db_token = RefreshToken(
+        user_id=user_id,
+        token_hash=_hash_token(token),
+        family_id=family_id,
+        expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    db.add(db_token)
+    db.flush()
+    return db_token, token
+
+
+def create_refresh_token(db: Session, user_id: int) -> str:
+    """Abre una sesión nueva (familia nueva) y devuelve el token en claro"""
+    _, token = _add_token(db, user_id, family_id=secrets.token_hex(16))
+    db.commit()
+    return token
+
+
+def revoke_token_family(db: Session, family_id: str) -> int:
+    """Revoca todos los tokens activos de una sesión. No hace commit"""
+    return db.query(RefreshToken).filter(
+        RefreshToken.family_id == family_id,
+        RefreshToken.revoked_at.is_(None)
+    ).update({RefreshToken.revoked_at: datetime.now(timezone.utc)}, synchronize_session=False)
+
+
+def revoke_user_refresh_tokens(db: Session, user_id: int) -> int:
+    """Revoca todas las sesiones del usuario. No hace commit: va en la transacción del llamador"""
+    return db.query(RefreshToken).filter(
+        RefreshToken.user_id == user_id,
+        RefreshToken.revoked_at.is_(None)
+    ).update({RefreshToken.revoked_at: datetime.now(timezone.utc)}, synchronize_session=False)
+
+
+def rotate_refresh_token(db: Session, token: str) -> tuple[int, str] | None:
+    """Canjea un refresh token por uno nuevo de la misma familia.
+
+    Devuelve (user_id, nuevo token) o None si no es válido. Presentar un token
+    ya rotado indica que se ha filtrado: se revoca toda su familia.
+    """
+    db_token = db.query(RefreshToken).filter(RefreshToken.token_hash == _hash_token(token)).with_for_update().first()
+    if not db_token:
+        return None
+
+    now = datetime.now(timezone.utc)
+    if db_token.revoked_at is not None:
+        if db_token.replaced_by_id is not None:
+            logger.warning("Refresh token reuse detected for user %s, revoking family %s", db_token.user_id, db_token.family_id)
+            revoke_token_family(db, db_token.family_id)
+            db.commit()
+        return None
+
+    expires_at = db_token.expires_at
+    if expires_at.tzinfo is None:
+        # SQLite devuelve fechas sin zona
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if expires_at <= now:
+        return None
+
+    user = db.query(User.is_active, User.deleted_at).filter(User.id == db_token.user_id).first()
+    if not user or not user.is_active or user.deleted_at is not None:
+        return None
+
+    new_token, token_value = _add_token(db, db_token.user_id, db_token.family_id)
+    db_token.revoked_at = now
+    db_token.replaced_by_id = new_token.id
+    user_id = db_token.user_id
+    db.commit()
+
+    return user_id, token_value
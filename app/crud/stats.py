@@ -1,65 +1,230 @@
+from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func, distinct
+from sqlalchemy import func, distinct, update
+from sqlalchemy.exc import IntegrityError
 from app.models.user_manga_volumes import UserMangaVolume
 from app.models.manga_volumes import MangaVolume
 from app.models.manga_series import MangaSeries
 from app.models.publishers import Publisher
+from app.models.user_collection_stats import UserCollectionStats
+
+
+STAT_COUNTERS = ("total_volumes", "total_series", "owned_count", "wishlist_count", "reading_count", "completed_count", "total_spent")
+
+# Contador -> flag de UserMangaVolume que lo alimenta
+_FLAG_COUNTERS = {
+    "owned_count": "is_owned",
+    "wishlist_count": "is_wishlist",
+    "reading_count": "is_reading",
+    "completed_count": "is_completed",
+}
+
+
+def _aggregate_collection_stats(db: Session):
+    """Agregación condicional sobre user_manga_volumes (un solo recorrido)"""
+    return db.query(
+        UserMangaVolume.user_id,
+        func.count().label("total_volumes"),
+        func.count(distinct(MangaVolume.series_id)).label("total_series"),
+        func.count().filter(UserMangaVolume.is_owned == True).label("owned_count"),
+        func.count().filter(UserMangaVolume.is_wishlist == True).label("wishlist_count"),
+        func.count().filter(UserMangaVolume.is_reading == True).label("reading_count"),
+        func.count().filter(UserMangaVolume.is_completed == True).label("completed_count"),
+        func.coalesce(func.sum(UserMangaVolume.purchase_price), 0).label("total_spent")
+    ).join(
+        MangaVolume, MangaVolume.id == UserMangaVolume.volume_id
+    ).group_by(
+        UserMangaVolume.user_id
+    )
 
 
-def get_collection_stats(db: Session, user_id: int) -> dict:
-    """Obtiene estadísticas generales de la colección del usuario"""
+def _row_to_stats(row) -> dict:
+    if row is None:
+        return {key: 0 for key in STAT_COUNTERS}
+    return {key: getattr(row, key) for key in STAT_COUNTERS}
 
-    # Total de tomos en colección (cualquier estado)
-    total_volumes = db.query(UserMangaVolume).filter(
-        UserMangaVolume.user_id == user_id
-    ).count()
 
-    # Total de series diferentes
-    total_series = db.query(distinct(MangaVolume.series_id)).join(
-        UserMangaVolume, UserMangaVolume.volume_id == MangaVolume.id
-    ).filter(
-        UserMangaVolume.user_id == user_id
-    ).count()
+def _as_response(stats: dict) -> dict:
+    response = {key: int(stats[key]) for key in STAT_COUNTERS if key != "total_spent"}
+    response["total_spent"] = float(stats["total_spent"])
+    return response
 
-    # Tomos poseídos físicamente
-    owned_count = db.query(UserMangaVolume).filter(
-        UserMangaVolume.user_id == user_id,
-        UserMangaVolume.is_owned == True
-    ).count()
 
-    # Tomos en wishlist
-    wishlist_count = db.query(UserMangaVolume).filter(
-        UserMangaVolume.user_id == user_id,
-        UserMangaVolume.is_wishlist == True
-    ).count()
+def compute_collection_stats(db: Session, user_id: int) -> dict:
+    """Recalcula las estadísticas desde las filas de user_manga_volumes"""
+    row = _aggregate_collection_stats(db).filter(UserMangaVolume.user_id == user_id).first()
+    return _row_to_stats(row)
 
-    # Tomos leyendo
-    reading_count = db.query(UserMangaVolume).filter(
-        UserMangaVolume.user_id == user_id,
-        UserMangaVolume.is_reading == True
-    ).count()
 
-    # Tomos completados
-    completed_count = db.query(UserMangaVolume).filter(
+def get_collection_stats(db: Session, user_id: int) -> dict:
+    """Obtiene estadísticas generales de la colección del usuario"""
+    db_stats = db.query(UserCollectionStats).filter(UserCollectionStats.user_id == user_id).first()
+
+    # Usuarios sin fila de contadores (aún sin escrituras): se calcula al vuelo
+    if not db_stats:
+        return _as_response(compute_collection_stats(db, user_id))
+
+    return _as_response({key: getattr(db_stats, key) for key in STAT_COUNTERS})
+
+
+def get_collection_version(db: Session, user_id: int) -> tuple[int, datetime | None]:
+    """(version, updated_at) de la colección, sin cargar entradas (para ETag / Last-Modified)"""
+    row = db.query(UserCollectionStats.version, UserCollectionStats.updated_at).filter(
+        UserCollectionStats.user_id == user_id
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+def collection_snapshot(entry: UserMangaVolume | None) -> dict | None:
+    """Captura los campos de una entrada que afectan a los contadores"""
+    if entry is None:
+        return None
+    snapshot = {counter: 1 if getattr(entry, flag) else 0 for counter, flag in _FLAG_COUNTERS.items()}
+    snapshot["total_spent"] = entry.purchase_price or 0
+    snapshot["series_id"] = entry.volume.series_id
+    return snapshot
+
+
+def _store_collection_stats(db: Session, user_id: int, stats: dict, bump_version: bool = True) -> None:
+    """Inserta o sobrescribe la fila de contadores del usuario"""
+    db_stats = db.query(UserCollectionStats).filter(UserCollectionStats.user_id == user_id).first()
+    if not db_stats:
+        db_stats = UserCollectionStats(user_id=user_id)
+        db.add(db_stats)
+    for key in STAT_COUNTERS:
+        setattr(db_stats, key, stats[key])
+    if bump_version:
+        db_stats.version = (db_stats.version or 0) + 1
+    db.flush()
+
+
+def _series_delta(db: Session, user_id: int, before: dict | None, after: dict | None) -> int:
+    """+1/-1 si la serie entra/sale del recuento de `total_series`, 0 si no cambia"""
+    if (before is None) == (after is None):
+        return 0
+    sign = 1 if before is None else -1
+    series_id = (after or before)["series_id"]
+
+    # La serie entra (o sale) del recuento si esta era su única entrada
+    series_entries = db.query(func.count()).select_from(UserMangaVolume).join(
+        MangaVolume, MangaVolume.id == UserMangaVolume.volume_id
+    ).filter(
         UserMangaVolume.user_id == user_id,
-        UserMangaVolume.is_completed == True
-    ).count()
+        MangaVolume.series_id == series_id
+    ).scalar()
+    return sign if series_entries == (1 if sign > 0 else 0) else 0
+
+
+def _apply_series_delta(db: Session, user_id: int, before: dict | None, after: dict | None) -> None:
+    series_delta = _series_delta(db, user_id, before, after)
+    if series_delta:
+        db.query(UserCollectionStats).filter(
+            UserCollectionStats.user_id == user_id
+        ).update({UserCollectionStats.total_series: UserCollectionStats.total_series + series_delta}, synchronize_session=False)
+
+
+def lock_collection_version(db: Session, user_id: int) -> int:
+    """Sube la versión de la colección del usuario y devuelve la nueva.
+
+    Primer paso de toda escritura en la colección: el UPDATE bloquea la fila de
+    contadores hasta el commit, así que las versiones se confirman en el mismo
+    orden en que se asignan. Las entradas y tombstones escritos se marcan con
+    ella (`sync_version`), que es la posición de /collection/changes.
+    """
+    stmt = update(UserCollectionStats).where(
+        UserCollectionStats.user_id == user_id
+    ).values(
+        version=UserCollectionStats.version + 1, updated_at=func.now()
+    ).returning(UserCollectionStats.version).execution_options(synchronize_session=False)
+
+    version = db.execute(stmt).scalar()
+    if version is not None:
+        return version
+
+    # Primera escritura del usuario: se siembra la fila con el estado anterior al cambio
+    try:
+        with db.begin_nested():
+            _store_collection_stats(db, user_id, compute_collection_stats(db, user_id))
+    except IntegrityError:
+        # Otra transacción creó la fila a la vez: se espera a su lock
+        return db.execute(stmt).scalar()
+    return 1
+
+
+def record_collection_change(db: Session, user_id: int, before: dict | None, after: dict | None) -> None:
+    """Aplica a user_collection_stats el delta de una escritura en la colección.
+
+    `before` y `after` son snapshots de `collection_snapshot` (None si la entrada
+    no existía / ya no existe). Debe llamarse después de lock_collection_version
+    y del flush del cambio, y antes del commit, para que contadores y filas se
+    confirmen juntos.
+
+    Con la fila ya bloqueada, el recuento de entradas de la serie que decide
+    `total_series` ve las escrituras concurrentes confirmadas antes.
+    """
+    delta = {key: 0 for key in STAT_COUNTERS}
+    for snapshot, sign in ((before, -1), (after, 1)):
+        if snapshot is None:
+            continue
+        for counter in _FLAG_COUNTERS:
+            delta[counter] += sign * snapshot[counter]
+        delta["total_spent"] += sign * snapshot["total_spent"]
+    if (before is None) != (after is None):
+        delta["total_volumes"] = 1 if before is None else -1
+
+    values = {getattr(UserCollectionStats, key): getattr(UserCollectionStats, key) + value for key, value in delta.items() if value}
+    if values:
+        db.query(UserCollectionStats).filter(
+            UserCollectionStats.user_id == user_id
+        ).update(values, synchronize_session=False)
+    _apply_series_delta(db, user_id, before, after)
+
+
+def resync_collection_stats(db: Session, user_id: int) -> None:
+    """Recalcula la fila de contadores de un usuario tras una escritura por lotes.
+
+    Una agregación en lugar de un delta por entrada; debe llamarse después de
+    lock_collection_version y del flush, y antes del commit.
+    """
+    _store_collection_stats(db, user_id, compute_collection_stats(db, user_id), bump_version=False)
+
+
+def rebuild_collection_stats(db: Session, user_id: int | None = None, fix: bool = True) -> list[dict]:
+    """Recalcula los contadores desde cero y devuelve las derivas encontradas.
+
+    Con `fix=False` solo verifica; con `fix=True` corrige las filas en la misma
+    transacción y hace commit.
+    """
+    aggregate = _aggregate_collection_stats(db)
+    stored_query = db.query(UserCollectionStats)
+    if user_id is not None:
+        aggregate = aggregate.filter(UserMangaVolume.user_id == user_id)
+        stored_query = stored_query.filter(UserCollectionStats.user_id == user_id)
+
+    expected = {row.user_id: _row_to_stats(row) for row in aggregate.all()}
+    stored = {row.user_id: row for row in stored_query.all()}
+
+    drift = []
+    for uid in sorted(set(expected) | set(stored)):
+        expected_stats = expected.get(uid) or _row_to_stats(None)
+        db_stats = stored.get(uid)
+        stored_stats = {key: getattr(db_stats, key) for key in STAT_COUNTERS} if db_stats else None
+
+        if stored_stats is not None and all(stored_stats[key] == expected_stats[key] for key in STAT_COUNTERS):
+            continue
+
+        drift.append({
+            "user_id": uid,
+            "stored": _as_response(stored_stats) if stored_stats else None,
+            "expected": _as_response(expected_stats)
+        })
+        if fix:
+            _store_collection_stats(db, uid, expected_stats)
 
-    # Total gastado (suma de precios de compra)
-    total_spent = db.query(func.sum(UserMangaVolume.purchase_price)).filter(
-        UserMangaVolume.user_id == user_id,
-        UserMangaVolume.purchase_price.isnot(None)
-    ).scalar() or 0
-
-    return {
-        "total_volumes": total_volumes,
-        "total_series": total_series,
-        "owned_count": owned_count,
-        "wishlist_count": wishlist_count,
-        "reading_count": reading_count,
-        "completed_count": completed_count,
-        "total_spent": float(total_spent)
-    }
+    if fix:
+        db.commit()
+
+    return drift
 
 
 def get_top_publishers_by_volumes(db: Session, user_id: int, limit: int = 5) -> list[dict]:
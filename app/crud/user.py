@@ -1,13 +1,14 @@
 from sqlalchemy.orm import Session
-from app.models import UserMangaVolume
-from app.models.user import User
+from app.models import UserMangaVolume, UserCollectionTombstone
+from app.models.user import User, UserRole
 from app.schemas.user import UserCreate
-from app.utils.security import hash_password, verify_password
+from app.crud.refresh_tokens import revoke_user_refresh_tokens
+from app.utils.security import hash_password, principal_cache
 from datetime import datetime, timedelta, timezone
 
-def create_user(db: Session, user: UserCreate) -> User:
-    """Creates a user in the db"""
-    hashed_password = hash_password(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: str | None = None) -> User:
+    """Creates a user in the db (the password hash can come precomputed from the hashing pool)"""
+    hashed_password = hashed_password or hash_password(user.password)
 
     db_user = User(
         email=user.email,
@@ -29,6 +30,9 @@ def get_user_by_username(db: Session, username: str) -> User | None:
     """Searches user by name"""
     return db.query(User).filter(User.username == username).first()
 
+def get_user_by_id(db: Session, user_id: int) -> User | None:
+    return db.query(User).filter(User.id == user_id).first()
+
 def update_user_profile(db: Session, user_id: int, email: str | None = None, username: str | None = None):
     user = db.query(User).filter(User.id == user_id).first()
 
@@ -42,19 +46,20 @@ def update_user_profile(db: Session, user_id: int, email: str | None = None, use
         user.username = username
 
     db.commit()
+    principal_cache.invalidate(user_id)
     db.refresh(user)
     return user
 
-def update_user_password(db: Session, user_id: int, current_password: str, new_password: str) -> User | None:
+def update_user_password_hash(db: Session, user_id: int, hashed_password: str, revoke_sessions: bool = False) -> User | None:
+    """Guarda un hash ya calculado (cambio de contraseña o re-hash con parámetros nuevos)"""
     user = db.query(User).filter(User.id == user_id).first()
 
     if not user:
         return None
 
-    if not verify_password(current_password, user.hashed_password):
-        return None
-
-    user.hashed_password = hash_password(new_password)
+    user.hashed_password = hashed_password
+    if revoke_sessions:
+        revoke_user_refresh_tokens(db, user_id)
     db.commit()
     db.refresh(user)
     return user # type: ignore
@@ -67,7 +72,9 @@ def soft_delete_user(db: Session, user_id: int) -> User | None:
 
     user.deleted_at = datetime.now(timezone.utc)
     user.is_active = False
+    revoke_user_refresh_tokens(db, user_id)
     db.commit()
+    principal_cache.invalidate(user_id)
     db.refresh(user)
 
     return user # type: ignore
@@ -82,6 +89,20 @@ def restore_user(db: Session, user_id: int) -> User | None:
     user.deleted_at = None
 
     db.commit()
+    principal_cache.invalidate(user_id)
+    db.refresh(user)
+
+    return user # type: ignore
+
+def update_user_role(db: Session, user_id: int, role: UserRole) -> User | None:
+    user = db.query(User).filter(User.id == user_id).first()
+
+    if not user:
+        return None
+
+    user.role = role
+    db.commit()
+    principal_cache.invalidate(user_id)
     db.refresh(user)
 
     return user # type: ignore
@@ -98,8 +119,10 @@ def delete_user(db: Session, user_id: int) -> bool:
             return False
 
     db.query(UserMangaVolume).filter(UserMangaVolume.user_id == user_id).delete()
+    db.query(UserCollectionTombstone).filter(UserCollectionTombstone.user_id == user_id).delete()
     db.delete(user)
     db.commit()
+    principal_cache.invalidate(user_id)
     return True
 
 def get_users_to_delete(db: Session) -> list[User]:
@@ -1,45 +1,267 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, func, literal_column, or_, select, tuple_, union
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, Query, joinedload
 from app.models.user_manga_volumes import UserMangaVolume
-from app.schemas.user_collection import UserCollectionAdd, UserCollectionUpdate
+from app.models.user_collection_tombstones import UserCollectionTombstone
+from app.models.manga_volumes import MangaVolume
+from app.models.manga_series import MangaSeries
+from app.models.publishers import Publisher
+from app.schemas.user_collection import UserCollectionAdd, UserCollectionUpdate, CollectionBatchOperation
+from app.crud import stats as crud_stats
+from app.utils.sql import dialect_insert, is_foreign_key_violation
+from app.utils.ranges import to_ranges
 from datetime import datetime, timezone
 
 
-def add_to_collection(db: Session, user_id: int, collection_data: UserCollectionAdd) -> UserMangaVolume:
-    """Añade un tomo a la colección del usuario"""
-    db_collection = UserMangaVolume(
-        user_id=user_id,
-        volume_id=collection_data.volume_id,
-        is_owned=collection_data.is_owned,
-        is_reading=collection_data.is_reading,
-        is_completed=collection_data.is_completed,
-        is_wishlist=collection_data.is_wishlist,
-        purchase_price=collection_data.purchase_price,
-        purchase_date=collection_data.purchase_date,
-        condition=collection_data.condition,
-        notes=collection_data.notes
+def _clear_tombstones(db: Session, user_id: int, volume_ids) -> None:
+    """Un tomo que vuelve a la colección deja de figurar como borrado"""
+    db.query(UserCollectionTombstone).filter(
+        UserCollectionTombstone.user_id == user_id,
+        UserCollectionTombstone.volume_id.in_(set(volume_ids))
+    ).delete(synchronize_session=False)
+
+
+def _add_tombstones(db: Session, user_id: int, volume_ids, version: int) -> None:
+    """Registra borrados para /collection/changes (re-borrar actualiza fecha y versión)"""
+    now = datetime.now(timezone.utc)
+    stmt = dialect_insert(db, UserCollectionTombstone)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserCollectionTombstone.user_id, UserCollectionTombstone.volume_id],
+        set_={"deleted_at": stmt.excluded.deleted_at, "sync_version": stmt.excluded.sync_version}
     )
+    db.execute(stmt, [
+        {"user_id": user_id, "volume_id": volume_id, "deleted_at": now, "sync_version": version}
+        for volume_id in set(volume_ids)
+    ])
+
+
+def add_to_collection(db: Session, user_id: int, collection_data: UserCollectionAdd) -> tuple[str, UserMangaVolume | None]:
+    """Añade un tomo a la colección del usuario con un único INSERT ... ON CONFLICT DO NOTHING.
+
+    Devuelve ("created", entrada), ("duplicate", None) si ya estaba o
+    ("volume_not_found", None) si la FK rechaza el tomo. Sin consultas previas,
+    así que dos altas simultáneas del mismo tomo no acaban en un 500.
+    """
+    version = crud_stats.lock_collection_version(db, user_id)
+    now = datetime.now(timezone.utc)
+    row = collection_data.model_dump() | {
+        "user_id": user_id,
+        "sync_version": version,
+        # Fechas automáticas
+        "started_reading_at": now if collection_data.is_reading else None,
+        "completed_reading_at": now if collection_data.is_completed else None,
+    }
+    stmt = dialect_insert(db, UserMangaVolume).values(**row).on_conflict_do_nothing().returning(UserMangaVolume)
 
-    # Fechas automáticas
-    if collection_data.is_reading:
-        db_collection.started_reading_at = datetime.now(timezone.utc)
+    try:
+        db_collection = db.scalars(stmt).first()
+    except IntegrityError as e:
+        db.rollback()
+        if is_foreign_key_violation(e):
+            return "volume_not_found", None
+        raise
 
-    if collection_data.is_completed:
-        db_collection.completed_reading_at = datetime.now(timezone.utc)
+    if db_collection is None:
+        db.rollback()
+        return "duplicate", None
 
-    db.add(db_collection)
+    _clear_tombstones(db, user_id, [collection_data.volume_id])
+    crud_stats.record_collection_change(db, user_id, None, crud_stats.collection_snapshot(db_collection))
     db.commit()
-    db.refresh(db_collection)
-    return db_collection
 
+    # RETURNING solo trae la fila insertada: el tomo, la serie y la editorial de
+    # la respuesta salen de un SELECT con JOIN que además refresca esa misma
+    # instancia (expirada por el commit) en lugar de una carga perezosa por relación
+    return "created", get_collection_entry(db, user_id, collection_data.volume_id)
+
+
+def _with_volume_graph(query: Query) -> Query:
+    """Carga volume -> series -> publisher junto con las entradas.
+
+    Las tres relaciones son many-to-one, así que un JOIN no multiplica filas y
+    el listado completo sale en una sola consulta en lugar de N+1 lazy loads.
+    """
+    return query.options(
+        joinedload(UserMangaVolume.volume)
+        .joinedload(MangaVolume.series)
+        .joinedload(MangaSeries.publisher)
+    )
+
+
+def add_volumes_to_collection(db: Session, user_id: int, volume_ids: list[int], flags: dict) -> set[int]:
+    """Añade varios tomos existentes a la colección con un solo INSERT.
+
+    Los que ya estaban se omiten (ON CONFLICT DO NOTHING); devuelve los ids añadidos.
+    """
+    if not volume_ids:
+        return set()
+
+    version = crud_stats.lock_collection_version(db, user_id)
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "user_id": user_id,
+            "volume_id": volume_id,
+            "sync_version": version,
+            **flags,
+            "started_reading_at": now if flags.get("is_reading") else None,
+            "completed_reading_at": now if flags.get("is_completed") else None,
+        }
+        for volume_id in dict.fromkeys(volume_ids)
+    ]
+
+    stmt = dialect_insert(db, UserMangaVolume).on_conflict_do_nothing().returning(UserMangaVolume.volume_id)
+    added = set(db.scalars(stmt, rows))
+
+    if added:
+        _clear_tombstones(db, user_id, added)
+        crud_stats.resync_collection_stats(db, user_id)
+    db.commit()
+    return added
+
+
+# Columnas que escribe el upsert del lote (la clave y added_at no)
+_BATCH_COLUMNS = (
+    "is_owned", "is_reading", "is_completed", "is_wishlist", "started_reading_at", "completed_reading_at",
+    "purchase_price", "purchase_date", "condition", "notes", "updated_at", "sync_version",
+)
 
-def get_user_collection(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> list[UserMangaVolume]:
-    """Obtiene toda la colección de un usuario"""
-    return db.query(UserMangaVolume).filter(UserMangaVolume.user_id == user_id).offset(skip).limit(limit).all() # type: ignore
+
+def _resolve_batch_targets(db: Session, operations: list[CollectionBatchOperation]) -> list[list[int]]:
+    """Tomos de cada operación con una sola consulta (ids sueltos + rangos de serie)"""
+    volume_ids = {op.volume_id for op in operations if op.volume_id is not None}
+    series_ids = {op.series_id for op in operations if op.series_id is not None}
+
+    rows = db.query(MangaVolume.id, MangaVolume.series_id, MangaVolume.volume_number).filter(
+        or_(MangaVolume.id.in_(volume_ids), MangaVolume.series_id.in_(series_ids))
+    ).order_by(MangaVolume.series_id, MangaVolume.volume_number).all()
+    known_ids = {row.id for row in rows}
+
+    targets = []
+    for op in operations:
+        if op.volume_id is not None:
+            targets.append([op.volume_id] if op.volume_id in known_ids else [])
+        else:
+            targets.append([
+                row.id for row in rows
+                if row.series_id == op.series_id
+                and (op.volume_from is None or row.volume_number >= op.volume_from)
+                and (op.volume_to is None or row.volume_number <= op.volume_to)
+            ])
+    return targets
+
+
+def apply_collection_batch(db: Session, user_id: int, operations: list[CollectionBatchOperation]) -> list[dict]:
+    """Aplica un lote de altas/cambios/bajas en una transacción.
+
+    Valida los tomos con una consulta IN, precarga las entradas existentes,
+    escribe altas y cambios con un único INSERT ... ON CONFLICT DO UPDATE y las
+    bajas con un DELETE. Si alguna operación falla no se escribe nada.
+    Devuelve un resultado por tomo afectado (o por operación sin tomos).
+    """
+    version = crud_stats.lock_collection_version(db, user_id)
+    targets = _resolve_batch_targets(db, operations)
+    all_ids = {volume_id for ids in targets for volume_id in ids}
+
+    existing = {
+        entry.volume_id: entry
+        for entry in db.query(UserMangaVolume).filter(
+            UserMangaVolume.user_id == user_id,
+            UserMangaVolume.volume_id.in_(all_ids)
+        ).with_for_update()
+    } if all_ids else {}
+
+    now = datetime.now(timezone.utc)
+    results: list[dict] = []
+    upserts: dict[int, dict] = {}
+    removals: set[int] = set()
+    seen: set[int] = set()
+
+    for index, (op, volume_ids) in enumerate(zip(operations, targets)):
+        if not volume_ids:
+            detail = "Volume not found" if op.volume_id is not None else "No volumes of this series in range"
+            results.append({"index": index, "volume_id": op.volume_id, "status": "error", "detail": detail})
+            continue
+
+        fields = op.model_dump(include=set(UserCollectionUpdate.model_fields), exclude_unset=True)
+        for volume_id in volume_ids:
+            result = {"index": index, "volume_id": volume_id, "status": None, "detail": None}
+            results.append(result)
+            current = existing.get(volume_id)
+
+            if volume_id in seen:
+                result.update(status="error", detail="Volume appears more than once in batch")
+                continue
+            seen.add(volume_id)
+
+            if op.op == "remove":
+                if current is None:
+                    result.update(status="skipped", detail="Volume not in collection")
+                else:
+                    removals.add(volume_id)
+                    result["status"] = "removed"
+                continue
+
+            if op.op == "update" and current is None:
+                result.update(status="error", detail="Volume not in collection")
+                continue
+
+            # Fila completa: lo que ya había (o los valores por defecto) + lo enviado
+            row = {column: getattr(current, column) if current else None for column in _BATCH_COLUMNS}
+            for flag in ("is_owned", "is_reading", "is_completed", "is_wishlist"):
+                row[flag] = bool(row[flag])
+            row.update(fields)
+
+            # Misma lógica de fechas que update_collection_entry
+            if fields.get("is_reading") and not row["started_reading_at"]:
+                row["started_reading_at"] = now
+            if fields.get("is_completed") and not row["completed_reading_at"]:
+                row["completed_reading_at"] = now
+
+            row.update(user_id=user_id, volume_id=volume_id, updated_at=now, sync_version=version)
+            upserts[volume_id] = row
+            result["status"] = "updated" if current else "added"
+
+    if any(result["status"] == "error" for result in results):
+        for result in results:
+            if result["status"] != "error":
+                result.update(status="skipped", detail="Batch rejected")
+        db.rollback()
+        return results
+
+    if upserts:
+        stmt = dialect_insert(db, UserMangaVolume)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserMangaVolume.user_id, UserMangaVolume.volume_id],
+            set_={column: stmt.excluded[column] for column in _BATCH_COLUMNS}
+        )
+        db.execute(stmt, list(upserts.values()))
+        _clear_tombstones(db, user_id, upserts)
+
+    if removals:
+        db.query(UserMangaVolume).filter(
+            UserMangaVolume.user_id == user_id,
+            UserMangaVolume.volume_id.in_(removals)
+        ).delete(synchronize_session=False)
+        _add_tombstones(db, user_id, removals, version)
+
+    if upserts or removals:
+        crud_stats.resync_collection_stats(db, user_id)
+    db.commit()
+    return results
+
+
+def get_user_collection(db: Session, user_id: int, skip: int = 0, limit: int = 100, after: tuple | None = None) -> list[UserMangaVolume]:
+    """Obtiene toda la colección de un usuario (paginado por offset o por cursor `(added_at, volume_id)`)"""
+    query = _with_volume_graph(db.query(UserMangaVolume)).filter(UserMangaVolume.user_id == user_id).order_by(UserMangaVolume.added_at, UserMangaVolume.volume_id)
+    if after:
+        return query.filter(tuple_(UserMangaVolume.added_at, UserMangaVolume.volume_id) > tuple_(*after)).limit(limit).all() # type: ignore
+    return query.offset(skip).limit(limit).all() # type: ignore
 
 
 def get_collection_entry(db: Session, user_id: int, volume_id: int) -> UserMangaVolume | None:
     """Obtiene una entrada específica de la colección"""
-    return db.query(UserMangaVolume).filter(
+    return _with_volume_graph(db.query(UserMangaVolume)).filter(
         UserMangaVolume.user_id == user_id,
         UserMangaVolume.volume_id == volume_id
     ).first()
@@ -52,12 +274,17 @@ def update_collection_entry(
         update_data: UserCollectionUpdate
 ) -> UserMangaVolume | None:
     """Actualiza una entrada de la colección"""
+    # Lock antes de leer: el snapshot `before` no puede cambiar hasta el commit
+    version = crud_stats.lock_collection_version(db, user_id)
     db_collection = get_collection_entry(db, user_id, volume_id)
 
     if not db_collection:
+        db.rollback()
         return None
 
     update_dict = update_data.model_dump(exclude_unset=True)
+    before = crud_stats.collection_snapshot(db_collection)
+    update_dict["sync_version"] = version
 
     # Lógica de fechas
     if update_data.is_reading and not db_collection.started_reading_at:
@@ -69,6 +296,8 @@ def update_collection_entry(
     for key, value in update_dict.items():
         setattr(db_collection, key, value)
 
+    db.flush()
+    crud_stats.record_collection_change(db, user_id, before, crud_stats.collection_snapshot(db_collection))
     db.commit()
     db.refresh(db_collection)
     return db_collection
@@ -76,26 +305,192 @@ def update_collection_entry(
 
 def remove_from_collection(db: Session, user_id: int, volume_id: int) -> bool:
     """Elimina un tomo de la colección"""
+    version = crud_stats.lock_collection_version(db, user_id)
     db_collection = get_collection_entry(db, user_id, volume_id)
 
     if not db_collection:
+        db.rollback()
         return False
 
+    before = crud_stats.collection_snapshot(db_collection)
     db.delete(db_collection)
+    db.flush()
+    _add_tombstones(db, user_id, [volume_id], version)
+    crud_stats.record_collection_change(db, user_id, before, None)
     db.commit()
     return True
 
 
+def get_collection_changes(db: Session, user_id: int, since: tuple, limit: int = 500) -> tuple[list[UserMangaVolume], list[UserCollectionTombstone]]:
+    """Entradas escritas y borradas después de `since`.
+
+    `since` = (sync_version, volume_id, sync_version, volume_id): posición de
+    cada flujo (altas/cambios y tombstones), paginados por clave de forma
+    independiente. La versión se asigna bajo el lock de la fila de contadores,
+    así que ninguna escritura confirmada más tarde puede quedar por detrás.
+    """
+    upserts_after, deletions_after = since[:2], since[2:]
+
+    upserts = _with_volume_graph(db.query(UserMangaVolume)).filter(
+        UserMangaVolume.user_id == user_id,
+        tuple_(UserMangaVolume.sync_version, UserMangaVolume.volume_id) > tuple_(*upserts_after)
+    ).order_by(UserMangaVolume.sync_version, UserMangaVolume.volume_id).limit(limit).all()
+
+    deletions = db.query(UserCollectionTombstone).filter(
+        UserCollectionTombstone.user_id == user_id,
+        tuple_(UserCollectionTombstone.sync_version, UserCollectionTombstone.volume_id) > tuple_(*deletions_after)
+    ).order_by(UserCollectionTombstone.sync_version, UserCollectionTombstone.volume_id).limit(limit).all()
+
+    return upserts, deletions
+
+
+def get_collection_by_series(db: Session, user_id: int, skip: int = 0, limit: int = 50, after: tuple | None = None) -> list[dict]:
+    """Una fila por serie de la colección, agregada en una única consulta.
+
+    Los números de tomo poseídos se agregan en la base de datos (array_agg en
+    PostgreSQL, group_concat en SQLite) y se devuelven comprimidos en rangos.
+    Paginado por offset o por cursor `(title, series_id)`.
+    """
+    owned = UserMangaVolume.is_owned == True
+    if db.get_bind().dialect.name == "postgresql":
+        owned_numbers = func.array_agg(MangaVolume.volume_number).filter(owned)
+    else:
+        owned_numbers = func.group_concat(MangaVolume.volume_number).filter(owned)
+
+    catalog_volumes = select(func.count()).where(MangaVolume.series_id == MangaSeries.id).correlate(MangaSeries).scalar_subquery()
+
+    query = db.query(
+        MangaSeries.id.label("series_id"),
+        MangaSeries.title.label("series_title"),
+        MangaSeries.edition_type,
+        MangaSeries.total_volumes,
+        Publisher.name.label("publisher"),
+        catalog_volumes.label("catalog_volumes"),
+        func.count().label("in_collection"),
+        func.count().filter(owned).label("owned_count"),
+        func.count().filter(UserMangaVolume.is_completed == True).label("read_count"),
+        func.count().filter(UserMangaVolume.is_wishlist == True).label("wishlist_count"),
+        owned_numbers.label("owned_numbers")
+    ).select_from(UserMangaVolume).join(
+        MangaVolume, MangaVolume.id == UserMangaVolume.volume_id
+    ).join(
+        MangaSeries, MangaSeries.id == MangaVolume.series_id
+    ).outerjoin(
+        Publisher, Publisher.id == MangaSeries.publisher_id
+    ).filter(
+        UserMangaVolume.user_id == user_id
+    ).group_by(
+        MangaSeries.id, MangaSeries.title, MangaSeries.edition_type, MangaSeries.total_volumes, Publisher.name
+    ).order_by(MangaSeries.title, MangaSeries.id)
+
+    if after:
+        rows = query.filter(tuple_(MangaSeries.title, MangaSeries.id) > tuple_(*after)).limit(limit).all()
+    else:
+        rows = query.offset(skip).limit(limit).all()
+
+    summaries = []
+    for row in rows:
+        numbers = row.owned_numbers or []
+        if isinstance(numbers, str):
+            numbers = [int(number) for number in numbers.split(",")]
+
+        total = row.total_volumes or row.catalog_volumes
+        summaries.append({
+            "series_id": row.series_id,
+            "series_title": row.series_title,
+            "edition_type": row.edition_type,
+            "publisher": row.publisher,
+            "total_volumes": row.total_volumes,
+            "catalog_volumes": row.catalog_volumes,
+            "in_collection": row.in_collection,
+            "owned_count": row.owned_count,
+            "read_count": row.read_count,
+            "wishlist_count": row.wishlist_count,
+            "owned_ranges": to_ranges(numbers),
+            "completion_percentage": round(100 * row.owned_count / total, 2) if total else 0.0
+        })
+    return summaries
+
+
+def get_owned_series_page(db: Session, user_id: int, skip: int = 0, limit: int = 50, after: tuple | None = None) -> list:
+    """Series con algún tomo poseído, ordenadas por (title, id).
+
+    Incluye volumes_version y total_volumes, que junto a la versión de la
+    colección determinan el resultado de /collection/gaps.
+    """
+    owned_series = db.query(MangaVolume.series_id).join(
+        UserMangaVolume, UserMangaVolume.volume_id == MangaVolume.id
+    ).filter(
+        UserMangaVolume.user_id == user_id,
+        UserMangaVolume.is_owned == True
+    )
+
+    query = db.query(
+        MangaSeries.id, MangaSeries.title, MangaSeries.total_volumes, MangaSeries.volumes_version
+    ).filter(
+        MangaSeries.id.in_(owned_series)
+    ).order_by(MangaSeries.title, MangaSeries.id)
+
+    if after:
+        return query.filter(tuple_(MangaSeries.title, MangaSeries.id) > tuple_(*after)).limit(limit).all()
+    return query.offset(skip).limit(limit).all()
+
+
+def get_missing_volumes(db: Session, user_id: int, series_ids: list[int]) -> dict[int, list[int]]:
+    """Números de tomo que faltan por serie, calculados en la base de datos.
+
+    Esperados = volume_number del catálogo UNION 1..total_volumes (CTE recursiva,
+    por si el catálogo está incompleto); se les resta con EXCEPT lo poseído.
+    Las constantes van como literales SQL para que la CTE tenga tipo entero
+    estable en PostgreSQL.
+    """
+    if not series_ids:
+        return {}
+
+    catalog = select(
+        MangaVolume.series_id.label("series_id"), MangaVolume.volume_number.label("volume_number")
+    ).where(MangaVolume.series_id.in_(series_ids))
+
+    sequence = select(
+        MangaSeries.id.label("series_id"), literal_column("1", Integer).label("volume_number")
+    ).where(
+        MangaSeries.id.in_(series_ids),
+        MangaSeries.total_volumes >= 1
+    ).cte("volume_sequence", recursive=True)
+    sequence = sequence.union_all(
+        select(sequence.c.series_id, sequence.c.volume_number + literal_column("1", Integer)).join(
+            MangaSeries, MangaSeries.id == sequence.c.series_id
+        ).where(sequence.c.volume_number < MangaSeries.total_volumes)
+    )
+
+    expected = union(catalog, select(sequence.c.series_id, sequence.c.volume_number)).cte("expected_volumes")
+
+    owned = select(MangaVolume.series_id, MangaVolume.volume_number).join(
+        UserMangaVolume, UserMangaVolume.volume_id == MangaVolume.id
+    ).where(
+        UserMangaVolume.user_id == user_id,
+        UserMangaVolume.is_owned == True,
+        MangaVolume.series_id.in_(series_ids)
+    )
+
+    missing = select(expected.c.series_id, expected.c.volume_number).except_(owned)
+
+    result: dict[int, list[int]] = {series_id: [] for series_id in series_ids}
+    for series_id, volume_number in db.execute(missing):
+        result[series_id].append(volume_number)
+    return result
+
+
 def get_user_wishlist(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> list[UserMangaVolume]:
     """Obtiene la wishlist del usuario"""
-    return db.query(UserMangaVolume).filter(UserMangaVolume.user_id == user_id,UserMangaVolume.is_wishlist == True).offset(skip).limit(limit).all() # type: ignore
+    return _with_volume_graph(db.query(UserMangaVolume)).filter(UserMangaVolume.user_id == user_id,UserMangaVolume.is_wishlist == True).offset(skip).limit(limit).all() # type: ignore
 
 
 def get_user_reading(db: Session, user_id: int) -> list[UserMangaVolume]:
     """Obtiene los tomos que el usuario está leyendo"""
-    return db.query(UserMangaVolume).filter(UserMangaVolume.user_id == user_id,UserMangaVolume.is_reading == True).all() # type: ignore
+    return _with_volume_graph(db.query(UserMangaVolume)).filter(UserMangaVolume.user_id == user_id,UserMangaVolume.is_reading == True).all() # type: ignore
 
 
 def get_user_owned(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> list[UserMangaVolume]:
     """Obtiene los tomos que el usuario posee"""
-    return db.query(UserMangaVolume).filter(UserMangaVolume.user_id == user_id,UserMangaVolume.is_owned == True).offset(skip).limit(limit).all() # type: ignore
\ No newline at end of file
+    return _with_volume_graph(db.query(UserMangaVolume)).filter(UserMangaVolume.user_id == user_id,UserMangaVolume.is_owned == True).offset(skip).limit(limit).all() # type: ignore
\ No newline at end of file
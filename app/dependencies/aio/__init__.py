@@ -0,0 +1 @@
+"""Dependencias para las rutas asíncronas (DB_ASYNC_MODE) sobre AsyncSession."""
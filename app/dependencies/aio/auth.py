@@ -0,0 +1,26 @@
+from fastapi import Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.async_database import get_async_db
+from app.dependencies.auth import PRINCIPAL_COLUMNS, cache_principal, oauth2_scheme, user_id_from_token
+from app.models.user import User
+from app.schemas.user import AuthenticatedUser
+from app.utils.security import principal_cache
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> AuthenticatedUser:
+    """Como app.dependencies.auth.get_current_user, sin ocupar un hilo ni una conexión del pool síncrono"""
+    user_id = user_id_from_token(token)
+
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    result = await db.execute(select(*PRINCIPAL_COLUMNS).where(User.id == user_id))
+    return cache_principal(result.first())
+
+
+async def get_current_active_user(current_user: AuthenticatedUser = Depends(get_current_user)) -> AuthenticatedUser:
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
@@ -1,15 +1,23 @@
+import secrets
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_primary_db
 from app.models.user import User, UserRole
-from app.utils.security import verify_token
+from app.schemas.user import AuthenticatedUser
+from app.utils.security import verify_token, principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
+# Solo las columnas de autorización; el perfil completo lo carga get_current_user_profile
+PRINCIPAL_COLUMNS = (User.id, User.role, User.is_active, User.is_pro, User.deleted_at)
+
+
+def user_id_from_token(token: str) -> int:
+    """`sub` del JWT; 401 si el token no es válido o no lo trae"""
     payload = verify_token(token)
 
     if payload is None:
@@ -19,24 +27,53 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     if user_id is None:
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    return int(user_id)
 
-    if user is None:
+
+def cache_principal(row) -> AuthenticatedUser:
+    """AuthenticatedUser a partir de una fila de PRINCIPAL_COLUMNS (401 si no existe); queda en principal_cache"""
+    if row is None:
         raise credentials_exception
 
-    return user # type: ignore
+    principal = AuthenticatedUser(id=row.id, role=row.role, is_active=bool(row.is_active), is_pro=bool(row.is_pro), deleted_at=row.deleted_at)
+    principal_cache.set(principal.id, principal)
+    return principal
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_primary_db)) -> AuthenticatedUser:
+    # Siempre del primario: un usuario recién dado de alta puede no estar aún en la réplica
+    user_id = user_id_from_token(token)
+
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+    return cache_principal(db.query(*PRINCIPAL_COLUMNS).filter(User.id == user_id).first())
+
+def get_current_active_user(current_user: AuthenticatedUser = Depends(get_current_user)) -> AuthenticatedUser:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_user_profile(current_user: AuthenticatedUser = Depends(get_current_active_user), db: Session = Depends(get_primary_db)) -> User:
+    """Carga la fila completa del usuario para las rutas que devuelven o editan su perfil"""
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        raise credentials_exception
+    return user # type: ignore
+
+def get_current_admin_user(current_user: AuthenticatedUser = Depends(get_current_user)) -> AuthenticatedUser:
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions. Admin rights required.")
     return current_user
 
-def get_current_user_pro(current_user: User = Depends(get_current_user)) -> User:
+def get_current_user_pro(current_user: AuthenticatedUser = Depends(get_current_user)) -> AuthenticatedUser:
     if not current_user.is_pro:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not pro member.")
-    return current_user
\ No newline at end of file
+    return current_user
+
+def require_monitoring_access(token: str = Depends(oauth2_scheme), db: Session = Depends(get_primary_db)) -> None:
+    """Rutas de monitorización: MONITORING_TOKEN (scraper, sondas) o un admin"""
+    if settings.MONITORING_TOKEN and secrets.compare_digest(token.encode(), settings.MONITORING_TOKEN.encode()):
+        return
+    get_current_admin_user(get_current_user(token, db))
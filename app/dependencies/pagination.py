@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Any, Callable
+from fastapi import HTTPException, Query, status
+from app.utils.pagination import decode_cursor
+
+
+def cursor_query(*types: Callable[[Any], Any], param: str = "cursor", description: str = "Keyset cursor from a previous page's next_cursor; send it empty to start"):
+    """Dependencia para el parámetro `cursor` de los listados.
+
+    Devuelve None si no se pidió paginación por cursor (se usan skip/limit),
+    una tupla vacía para la primera página (`?cursor=`) o la clave decodificada.
+    `param` cambia el nombre del parámetro de query (p. ej. `since`).
+    """
+    casts = tuple(datetime.fromisoformat if t is datetime else t for t in types)
+
+    def dependency(cursor: str | None = Query(None, alias=param, description=description)) -> tuple | None:
+        if cursor is None:
+            return None
+        if cursor == "":
+            return ()
+        try:
+            return decode_cursor(cursor, casts)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    return dependency
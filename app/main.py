@@ -1,35 +1,80 @@
+import time
 import uvicorn # Solo para debug
-from fastapi import FastAPI, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db, engine, Base
+from fastapi import FastAPI, Depends, Request, Response, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from app.core.config import settings
+from app.core.database import engine, Base, pool_status, replica_set
+from app.core.metrics import RequestMetricsMiddleware, registry as metrics_registry
+from app.core.migrations import run_migrations
 from app.models import User, Publisher, MangaSeries, MangaVolume, UserMangaVolume
-from app.routers import auth, user, publishers, manga_series, manga_volumes, user_collection
-from app.dependencies.auth import get_current_active_user
+from app.routers import auth, user, publishers, manga_series, manga_volumes, user_collection, catalog_import
+from app.dependencies.auth import get_current_user_profile, get_current_admin_user, require_monitoring_access
+from app.schemas.user import AuthenticatedUser
+from app.services.catalog_cache import catalog_cache
+from app.services.password_hashing import PasswordHashingBusy, password_hasher
+from app.utils.security import principal_cache
 
 app = FastAPI(title="MangaShelfAPI", description="API for storing and querying your manga collection", version="1.0")
 
 # Create tables on DB
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
+
+# Sentencias/tiempo de BD por petición: Server-Timing y /metrics
+app.add_middleware(RequestMetricsMiddleware)
 
 # Registrar routers
+if settings.DB_ASYNC_MODE:
+    # Lecturas calientes con AsyncSession; van primero para sustituir a las síncronas
+    from app.routers.aio import manga_series as aio_series, manga_volumes as aio_volumes, publishers as aio_publishers, user_collection as aio_collection
+    app.include_router(aio_publishers.router)
+    app.include_router(aio_series.router)
+    app.include_router(aio_volumes.router)
+    app.include_router(aio_collection.router)
+
 app.include_router(auth.router)
 app.include_router(user.router)
 app.include_router(publishers.router)
 app.include_router(manga_series.router)
 app.include_router(manga_volumes.router)
 app.include_router(user_collection.router)
+app.include_router(catalog_import.router)
+
+@app.exception_handler(PasswordHashingBusy)
+def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many authentication requests, try again later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 #Routers
 @app.get("/")
 def root():
     return {"message": "Welcome to MangaShelfAPI!", "version": "1.0", "docs": "/docs"}
 
-@app.get("/test-db")
-def test_db(db: Session = Depends(get_db)):
-    return {"message": "Database connection established!", "version": "1.0", "db": db}
+@app.get("/health/db", dependencies=[Depends(require_monitoring_access)])
+def health_db(response: Response):
+    """Conectividad con la BD, latencia de un SELECT 1, ocupación del pool y estado de las réplicas"""
+    start = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except SQLAlchemyError as e:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "unavailable", "error": type(e).__name__, "pool": pool_status(engine)}
+
+    return {
+        "status": "ok",
+        "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+        "pool": pool_status(engine),
+        "replicas": replica_set.status() if replica_set else []
+    }
 
 @app.get("/users/me")
-def read_users_me(current_user: User = Depends(get_current_active_user)):
+def read_users_me(current_user: User = Depends(get_current_user_profile)):
     return {
         "id": current_user.id,
         "username":current_user.username,
@@ -37,6 +82,22 @@ def read_users_me(current_user: User = Depends(get_current_active_user)):
         "is_active": current_user.is_active
     }
 
+@app.get("/internal/stats")
+def internal_stats(current_user: AuthenticatedUser = Depends(get_current_admin_user)):
+    """Métricas internas de las cachés en proceso (por worker)"""
+    return {
+        "auth_cache": principal_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+        "catalog_cache": catalog_cache.stats(),
+        "db_pool": pool_status(engine)
+    }
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_monitoring_access)])
+    def metrics():
+        """Métricas por ruta en formato Prometheus (por worker)"""
+        return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 # Solo para debug
 if __name__ == "__main__":
     uvicorn.run(
@@ -2,4 +2,8 @@ from .user import User
 from .publishers import Publisher
 from .manga_series import MangaSeries
 from .manga_volumes import MangaVolume
-from .user_manga_volumes import UserMangaVolume
\ No newline at end of file
+from .user_manga_volumes import UserMangaVolume
+from .user_collection_stats import UserCollectionStats
+from .refresh_tokens import RefreshToken
+from .user_collection_tombstones import UserCollectionTombstone
+from .db_heartbeat import DatabaseHeartbeat
\ No newline at end of file
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, Float
+from app.core.database import Base
+
+
+class DatabaseHeartbeat(Base):
+    """Latido que el primario escribe para medir el retraso de las réplicas (app.core.replicas)"""
+    __tablename__ = "db_heartbeat"
+
+    id = Column(Integer, primary_key=True)
+    # Epoch en segundos: comparable igual en todos los dialectos
+    beat_at = Column(Float, nullable=False)
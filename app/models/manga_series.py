@@ -9,7 +9,7 @@ class MangaSeries(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False, index=True)
     author = Column(String, nullable=True, index=True)
-    publisher_id = Column(Integer, ForeignKey("publishers.id"), nullable=True)
+    publisher_id = Column(Integer, ForeignKey("publishers.id"), nullable=True, index=True)
     edition_type = Column(String, nullable=True)
     total_volumes = Column(Integer, nullable=True)
     is_completed = Column(Boolean, default=False)
@@ -18,6 +18,9 @@ class MangaSeries(Base):
     started_publication_date = Column(Date, nullable=True)
     ended_publication_date = Column(Date, nullable=True)
 
+    # Se incrementa con cada escritura en sus tomos (ETag de /volumes/series/{id})
+    volumes_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Relaciones
     publisher = relationship("Publisher", back_populates="series")
     volumes = relationship("MangaVolume", back_populates="series", cascade="all, delete-orphan")
\ No newline at end of file
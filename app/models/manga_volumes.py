@@ -10,6 +10,9 @@ class MangaVolume(Base):
     series_id = Column(Integer, ForeignKey("manga_series.id", ondelete="CASCADE"), nullable=False)
     volume_number = Column(Integer, nullable=False)
     isbn = Column(String, unique=True, nullable=True, index=True)
+    # ISBN-13 canónico (sin guiones), calculado al escribir: es la columna de búsqueda por escaneo
+    # y la que impide dar de alta el mismo libro con otra forma de su ISBN
+    isbn13 = Column(String(13), unique=True, nullable=True, index=True)
     title = Column(String, nullable=True)
     pages = Column(Integer, nullable=True)
     chapters = Column(String, nullable=True)
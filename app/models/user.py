@@ -28,4 +28,6 @@ class User(Base):
 
     # Relations
     #mangas = relationship("UserManga", back_populates="user")
-    collection = relationship("UserMangaVolume", back_populates="user", cascade="all, delete-orphan")
\ No newline at end of file
+    collection = relationship("UserMangaVolume", back_populates="user", cascade="all, delete-orphan")
+    collection_stats = relationship("UserCollectionStats", back_populates="user", uselist=False, cascade="all, delete-orphan")
+    refresh_tokens = relationship("RefreshToken", back_populates="user", cascade="all, delete-orphan")
\ No newline at end of file
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Numeric
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class UserCollectionStats(Base):
+    __tablename__ = "user_collection_stats"
+
+    # Una fila por usuario, mantenida con deltas por las escrituras de la colección
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    # Contadores
+    total_volumes = Column(Integer, nullable=False, default=0)
+    total_series = Column(Integer, nullable=False, default=0)
+    owned_count = Column(Integer, nullable=False, default=0)
+    wishlist_count = Column(Integer, nullable=False, default=0)
+    reading_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    total_spent = Column(Numeric(12, 2), nullable=False, default=0)
+
+    # Metadata: version sube con cada escritura en la colección (ETag de los listados)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relaciones
+    user = relationship("User", back_populates="collection_stats")
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
+from app.core.database import Base
+from datetime import datetime, timezone
+
+
+class UserCollectionTombstone(Base):
+    __tablename__ = "user_collection_tombstones"
+    __table_args__ = (
+        Index("ix_user_collection_tombstones_user_sync", "user_id", "sync_version", "volume_id"),
+    )
+
+    # Una por entrada borrada de la colección (para /collection/changes);
+    # volver a añadir el tomo elimina su tombstone
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    volume_id = Column(Integer, primary_key=True)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    # Versión de la colección del borrado (ver UserMangaVolume.sync_version)
+    sync_version = Column(Integer, nullable=False, default=0, server_default="0")
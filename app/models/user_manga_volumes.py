@@ -1,11 +1,37 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean, Text, Numeric, String, Date
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean, Text, Numeric, String, Date, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from datetime import datetime, timezone
+
+
+COLLECTION_STATUSES = ("owned", "reading", "completed", "wishlist")
+
+
+def _status_index(status: str) -> Index:
+    """Índice parcial (user_id, volume_id) de las entradas con un estado.
+
+    El predicado se escribe como lo renderiza el ORM en cada dialecto
+    (`is_owned = 1` en SQLite) para que el planificador pueda usarlo.
+    """
+    return Index(
+        f"ix_user_manga_volumes_user_{status}", "user_id", "volume_id",
+        postgresql_where=text(f"is_{status}"),
+        sqlite_where=text(f"is_{status} = 1")
+    )
 
 
 class UserMangaVolume(Base):
     __tablename__ = "user_manga_volumes"
+    __table_args__ = (
+        # Posición de /collection/changes (sync_version, volume_id)
+        Index("ix_user_manga_volumes_user_sync", "user_id", "sync_version", "volume_id"),
+        # Orden de GET /collection (cursor added_at, volume_id)
+        Index("ix_user_manga_volumes_user_added", "user_id", "added_at", "volume_id"),
+        # La PK empieza por user_id: sin esto, borrar un tomo recorre toda la tabla
+        Index("ix_user_manga_volumes_volume", "volume_id"),
+        *(_status_index(status) for status in COLLECTION_STATUSES),
+    )
 
     # Clave primaria compuesta
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
@@ -18,7 +44,13 @@ class UserMangaVolume(Base):
     is_wishlist = Column(Boolean, default=False)
 
     # Metadata
-    added_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Default en Python además del del servidor: precisión de microsegundos y el
+    # mismo formato que los parámetros, necesario para el cursor (added_at, volume_id)
+    added_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
+    # Última escritura de la entrada
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    # Versión de la colección (UserCollectionStats.version) de la última escritura: /collection/changes
+    sync_version = Column(Integer, nullable=False, default=0, server_default="0")
     started_reading_at = Column(DateTime(timezone=True), nullable=True)
     completed_reading_at = Column(DateTime(timezone=True), nullable=True)
 
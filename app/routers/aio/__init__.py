@@ -0,0 +1,6 @@
+"""Rutas asíncronas de lectura (DB_ASYNC_MODE).
+
+Se registran antes que los routers síncronos y, al coincidir método y ruta,
+las sustituyen. Los parámetros de ruta usan el convertidor `:int` para no
+capturar rutas estáticas hermanas (/series/search, /volumes/isbn/...).
+"""
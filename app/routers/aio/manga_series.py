@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.async_database import get_async_db
+from app.schemas.manga_series import MangaSeriesResponse
+from app.schemas.pagination import CursorPage
+from app.crud.aio import manga_series as crud_series
+from app.dependencies.aio.auth import get_current_active_user
+from app.dependencies.pagination import cursor_query
+from app.utils.pagination import build_page
+from app.schemas.user import AuthenticatedUser
+from app.services.catalog_cache import catalog_cache, to_json
+from app.utils.http_cache import catalog_cache_control, content_etag, is_not_modified, not_modified, set_cache_headers
+
+router = APIRouter(
+    prefix="/series",
+    tags=["Manga Series"]
+)
+
+
+@router.get("/{series_id:int}", response_model=MangaSeriesResponse)
+async def get_series_async(
+        series_id: int,
+        request: Request,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Obtiene una serie por ID (respuesta servida desde la caché de catálogo)"""
+    async def load():
+        series = await crud_series.get_series_by_id(db, series_id)
+        return to_json(MangaSeriesResponse, series) if series else None
+
+    content = await catalog_cache.get_or_load_async("series", str(series_id), load)
+
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Series not found"
+        )
+
+    etag = content_etag(content)
+    if is_not_modified(request, etag):
+        return not_modified(etag, catalog_cache_control())
+
+    return set_cache_headers(Response(content=content, media_type="application/json"), etag, catalog_cache_control())
+
+
+@router.get("/", response_model=list[MangaSeriesResponse] | CursorPage[MangaSeriesResponse])
+async def list_series_async(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=100),
+        after: tuple | None = Depends(cursor_query(str, int)),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Lista todas las series (con `cursor` devuelve una página con next_cursor)"""
+    if after is None:
+        return await crud_series.get_all_series(db, skip, limit)
+
+    series = await crud_series.get_all_series(db, limit=limit, after=after)
+    return build_page(series, limit, key=lambda s: (s.title, s.id))
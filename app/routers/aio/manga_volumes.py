@@ -0,0 +1,89 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.async_database import get_async_db
+from app.schemas.manga_volumes import MangaVolumeResponse
+from app.schemas.pagination import CursorPage
+from app.crud.aio import manga_volumes as crud_volumes
+from app.crud.aio import manga_series as crud_series
+from app.dependencies.aio.auth import get_current_active_user
+from app.dependencies.pagination import cursor_query
+from app.utils.pagination import build_page
+from app.schemas.user import AuthenticatedUser
+from app.services.catalog_cache import catalog_cache, to_json
+from app.utils.http_cache import catalog_cache_control, content_etag, is_not_modified, make_etag, not_modified, set_cache_headers
+
+router = APIRouter(
+    prefix="/volumes",
+    tags=["Manga Volumes"]
+)
+
+
+@router.get("/series/{series_id:int}", response_model=list[MangaVolumeResponse] | CursorPage[MangaVolumeResponse])
+async def get_volumes_by_series_async(
+        series_id: int,
+        request: Request,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(200, ge=1, le=200),
+        after: tuple | None = Depends(cursor_query(int, int)),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Obtiene todos los tomos de una serie (ETag por versión de tomos, como la ruta síncrona)"""
+    version = await crud_series.get_volumes_version(db, series_id)
+    etag = make_etag("series-volumes", series_id, version, skip, limit, after)
+    if is_not_modified(request, etag):
+        return not_modified(etag, catalog_cache_control())
+
+    async def load():
+        if after is None:
+            return to_json(list[MangaVolumeResponse], await crud_volumes.get_volumes_by_series(db, series_id, skip, limit))
+
+        volumes = await crud_volumes.get_volumes_by_series(db, series_id, limit=limit, after=after)
+        return to_json(CursorPage[MangaVolumeResponse], build_page(volumes, limit, key=lambda v: (v.volume_number, v.id)))
+
+    page_key = f"offset:{skip}" if after is None else f"after:{after}"
+    content = await catalog_cache.get_or_load_async("volumes", f"series:{series_id}:v{version}:{page_key}:{limit}", load)
+    return set_cache_headers(Response(content=content, media_type="application/json"), etag, catalog_cache_control())
+
+
+@router.get("/", response_model=list[MangaVolumeResponse] | CursorPage[MangaVolumeResponse])
+async def list_volumes_async(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=100),
+        after: tuple | None = Depends(cursor_query(int)),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Lista todos los tomos (con `cursor` devuelve una página con next_cursor)"""
+    if after is None:
+        return await crud_volumes.get_all_volumes(db, skip, limit)
+
+    volumes = await crud_volumes.get_all_volumes(db, limit=limit, after=after)
+    return build_page(volumes, limit, key=lambda v: (v.id,))
+
+
+@router.get("/{volume_id:int}", response_model=MangaVolumeResponse)
+async def get_volume_async(
+        volume_id: int,
+        request: Request,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Obtiene un tomo por ID (respuesta servida desde la caché de catálogo)"""
+    async def load():
+        volume = await crud_volumes.get_volume_by_id(db, volume_id)
+        return to_json(MangaVolumeResponse, volume) if volume else None
+
+    content = await catalog_cache.get_or_load_async("volumes", str(volume_id), load)
+
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Volume not found"
+        )
+
+    etag = content_etag(content)
+    if is_not_modified(request, etag):
+        return not_modified(etag, catalog_cache_control())
+
+    return set_cache_headers(Response(content=content, media_type="application/json"), etag, catalog_cache_control())
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.async_database import get_async_db
+from app.schemas.publishers import PublisherResponse
+from app.schemas.pagination import CursorPage
+from app.crud.aio import publishers as crud_publishers
+from app.dependencies.aio.auth import get_current_active_user
+from app.dependencies.pagination import cursor_query
+from app.utils.pagination import build_page
+from app.schemas.user import AuthenticatedUser
+from app.services.catalog_cache import catalog_cache, to_json
+from app.utils.http_cache import catalog_cache_control, content_etag, is_not_modified, not_modified, set_cache_headers
+
+router = APIRouter(
+    prefix="/publishers",
+    tags=["Publishers"]
+)
+
+
+@router.get("/{publisher_id:int}", response_model=PublisherResponse)
+async def get_publisher_async(
+        publisher_id: int,
+        request: Request,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Obtiene una editorial por ID (respuesta servida desde la caché de catálogo)"""
+    async def load():
+        publisher = await crud_publishers.get_publisher_by_id(db, publisher_id)
+        return to_json(PublisherResponse, publisher) if publisher else None
+
+    content = await catalog_cache.get_or_load_async("publishers", str(publisher_id), load)
+
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Publisher not found"
+        )
+
+    etag = content_etag(content)
+    if is_not_modified(request, etag):
+        return not_modified(etag, catalog_cache_control())
+
+    return set_cache_headers(Response(content=content, media_type="application/json"), etag, catalog_cache_control())
+
+
+@router.get("/", response_model=list[PublisherResponse] | CursorPage[PublisherResponse])
+async def list_publishers_async(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=100),
+        after: tuple | None = Depends(cursor_query(str, int)),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Lista todas las editoriales (con `cursor` devuelve una página con next_cursor)"""
+    if after is None:
+        return await crud_publishers.get_all_publishers(db, skip, limit)
+
+    publishers = await crud_publishers.get_all_publishers(db, limit=limit, after=after)
+    return build_page(publishers, limit, key=lambda p: (p.name, p.id))
@@ -0,0 +1,43 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, Request, Response, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.async_database import get_async_db
+from app.schemas.user_collection import UserCollectionResponse
+from app.schemas.pagination import CursorPage
+from app.crud.aio import user_collection as crud_collection
+from app.crud.aio import stats as crud_stats
+from app.dependencies.aio.auth import get_current_active_user
+from app.dependencies.pagination import cursor_query
+from app.utils.pagination import build_page
+from app.utils.http_cache import PRIVATE_REVALIDATE, is_not_modified, make_etag, not_modified, set_cache_headers
+from app.schemas.user import AuthenticatedUser
+
+router = APIRouter(
+    prefix="/collection",
+    tags=["Collection"]
+)
+
+
+@router.get("/", response_model=list[UserCollectionResponse] | CursorPage[UserCollectionResponse])
+async def get_my_collection_async(
+        request: Request,
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=100),
+        after: tuple | None = Depends(cursor_query(datetime, int)),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Obtiene toda la colección del usuario actual (con `cursor` devuelve una página con next_cursor)"""
+    version, last_modified = await crud_stats.get_collection_version(db, current_user.id)
+    # Mismo ETag que la ruta síncrona (_collection_validators)
+    etag = make_etag("collection", current_user.id, version, request.url.path, request.url.query)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, PRIVATE_REVALIDATE, last_modified)
+    set_cache_headers(response, etag, PRIVATE_REVALIDATE, last_modified)
+
+    if after is None:
+        return await crud_collection.get_user_collection(db, current_user.id, skip, limit)
+
+    entries = await crud_collection.get_user_collection(db, current_user.id, limit=limit, after=after)
+    return build_page(entries, limit, key=lambda e: (e.added_at, e.volume_id))
@@ -1,49 +1,84 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
 from app.core.database import get_db
 from app.core.config import settings
 from app.schemas.user import UserCreate, UserResponse
-from app.schemas.token import Token
+from app.schemas.token import Token, RefreshTokenRequest
 from app.schemas.oauth import GoogleAuthRequest, AppleAuthRequest
 from app.crud import user as crud_user
 from app.crud import oauth as crud_oauth
+from app.crud import refresh_tokens as crud_refresh_tokens
 from app.services.oauth import verify_google_token, verify_apple_token
-from app.utils.security import verify_password, create_access_token
+from app.services.password_hashing import password_hasher
+from app.utils.security import create_access_token
 
 router = APIRouter(
     prefix="/auth",
     tags=["Authentication"]
 )
 
+def _issue_tokens(db: Session, user_id: int) -> dict:
+    """Access token + refresh token de una sesión nueva"""
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(data={"sub": str(user_id)},
+                                       expires_delta=access_token_expires)
+    refresh_token = crud_refresh_tokens.create_refresh_token(db, user_id)
+
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     """Registers a new user"""
-    db_user = crud_user.get_user_by_email(db, email=user.email) # type: ignore
+    db_user = await run_in_threadpool(crud_user.get_user_by_email, db, email=user.email) # type: ignore
     if db_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-    db_user = crud_user.get_user_by_username(db, username=user.username)
+    db_user = await run_in_threadpool(crud_user.get_user_by_username, db, username=user.username)
     if db_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken")
-    return crud_user.create_user(db=db, user=user)
+
+    # argon2 en su pool dedicado; la escritura en el threadpool normal
+    hashed_password = await password_hasher.hash(user.password)
+    return await run_in_threadpool(crud_user.create_user, db, user, hashed_password)
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = crud_user.get_user_by_username(db, username=form_data.username)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(crud_user.get_user_by_username, db, username=form_data.username)
 
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password", headers={"WWW-Authenticate": "Bearer"},)
-    if not verify_password(form_data.password, user.hashed_password):
+    valid, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password", headers={"WWW-Authenticate": "Bearer"},)
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
 
+    user_id = user.id
+    if new_hash:
+        # El hash usaba parámetros argon2 antiguos: se guarda el recalculado
+        await run_in_threadpool(crud_user.update_user_password_hash, db, user_id, new_hash)
+
+    return await run_in_threadpool(_issue_tokens, db, user_id)
+
+
+@router.post("/refresh", response_model=Token)
+def refresh_access_token(refresh_data: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """Canjea un refresh token por un access token nuevo (sin pasar por argon2).
+
+    El refresh token se rota en cada uso; reutilizar uno ya canjeado revoca la sesión.
+    """
+    rotated = crud_refresh_tokens.rotate_refresh_token(db, refresh_data.refresh_token)
+    if not rotated:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token", headers={"WWW-Authenticate": "Bearer"},)
+
+    user_id, refresh_token = rotated
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(data={"sub": str(user.id)},
+    access_token = create_access_token(data={"sub": str(user_id)},
                                        expires_delta=access_token_expires)
 
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
 
 
 @router.post("/google", response_model=Token)
@@ -56,22 +91,17 @@ async def google_auth(
         # Verificar token de Google
         user_info = await verify_google_token(auth_data.id_token)
 
-        # Obtener o crear usuario
-        user = crud_oauth.get_or_create_google_user(
+        # Obtener o crear usuario (CRUD síncrono fuera del event loop)
+        user = await run_in_threadpool(
+            crud_oauth.get_or_create_google_user,
             db,
             google_id=user_info["google_id"],
             email=user_info["email"],
             name=user_info.get("name")
         )
 
-        # Generar JWT
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": str(user.id)},
-            expires_delta=access_token_expires
-        )
-
-        return {"access_token": access_token, "token_type": "bearer"}
+        # Generar JWT y refresh token
+        return await run_in_threadpool(_issue_tokens, db, user.id)
 
     except ValueError as e:
         raise HTTPException(
@@ -90,21 +120,16 @@ async def apple_auth(
         # Verificar token de Apple
         user_info = await verify_apple_token(auth_data.identity_token)
 
-        # Obtener o crear usuario
-        user = crud_oauth.get_or_create_apple_user(
+        # Obtener o crear usuario (CRUD síncrono fuera del event loop)
+        user = await run_in_threadpool(
+            crud_oauth.get_or_create_apple_user,
             db,
             apple_id=user_info["apple_id"],
             email=auth_data.email or user_info.get("email")
         )
 
-        # Generar JWT
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": str(user.id)},
-            expires_delta=access_token_expires
-        )
-
-        return {"access_token": access_token, "token_type": "bearer"}
+        # Generar JWT y refresh token
+        return await run_in_threadpool(_issue_tokens, db, user.id)
 
     except ValueError as e:
         raise HTTPException(
@@ -0,0 +1,37 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.dependencies.auth import get_current_admin_user
+from app.schemas.catalog_import import CatalogImportReport
+from app.schemas.user import AuthenticatedUser
+from app.services.catalog_import import import_catalog
+
+router = APIRouter(
+    prefix="/import",
+    tags=["Import"]
+)
+
+
+@router.post("/catalog", response_model=CatalogImportReport)
+def import_catalog_file(
+        file: UploadFile = File(..., description="CSV (with header) or NDJSON catalog file"),
+        format: Literal["csv", "ndjson"] | None = Query(None, description="Defaults to the file extension"),
+        chunk_size: int = Query(1000, ge=1, le=10000),
+        on_conflict: Literal["skip", "update"] = Query("update"),
+        dry_run: bool = Query(False),
+        db: Session = Depends(get_db),
+        current_user: AuthenticatedUser = Depends(get_current_admin_user)
+):
+    """Importa editoriales, series y tomos desde un fichero (en bloques por transacción)"""
+    fmt = format
+    if fmt is None:
+        filename = (file.filename or "").lower()
+        fmt = "ndjson" if filename.endswith((".ndjson", ".jsonl")) else "csv" if filename.endswith(".csv") else None
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not infer the file format; pass format=csv or format=ndjson"
+        )
+
+    return import_catalog(db, file.file, fmt, chunk_size=chunk_size, dry_run=dry_run, on_conflict=on_conflict)
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, get_primary_db
 from app.schemas.manga_series import MangaSeriesCreate, MangaSeriesResponse
+from app.schemas.pagination import CursorPage
+from app.schemas.search import AutocompleteSuggestion
 from app.crud import manga_series as crud_series
 from app.dependencies.auth import get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.dependencies.pagination import cursor_query
+from app.utils.pagination import build_page
+from app.schemas.user import AuthenticatedUser
+from app.services.catalog_cache import catalog_cache, to_json
+from app.utils.http_cache import catalog_cache_control, content_etag, is_not_modified, not_modified, set_cache_headers
 
 router = APIRouter(
     prefix="/series",
@@ -16,7 +22,7 @@ router = APIRouter(
 def create_series(
         series: MangaSeriesCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_admin_user)
+        current_user: AuthenticatedUser = Depends(get_current_admin_user)
 ):
     """Crea una serie de manga"""
     return crud_series.create_series(db, series)
@@ -28,19 +34,30 @@ def search_series(
         skip: int = Query(0, ge=0),
         limit: int = Query(20, ge=1, le=100),
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Busca series por título o autor"""
     return crud_series.search_series(db, q, skip, limit)
 
 
+@router.get("/autocomplete", response_model=list[AutocompleteSuggestion])
+def autocomplete_series(
+        q: str = Query(..., min_length=1, description="Prefix typed so far"),
+        limit: int = Query(10, ge=1, le=20),
+        db: Session = Depends(get_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Sugerencias de series por prefijo de título o autor (índice en memoria)"""
+    return crud_series.autocomplete_series(db, q, limit)
+
+
 @router.get("/publisher/{publisher_id}", response_model=list[MangaSeriesResponse])
 def get_series_by_publisher(
         publisher_id: int,
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=100),
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Obtiene series de una editorial específica"""
     return crud_series.get_series_by_publisher(db, publisher_id, skip, limit)
@@ -49,27 +66,45 @@ def get_series_by_publisher(
 @router.get("/{series_id}", response_model=MangaSeriesResponse)
 def get_series(
         series_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        request: Request,
+        db: Session = Depends(get_primary_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
-    """Obtiene una serie por ID"""
-    series = crud_series.get_series_by_id(db, series_id)
+    """Obtiene una serie por ID (respuesta servida desde la caché de catálogo)
 
-    if not series:
+    Los fallos de caché se leen del primario: tras una invalidación por escritura
+    una réplica retrasada volvería a cachear el dato viejo durante todo el TTL.
+    """
+    def load():
+        series = crud_series.get_series_by_id(db, series_id)
+        return to_json(MangaSeriesResponse, series) if series else None
+
+    content = catalog_cache.get_or_load("series", str(series_id), load)
+
+    if content is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Series not found"
         )
 
-    return series
+    etag = content_etag(content)
+    if is_not_modified(request, etag):
+        return not_modified(etag, catalog_cache_control())
 
+    return set_cache_headers(Response(content=content, media_type="application/json"), etag, catalog_cache_control())
 
-@router.get("/", response_model=list[MangaSeriesResponse])
+
+@router.get("/", response_model=list[MangaSeriesResponse] | CursorPage[MangaSeriesResponse])
 def list_series(
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=100),
+        after: tuple | None = Depends(cursor_query(str, int)),
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
-    """Lista todas las series"""
-    return crud_series.get_all_series(db, skip, limit)
\ No newline at end of file
+    """Lista todas las series (con `cursor` devuelve una página con next_cursor)"""
+    if after is None:
+        return crud_series.get_all_series(db, skip, limit)
+
+    series = crud_series.get_all_series(db, limit=limit, after=after)
+    return build_page(series, limit, key=lambda s: (s.title, s.id))
\ No newline at end of file
@@ -1,10 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.schemas.manga_volumes import MangaVolumeCreate, MangaVolumeResponse
+from app.core.database import get_db, get_primary_db
+from app.schemas.manga_volumes import MangaVolumeCreate, MangaVolumeResponse, BulkVolumeResponse, IsbnBatchRequest, IsbnBatchResponse
+from app.schemas.pagination import CursorPage
+from app.schemas.search import AutocompleteSuggestion
 from app.crud import manga_volumes as crud_volumes
+from app.crud import manga_series as crud_series
+from app.crud import user_collection as crud_collection
+from app.utils.isbn import to_isbn13
 from app.dependencies.auth import get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.dependencies.pagination import cursor_query
+from app.utils.pagination import build_page
+from app.schemas.user import AuthenticatedUser
+from app.services.catalog_cache import catalog_cache, to_json
+from app.utils.http_cache import catalog_cache_control, content_etag, is_not_modified, make_etag, not_modified, set_cache_headers
 
 router = APIRouter(
     prefix="/volumes",
@@ -16,7 +26,7 @@ router = APIRouter(
 def create_volume(
         volume: MangaVolumeCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_admin_user)
+        current_user: AuthenticatedUser = Depends(get_current_admin_user)
 ):
     """Crea un tomo de manga"""
     # Verificar si ya existe por ISBN
@@ -31,14 +41,38 @@ def create_volume(
     return crud_volumes.create_volume(db, volume)
 
 
-@router.post("/bulk", response_model=list[MangaVolumeResponse], status_code=status.HTTP_201_CREATED)
+@router.post("/bulk", response_model=BulkVolumeResponse, status_code=status.HTTP_201_CREATED)
 def create_volumes_bulk(
         volumes: list[MangaVolumeCreate],
+        response: Response,
+        on_conflict: Literal["error", "skip", "update"] = Query("error", description="What to do with volumes that already exist"),
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_admin_user)
+        current_user: AuthenticatedUser = Depends(get_current_admin_user)
 ):
-    """Crea múltiples tomos de una vez (bulk insert)"""
-    return crud_volumes.create_volumes_bulk(db, volumes)
+    """Crea múltiples tomos de una vez (bulk insert) con resultado por fila.
+
+    201 si se ha creado algún tomo, 200 si no; 409 con el informe si el lote se
+    rechaza (on_conflict=error o choque con una escritura concurrente).
+    """
+    results = crud_volumes.create_volumes_bulk(db, volumes, on_conflict)
+    report = BulkVolumeResponse(
+        created=sum(1 for result in results if result["status"] == "created"),
+        updated=sum(1 for result in results if result["status"] == "updated"),
+        skipped=sum(1 for result in results if result["status"] == "skipped"),
+        failed=sum(1 for result in results if result["status"] == "error"),
+        results=results
+    )
+
+    rejected = any(result["detail"] in (crud_volumes.BATCH_REJECTED, crud_volumes.WRITE_CONFLICT) for result in results)
+    if report.failed and (on_conflict == "error" or rejected):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=report.model_dump(mode="json")
+        )
+
+    if not report.created:
+        response.status_code = status.HTTP_200_OK
+    return report
 
 
 @router.get("/search", response_model=list[MangaVolumeResponse])
@@ -47,17 +81,62 @@ def search_volumes(
         skip: int = Query(0, ge=0),
         limit: int = Query(20, ge=1, le=100),
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Busca tomos por título o ISBN"""
     return crud_volumes.search_volumes(db, q, skip, limit)
 
 
+@router.get("/autocomplete", response_model=list[AutocompleteSuggestion])
+def autocomplete_volumes(
+        q: str = Query(..., min_length=1, description="Prefix typed so far"),
+        limit: int = Query(10, ge=1, le=20),
+        db: Session = Depends(get_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Sugerencias de tomos por prefijo de título o ISBN (índice en memoria)"""
+    return crud_volumes.autocomplete_volumes(db, q, limit)
+
+
+@router.post("/isbn/batch", response_model=IsbnBatchResponse)
+def get_volumes_by_isbn_batch(
+        batch: IsbnBatchRequest,
+        db: Session = Depends(get_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Resuelve muchos ISBN escaneados en una consulta y, opcionalmente, los añade a la colección"""
+    # Se serializa antes del commit de la colección, que expiraría los objetos
+    found = {key: MangaVolumeResponse.model_validate(volume) for key, volume in crud_volumes.get_volumes_by_isbns(db, batch.isbns).items()}
+
+    added: set[int] = set()
+    if batch.add_to_collection and found:
+        flags = batch.model_dump(include={"is_owned", "is_reading", "is_completed", "is_wishlist"})
+        added = crud_collection.add_volumes_to_collection(db, current_user.id, [volume.id for volume in found.values()], flags)
+
+    results = []
+    for isbn in batch.isbns:
+        isbn13 = to_isbn13(isbn)
+        volume = found.get(isbn13 or isbn)
+        results.append({
+            "isbn": isbn,
+            "isbn13": isbn13,
+            "volume": volume,
+            "added_to_collection": volume is not None and volume.id in added
+        })
+
+    return {
+        "found": sum(1 for result in results if result["volume"] is not None),
+        "not_found": sum(1 for result in results if result["volume"] is None),
+        "added": len(added),
+        "results": results
+    }
+
+
 @router.get("/isbn/{isbn}", response_model=MangaVolumeResponse)
 def get_volume_by_isbn(
         isbn: str,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Obtiene un tomo por ISBN (para escaneo)"""
     volume = crud_volumes.get_volume_by_isbn(db, isbn)
@@ -71,31 +150,80 @@ def get_volume_by_isbn(
     return volume
 
 
-@router.get("/series/{series_id}", response_model=list[MangaVolumeResponse])
+@router.get("/series/{series_id}", response_model=list[MangaVolumeResponse] | CursorPage[MangaVolumeResponse])
 def get_volumes_by_series(
         series_id: int,
+        request: Request,
         skip: int = Query(0, ge=0),
         limit: int = Query(200, ge=1, le=200),
+        after: tuple | None = Depends(cursor_query(int, int)),
+        db: Session = Depends(get_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Obtiene todos los tomos de una serie (con `cursor` devuelve una página con next_cursor).
+
+    ETag según la versión de tomos de la serie: con If-None-Match vigente se
+    responde 304 sin cargar ni serializar los tomos.
+    """
+    version = crud_series.get_volumes_version(db, series_id)
+    etag = make_etag("series-volumes", series_id, version, skip, limit, after)
+    if is_not_modified(request, etag):
+        return not_modified(etag, catalog_cache_control())
+
+    def load():
+        if after is None:
+            return to_json(list[MangaVolumeResponse], crud_volumes.get_volumes_by_series(db, series_id, skip, limit))
+
+        volumes = crud_volumes.get_volumes_by_series(db, series_id, limit=limit, after=after)
+        return to_json(CursorPage[MangaVolumeResponse], build_page(volumes, limit, key=lambda v: (v.volume_number, v.id)))
+
+    page_key = f"offset:{skip}" if after is None else f"after:{after}"
+    content = catalog_cache.get_or_load("volumes", f"series:{series_id}:v{version}:{page_key}:{limit}", load)
+    return set_cache_headers(Response(content=content, media_type="application/json"), etag, catalog_cache_control())
+
+
+@router.get("/", response_model=list[MangaVolumeResponse] | CursorPage[MangaVolumeResponse])
+def list_volumes(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=100),
+        after: tuple | None = Depends(cursor_query(int)),
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
-    """Obtiene todos los tomos de una serie"""
-    return crud_volumes.get_volumes_by_series(db, series_id, skip, limit)
+    """Lista todos los tomos (con `cursor` devuelve una página con next_cursor)"""
+    if after is None:
+        return crud_volumes.get_all_volumes(db, skip, limit)
+
+    volumes = crud_volumes.get_all_volumes(db, limit=limit, after=after)
+    return build_page(volumes, limit, key=lambda v: (v.id,))
 
 
 @router.get("/{volume_id}", response_model=MangaVolumeResponse)
 def get_volume(
         volume_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        request: Request,
+        db: Session = Depends(get_primary_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
-    """Obtiene un tomo por ID"""
-    volume = crud_volumes.get_volume_by_id(db, volume_id)
+    """Obtiene un tomo por ID (respuesta servida desde la caché de catálogo)
 
-    if not volume:
+    Los fallos de caché se leen del primario: tras una invalidación por escritura
+    una réplica retrasada volvería a cachear el dato viejo durante todo el TTL.
+    """
+    def load():
+        volume = crud_volumes.get_volume_by_id(db, volume_id)
+        return to_json(MangaVolumeResponse, volume) if volume else None
+
+    content = catalog_cache.get_or_load("volumes", str(volume_id), load)
+
+    if content is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Volume not found"
         )
 
-    return volume
\ No newline at end of file
+    etag = content_etag(content)
+    if is_not_modified(request, etag):
+        return not_modified(etag, catalog_cache_control())
+
+    return set_cache_headers(Response(content=content, media_type="application/json"), etag, catalog_cache_control())
\ No newline at end of file
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, get_primary_db
 from app.schemas.publishers import PublisherCreate, PublisherResponse
+from app.schemas.pagination import CursorPage
+from app.schemas.search import AutocompleteSuggestion
 from app.crud import publishers as crud_publishers
 from app.dependencies.auth import get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.dependencies.pagination import cursor_query
+from app.utils.pagination import build_page
+from app.schemas.user import AuthenticatedUser
+from app.services.catalog_cache import catalog_cache, to_json
+from app.utils.http_cache import catalog_cache_control, content_etag, is_not_modified, not_modified, set_cache_headers
 
 router = APIRouter(
     prefix="/publishers",
@@ -16,7 +22,7 @@ router = APIRouter(
 def create_publisher(
         publisher: PublisherCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_admin_user)
+        current_user: AuthenticatedUser = Depends(get_current_admin_user)
 ):
     """Crea una editorial"""
     # Verificar que no exista
@@ -36,36 +42,65 @@ def search_publishers(
         skip: int = Query(0, ge=0),
         limit: int = Query(20, ge=1, le=100),
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Busca editoriales por nombre"""
     return crud_publishers.search_publishers(db, q, skip, limit)
 
 
+@router.get("/autocomplete", response_model=list[AutocompleteSuggestion])
+def autocomplete_publishers(
+        q: str = Query(..., min_length=1, description="Prefix typed so far"),
+        limit: int = Query(10, ge=1, le=20),
+        db: Session = Depends(get_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Sugerencias de editoriales por prefijo de nombre (índice en memoria)"""
+    return crud_publishers.autocomplete_publishers(db, q, limit)
+
+
 @router.get("/{publisher_id}", response_model=PublisherResponse)
 def get_publisher(
         publisher_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        request: Request,
+        db: Session = Depends(get_primary_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
-    """Obtiene una editorial por ID"""
-    publisher = crud_publishers.get_publisher_by_id(db, publisher_id)
+    """Obtiene una editorial por ID (respuesta servida desde la caché de catálogo)
 
-    if not publisher:
+    Los fallos de caché se leen del primario: tras una invalidación por escritura
+    una réplica retrasada volvería a cachear el dato viejo durante todo el TTL.
+    """
+    def load():
+        publisher = crud_publishers.get_publisher_by_id(db, publisher_id)
+        return to_json(PublisherResponse, publisher) if publisher else None
+
+    content = catalog_cache.get_or_load("publishers", str(publisher_id), load)
+
+    if content is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Publisher not found"
         )
 
-    return publisher
+    etag = content_etag(content)
+    if is_not_modified(request, etag):
+        return not_modified(etag, catalog_cache_control())
 
+    return set_cache_headers(Response(content=content, media_type="application/json"), etag, catalog_cache_control())
 
-@router.get("/", response_model=list[PublisherResponse])
+
+@router.get("/", response_model=list[PublisherResponse] | CursorPage[PublisherResponse])
 def list_publishers(
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=100),
+        after: tuple | None = Depends(cursor_query(str, int)),
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
-    """Lista todas las editoriales"""
-    return crud_publishers.get_all_publishers(db, skip, limit)
\ No newline at end of file
+    """Lista todas las editoriales (con `cursor` devuelve una página con next_cursor)"""
+    if after is None:
+        return crud_publishers.get_all_publishers(db, skip, limit)
+
+    publishers = crud_publishers.get_all_publishers(db, limit=limit, after=after)
+    return build_page(publishers, limit, key=lambda p: (p.name, p.id))
\ No newline at end of file
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.dependencies.auth import get_current_active_user
+from app.dependencies.auth import get_current_active_user, get_current_user_profile, get_current_admin_user
 from app.models.user import User
-from app.schemas import UserResponse, UserUpdate, PasswordChange
-from app.crud.user import soft_delete_user, restore_user, update_user_password, update_user_profile, get_user_by_email, get_user_by_username
+from app.schemas import UserResponse, UserUpdate, PasswordChange, AuthenticatedUser, UserRoleUpdate
+from app.services.password_hashing import password_hasher
+from app.crud.user import soft_delete_user, restore_user, get_user_by_id, update_user_password_hash, update_user_profile, update_user_role, get_user_by_email, get_user_by_username
 
 router = APIRouter(
     prefix="/users",
@@ -12,12 +14,12 @@ router = APIRouter(
 )
 
 @router.get("/me", response_model=UserResponse)
-def get_my_profile(current_user: User = Depends(get_current_active_user)):
+def get_my_profile(current_user: User = Depends(get_current_user_profile)):
     return current_user
 
 @router.patch("/me", response_model=UserResponse)
 def update_my_profile(user_update: UserUpdate,
-                      current_user: User = Depends(get_current_active_user),
+                      current_user: User = Depends(get_current_user_profile),
                       db: Session = Depends(get_db)):
 
     if user_update.email and user_update.email != current_user.email:
@@ -34,19 +36,23 @@ def update_my_profile(user_update: UserUpdate,
     return updated_user
 
 @router.post("/me/change-password", status_code=status.HTTP_204_NO_CONTENT)
-def update_password(password_data: PasswordChange,
-                    db: Session = Depends(get_db),
-                    current_user: User = Depends(get_current_active_user)):
-    update_user = update_user_password(db, current_user.id, password_data.current_password, password_data.new_password)
+async def update_password(password_data: PasswordChange,
+                          db: Session = Depends(get_db),
+                          current_user: AuthenticatedUser = Depends(get_current_active_user)):
+    user = await run_in_threadpool(get_user_by_id, db, current_user.id)
 
-    if not update_user:
+    if not user or not await password_hasher.verify(password_data.current_password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect Password")
 
+    hashed_password = await password_hasher.hash(password_data.new_password)
+    # Cambiar la contraseña cierra el resto de sesiones (refresh tokens)
+    await run_in_threadpool(update_user_password_hash, db, current_user.id, hashed_password, True)
+
     return None
 
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 def request_account_deletion(db: Session = Depends(get_db),
-                             current_user: User = Depends(get_current_active_user)):
+                             current_user: AuthenticatedUser = Depends(get_current_active_user)):
     deleted_user = soft_delete_user(db, current_user.id)
 
     if not deleted_user:
@@ -57,10 +63,23 @@ def request_account_deletion(db: Session = Depends(get_db),
 
 @router.post("/me/restore")
 def restore_my_account(db: Session = Depends(get_db),
-                       current_user: User = Depends(get_current_active_user)):
+                       current_user: AuthenticatedUser = Depends(get_current_active_user)):
     restored_user = restore_user(db, current_user.id)
 
     if not restored_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Could not restore account (grace period expired or account not deleted)")
 
-    return restored_user
\ No newline at end of file
+    return restored_user
+
+
+@router.patch("/{user_id}/role", response_model=UserResponse)
+def change_user_role(user_id: int,
+                     role_update: UserRoleUpdate,
+                     db: Session = Depends(get_db),
+                     current_user: AuthenticatedUser = Depends(get_current_admin_user)):
+    updated_user = update_user_role(db, user_id, role_update.role)
+
+    if not updated_user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    return updated_user
\ No newline at end of file
@@ -1,11 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.schemas.user_collection import UserCollectionAdd, UserCollectionUpdate, UserCollectionResponse
+from app.core.database import get_db, get_primary_db, read_with_primary_fallback
+from app.schemas.user_collection import (
+    UserCollectionAdd,
+    UserCollectionUpdate,
+    UserCollectionResponse,
+    CollectionChanges,
+    CollectionBatchRequest,
+    CollectionBatchResponse,
+    CollectionSeriesSummary,
+    CollectionSeriesGaps
+)
+from app.schemas.pagination import CursorPage
 from app.crud import user_collection as crud_collection
-from app.crud import manga_volumes as crud_volumes
 from app.dependencies.auth import get_current_active_user
-from app.models.user import User
+from app.dependencies.pagination import cursor_query
+from app.utils.pagination import build_page, encode_cursor
+from app.utils.ranges import to_ranges
+from app.utils.http_cache import PRIVATE_REVALIDATE, is_not_modified, make_etag, not_modified, set_cache_headers
+from app.schemas.user import AuthenticatedUser
 from app.schemas.stats import (
     CollectionStatsResponse,
     PublisherStatsByVolumes,
@@ -22,82 +36,239 @@ router = APIRouter(
 )
 
 
+def _collection_validators(request: Request, db: Session, user_id: int):
+    """ETag / Last-Modified de un listado de la colección a partir de la versión del usuario"""
+    version, updated_at = crud_stats.get_collection_version(db, user_id)
+    return make_etag("collection", user_id, version, request.url.path, request.url.query), updated_at
+
+
 @router.post("/", response_model=UserCollectionResponse, status_code=status.HTTP_201_CREATED)
 def add_volume_to_collection(
         collection_data: UserCollectionAdd,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Añade un tomo a la colección del usuario"""
-    # Verificar que el volumen existe
-    volume = crud_volumes.get_volume_by_id(db, collection_data.volume_id)
-    if not volume:
+    result, entry = crud_collection.add_to_collection(db, current_user.id, collection_data)
+
+    if result == "volume_not_found":
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Volume not found"
         )
 
-    # Verificar que no esté ya en la colección
-    existing = crud_collection.get_collection_entry(db, current_user.id, collection_data.volume_id)
-    if existing:
+    if result == "duplicate":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Volume already in collection"
         )
 
-    return crud_collection.add_to_collection(db, current_user.id, collection_data)
+    return entry
+
+
+@router.post("/batch", response_model=CollectionBatchResponse)
+def apply_collection_batch(
+        batch: CollectionBatchRequest,
+        db: Session = Depends(get_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Añade, actualiza o quita muchos tomos (o rangos de una serie) en una sola transacción"""
+    results = crud_collection.apply_collection_batch(db, current_user.id, batch.operations)
+    report = CollectionBatchResponse(
+        added=sum(1 for result in results if result["status"] == "added"),
+        updated=sum(1 for result in results if result["status"] == "updated"),
+        removed=sum(1 for result in results if result["status"] == "removed"),
+        skipped=sum(1 for result in results if result["status"] == "skipped"),
+        failed=sum(1 for result in results if result["status"] == "error"),
+        results=results
+    )
+
+    # Todo o nada: con algún error no se ha escrito ninguna operación
+    if report.failed:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=report.model_dump(mode="json")
+        )
+
+    return report
 
 
-@router.get("/", response_model=list[UserCollectionResponse])
+@router.get("/", response_model=list[UserCollectionResponse] | CursorPage[UserCollectionResponse])
 def get_my_collection(
+        request: Request,
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=100),
+        after: tuple | None = Depends(cursor_query(datetime, int)),
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
-    """Obtiene toda la colección del usuario actual"""
-    return crud_collection.get_user_collection(db, current_user.id, skip, limit)
+    """Obtiene toda la colección del usuario actual (con `cursor` devuelve una página con next_cursor)"""
+    etag, last_modified = _collection_validators(request, db, current_user.id)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, PRIVATE_REVALIDATE, last_modified)
+    set_cache_headers(response, etag, PRIVATE_REVALIDATE, last_modified)
+
+    if after is None:
+        return crud_collection.get_user_collection(db, current_user.id, skip, limit)
+
+    entries = crud_collection.get_user_collection(db, current_user.id, limit=limit, after=after)
+    return build_page(entries, limit, key=lambda e: (e.added_at, e.volume_id))
+
+
+@router.get("/by-series", response_model=list[CollectionSeriesSummary] | CursorPage[CollectionSeriesSummary])
+def get_collection_by_series(
+        request: Request,
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=100),
+        after: tuple | None = Depends(cursor_query(str, int)),
+        db: Session = Depends(get_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Colección agrupada por serie: contadores, tomos poseídos en rangos y % completado"""
+    etag, last_modified = _collection_validators(request, db, current_user.id)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, PRIVATE_REVALIDATE, last_modified)
+    set_cache_headers(response, etag, PRIVATE_REVALIDATE, last_modified)
+
+    if after is None:
+        return crud_collection.get_collection_by_series(db, current_user.id, skip, limit)
+
+    summaries = crud_collection.get_collection_by_series(db, current_user.id, limit=limit, after=after)
+    return build_page(summaries, limit, key=lambda s: (s["series_title"], s["series_id"]))
+
+
+@router.get("/gaps", response_model=list[CollectionSeriesGaps] | CursorPage[CollectionSeriesGaps])
+def get_collection_gaps(
+        request: Request,
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=100),
+        after: tuple | None = Depends(cursor_query(str, int)),
+        db: Session = Depends(get_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Tomos que faltan en cada serie de la que el usuario posee algún tomo"""
+    series = crud_collection.get_owned_series_page(db, current_user.id, skip, limit, after)
+
+    # Depende de la colección y del catálogo de las series de la página
+    version, updated_at = crud_stats.get_collection_version(db, current_user.id)
+    etag = make_etag(
+        "gaps", current_user.id, version, request.url.query,
+        *(f"{s.id}.{s.volumes_version}.{s.total_volumes}" for s in series)
+    )
+    if is_not_modified(request, etag):
+        return not_modified(etag, PRIVATE_REVALIDATE)
+    set_cache_headers(response, etag, PRIVATE_REVALIDATE)
+
+    missing = crud_collection.get_missing_volumes(db, current_user.id, [s.id for s in series])
+    gaps = [
+        {
+            "series_id": s.id,
+            "series_title": s.title,
+            "total_volumes": s.total_volumes,
+            "missing_count": len(missing[s.id]),
+            "missing_ranges": to_ranges(missing[s.id])
+        }
+        for s in series
+    ]
+
+    if after is None:
+        return gaps
+    return build_page(gaps, limit, key=lambda g: (g["series_title"], g["series_id"]))
 
 
 @router.get("/owned", response_model=list[UserCollectionResponse])
 def get_owned_volumes(
+        request: Request,
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=100),
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Obtiene los tomos que el usuario posee físicamente"""
+    etag, last_modified = _collection_validators(request, db, current_user.id)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, PRIVATE_REVALIDATE, last_modified)
+    set_cache_headers(response, etag, PRIVATE_REVALIDATE, last_modified)
+
     return crud_collection.get_user_owned(db, current_user.id, skip, limit)
 
 
 @router.get("/wishlist", response_model=list[UserCollectionResponse])
 def get_my_wishlist(
+        request: Request,
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=100),
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Obtiene la wishlist del usuario actual"""
+    etag, last_modified = _collection_validators(request, db, current_user.id)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, PRIVATE_REVALIDATE, last_modified)
+    set_cache_headers(response, etag, PRIVATE_REVALIDATE, last_modified)
+
     return crud_collection.get_user_wishlist(db, current_user.id, skip, limit)
 
 
 @router.get("/reading", response_model=list[UserCollectionResponse])
 def get_currently_reading(
+        request: Request,
+        response: Response,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Obtiene los tomos que el usuario está leyendo actualmente"""
+    etag, last_modified = _collection_validators(request, db, current_user.id)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, PRIVATE_REVALIDATE, last_modified)
+    set_cache_headers(response, etag, PRIVATE_REVALIDATE, last_modified)
+
     return crud_collection.get_user_reading(db, current_user.id)
 
 
+@router.get("/changes", response_model=CollectionChanges)
+def get_collection_changes(
+        since: tuple | None = Depends(cursor_query(int, int, int, int, param="since", description="next_token from the previous sync; omit it for a full sync")),
+        limit: int = Query(500, ge=1, le=1000),
+        # Primario: en una réplica con retraso la marca de agua dejaría atrás cambios aún no replicados
+        db: Session = Depends(get_primary_db),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Cambios de la colección desde el último token: entradas escritas y tomos borrados.
+
+    Con has_more=true hay que volver a pedir con next_token. Las posiciones son
+    versiones de la colección asignadas en orden de commit, así que el token
+    nunca deja atrás una escritura confirmada después de leer.
+    """
+    since = since or (0, 0, 0, 0)
+    upserts, deletions = crud_collection.get_collection_changes(db, current_user.id, since, limit)
+
+    next_position = [
+        *((upserts[-1].sync_version, upserts[-1].volume_id) if upserts else since[:2]),
+        *((deletions[-1].sync_version, deletions[-1].volume_id) if deletions else since[2:]),
+    ]
+
+    return {
+        "upserts": upserts,
+        "deletions": deletions,
+        "next_token": encode_cursor(*next_position),
+        "has_more": len(upserts) == limit or len(deletions) == limit
+    }
+
+
 @router.get("/{volume_id}", response_model=UserCollectionResponse)
 def get_collection_entry(
         volume_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Obtiene una entrada específica de la colección"""
-    entry = crud_collection.get_collection_entry(db, current_user.id, volume_id)
+    entry = read_with_primary_fallback(db, lambda session: crud_collection.get_collection_entry(session, current_user.id, volume_id))
 
     if not entry:
         raise HTTPException(
@@ -113,7 +284,7 @@ def update_collection_entry(
         volume_id: int,
         update_data: UserCollectionUpdate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Actualiza una entrada de la colección"""
     updated = crud_collection.update_collection_entry(db, current_user.id, volume_id, update_data)
@@ -131,7 +302,7 @@ def update_collection_entry(
 def remove_volume_from_collection(
         volume_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_active_user)
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Elimina un tomo de la colección"""
     success = crud_collection.remove_from_collection(db, current_user.id, volume_id)
@@ -149,7 +320,7 @@ def remove_volume_from_collection(
 @router.get("/stats/summary", response_model=CollectionStatsResponse)
 def get_collection_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Obtiene estadísticas generales de la colección"""
     return crud_stats.get_collection_stats(db, current_user.id)
@@ -158,7 +329,7 @@ def get_collection_stats(
 def get_top_publishers_by_volumes(
     limit: int = Query(5, ge=1, le=20),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Top editoriales por número de tomos poseídos"""
     return crud_stats.get_top_publishers_by_volumes(db, current_user.id, limit)
@@ -167,7 +338,7 @@ def get_top_publishers_by_volumes(
 def get_top_publishers_by_series(
     limit: int = Query(5, ge=1, le=20),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Top editoriales por número de series diferentes"""
     return crud_stats.get_top_publishers_by_series(db, current_user.id, limit)
@@ -176,7 +347,7 @@ def get_top_publishers_by_series(
 def get_top_authors_by_volumes(
     limit: int = Query(5, ge=1, le=20),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Top autores por número de tomos poseídos"""
     return crud_stats.get_top_authors_by_volumes(db, current_user.id, limit)
@@ -185,7 +356,7 @@ def get_top_authors_by_volumes(
 def get_top_authors_by_series(
     limit: int = Query(5, ge=1, le=20),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Top autores por número de series diferentes"""
     return crud_stats.get_top_authors_by_series(db, current_user.id, limit)
@@ -194,7 +365,7 @@ def get_top_authors_by_series(
 def get_series_progress(
     limit: int = Query(10, ge=1, le=50),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Obtiene el progreso de colección por serie (cuántos tomos tienes de cada serie)"""
     return crud_stats.get_series_progress(db, current_user.id, limit)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from .manga_series import MangaSeriesCreate, MangaSeriesResponse
-from .manga_volumes import MangaVolumeCreate, MangaVolumeResponse
+from .manga_volumes import MangaVolumeCreate, MangaVolumeResponse, BulkVolumeResult, BulkVolumeResponse, IsbnBatchRequest, IsbnLookupResult, IsbnBatchResponse
 from .publishers import PublisherCreate, PublisherResponse
 from .stats import (
     CollectionStatsResponse,
@@ -9,7 +9,10 @@ from .stats import (
     AuthorStatsBySeries,
     SeriesProgress
 )
-from .token import Token, TokenData
-from .user import UserCreate, UserResponse, UserUpdate, PasswordChange
+from .catalog_import import CatalogImportError, CatalogImportReport
+from .pagination import CursorPage
+from .search import AutocompleteSuggestion
+from .token import Token, TokenData, RefreshTokenRequest
+from .user import UserCreate, UserResponse, UserUpdate, PasswordChange, AuthenticatedUser, UserRoleUpdate
 from .oauth import GoogleAuthRequest, AppleAuthRequest
-from .user_collection import UserCollectionAdd, UserCollectionUpdate, UserCollectionResponse
\ No newline at end of file
+from .user_collection import UserCollectionAdd, UserCollectionUpdate, UserCollectionResponse, CollectionDeletion, CollectionChanges, CollectionBatchOperation, CollectionBatchRequest, CollectionBatchResult, CollectionBatchResponse, CollectionSeriesSummary, CollectionSeriesGaps
\ No newline at end of file
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+
+
+class CatalogImportError(BaseModel):
+    line: int
+    detail: str
+
+
+class CatalogImportReport(BaseModel):
+    dry_run: bool
+    rows: int
+    chunks: int
+    publishers_created: int
+    series_created: int
+    series_updated: int
+    volumes_created: int
+    volumes_updated: int
+    volumes_skipped: int
+    errors_count: int
+    errors: list[CatalogImportError]
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Literal
 
 if TYPE_CHECKING:
     from app.schemas.manga_series import MangaSeriesResponse
@@ -35,6 +35,48 @@ class MangaVolumeResponse(BaseModel):
         from_attributes = True
 
 
+class BulkVolumeResult(BaseModel):
+    index: int
+    status: Literal["created", "updated", "skipped", "error"]
+    detail: str | None = None
+    volume: MangaVolumeResponse | None = None
+
+
+class BulkVolumeResponse(BaseModel):
+    created: int
+    updated: int
+    skipped: int
+    failed: int
+    results: list[BulkVolumeResult]
+
+
+class IsbnBatchRequest(BaseModel):
+    isbns: list[str] = Field(..., min_length=1, max_length=500)
+    add_to_collection: bool = False
+    is_owned: bool = True
+    is_reading: bool = False
+    is_completed: bool = False
+    is_wishlist: bool = False
+
+
+class IsbnLookupResult(BaseModel):
+    isbn: str
+    isbn13: str | None
+    volume: MangaVolumeResponse | None = None
+    added_to_collection: bool = False
+
+
+class IsbnBatchResponse(BaseModel):
+    found: int
+    not_found: int
+    added: int
+    results: list[IsbnLookupResult]
+
+
 from app.schemas.manga_series import MangaSeriesResponse
 
-MangaVolumeResponse.model_rebuild()
\ No newline at end of file
+MangaVolumeResponse.model_rebuild()
+IsbnLookupResult.model_rebuild()
+IsbnBatchResponse.model_rebuild()
+BulkVolumeResult.model_rebuild()
+BulkVolumeResponse.model_rebuild()
\ No newline at end of file
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class AutocompleteSuggestion(BaseModel):
+    id: int
+    title: str | None
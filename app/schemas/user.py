@@ -24,10 +24,25 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AuthenticatedUser(BaseModel):
+    """Campos del usuario necesarios para autorizar una petición (cacheables)"""
+    id: int
+    role: UserRole
+    is_active: bool
+    is_pro: bool
+    deleted_at: datetime | None
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
 class UserUpdate(BaseModel):
     email: EmailStr | None = None
     username: str | None = None
 
 class PasswordChange(BaseModel):
     current_password: str
-    new_password: str
\ No newline at end of file
+    new_password: str
+
+class UserRoleUpdate(BaseModel):
+    role: UserRole
\ No newline at end of file
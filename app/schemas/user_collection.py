@@ -1,7 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime, date
 from decimal import Decimal
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Literal
 
 if TYPE_CHECKING:
     from app.schemas.manga_volumes import MangaVolumeResponse
@@ -40,6 +40,7 @@ class UserCollectionResponse(BaseModel):
     is_completed: bool
     is_wishlist: bool
     added_at: datetime
+    updated_at: datetime | None = None
     started_reading_at: datetime | None
     completed_reading_at: datetime | None
     purchase_price: Decimal | None
@@ -54,6 +55,92 @@ class UserCollectionResponse(BaseModel):
         from_attributes = True
 
 
+class CollectionBatchOperation(UserCollectionUpdate):
+    """Una operación del lote: un tomo (`volume_id`) o un rango de una serie.
+
+    `add` inserta o actualiza (upsert); `update` exige que el tomo ya esté en la
+    colección; `remove` lo quita. Los campos de UserCollectionUpdate que se
+    envíen se aplican igual que en PATCH /collection/{volume_id}.
+    """
+    op: Literal["add", "update", "remove"]
+    volume_id: int | None = None
+    series_id: int | None = None
+    volume_from: int | None = Field(None, description="First volume_number of the series range (inclusive)")
+    volume_to: int | None = Field(None, description="Last volume_number of the series range (inclusive)")
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.volume_id is None) == (self.series_id is None):
+            raise ValueError("Provide exactly one of volume_id or series_id")
+        if self.volume_id is not None and (self.volume_from is not None or self.volume_to is not None):
+            raise ValueError("volume_from/volume_to only apply to series_id")
+        return self
+
+
+class CollectionBatchRequest(BaseModel):
+    operations: list[CollectionBatchOperation] = Field(..., min_length=1, max_length=500)
+
+
+class CollectionBatchResult(BaseModel):
+    index: int
+    volume_id: int | None
+    status: Literal["added", "updated", "removed", "skipped", "error"]
+    detail: str | None = None
+
+
+class CollectionBatchResponse(BaseModel):
+    added: int
+    updated: int
+    removed: int
+    skipped: int
+    failed: int
+    results: list[CollectionBatchResult]
+
+
+class CollectionSeriesSummary(BaseModel):
+    series_id: int
+    series_title: str
+    edition_type: str | None
+    publisher: str | None
+    total_volumes: int | None
+    # Tomos de la serie en el catálogo
+    catalog_volumes: int
+    in_collection: int
+    owned_count: int
+    read_count: int
+    wishlist_count: int
+    # Números de tomo poseídos como rangos inclusivos [inicio, fin]
+    owned_ranges: list[tuple[int, int]]
+    # Poseídos sobre total_volumes (o sobre los del catálogo si no se conoce)
+    completion_percentage: float
+
+
+class CollectionSeriesGaps(BaseModel):
+    series_id: int
+    series_title: str
+    total_volumes: int | None
+    missing_count: int
+    # Tomos que faltan (del catálogo y hasta total_volumes) como rangos inclusivos
+    missing_ranges: list[tuple[int, int]]
+
+
+class CollectionDeletion(BaseModel):
+    volume_id: int
+    deleted_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CollectionChanges(BaseModel):
+    upserts: list[UserCollectionResponse]
+    deletions: list[CollectionDeletion]
+    # Se envía como `since` en la siguiente sincronización
+    next_token: str
+    has_more: bool
+
+
 from app.schemas.manga_volumes import MangaVolumeResponse
 
-UserCollectionResponse.model_rebuild()
\ No newline at end of file
+UserCollectionResponse.model_rebuild()
+CollectionChanges.model_rebuild()
\ No newline at end of file
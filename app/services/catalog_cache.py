@@ -0,0 +1,237 @@
+"""Caché de lectura para el catálogo (series, tomos, editoriales).
+
+Guarda la respuesta ya serializada (JSON en bytes), así que un acierto no toca
+la base de datos ni reconstruye el modelo Pydantic. Las claves viven en
+espacios de nombres ("series", "volumes", "publishers") con un número de
+generación: invalidar un espacio sube su generación y todas sus claves dejan
+de encontrarse, sin tener que borrarlas una a una (las viejas caducan por TTL).
+
+Backends:
+  - "memory" (por defecto): LRU en proceso (app.utils.cache.TTLCache). Con
+    varios workers cada uno invalida solo lo suyo; el TTL acota lo obsoleto.
+  - "redis": compartido entre workers (CATALOG_CACHE_URL). Requiere el paquete
+    `redis`. Cualquier cliente con get/set/incr (p. ej. fakeredis) sirve como
+    sustituto local: `catalog_cache.backend = RedisBackend(cliente)`.
+
+Las peticiones concurrentes a una misma clave fría se agrupan: solo una carga
+de la base de datos y el resto espera su resultado (en proceso).
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Awaitable, Callable
+from pydantic import TypeAdapter
+from app.core.config import settings
+from app.utils.cache import TTLCache
+
+try:
+    import redis
+except ImportError:  # dependencia opcional
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: dict[str, int] = defaultdict(int)
+        self._lock = Lock()
+
+    def get(self, key: str) -> bytes | None:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self._cache.set(key, value)
+
+    def generation(self, namespace: str) -> int:
+        return self._generations[namespace]
+
+    def bump(self, namespace: str) -> None:
+        with self._lock:
+            self._generations[namespace] += 1
+
+    def stats(self) -> dict:
+        return {"backend": "memory"} | self._cache.stats()
+
+
+class RedisBackend:
+    def __init__(self, client, ttl: float, prefix: str = "catalog"):
+        self.client = client
+        self.ttl = int(ttl)
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> bytes | None:
+        value = self.client.get(f"{self.prefix}:{key}")
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        self.client.set(f"{self.prefix}:{key}", value, ex=self.ttl)
+
+    def generation(self, namespace: str) -> int:
+        return int(self.client.get(f"{self.prefix}:gen:{namespace}") or 0)
+
+    def bump(self, namespace: str) -> None:
+        self.client.incr(f"{self.prefix}:gen:{namespace}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _build_backend():
+    if settings.CATALOG_CACHE_BACKEND == "redis":
+        if redis is None:
+            raise RuntimeError("CATALOG_CACHE_BACKEND=redis requires the 'redis' package")
+        return RedisBackend(redis.Redis.from_url(settings.CATALOG_CACHE_URL), ttl=settings.CATALOG_CACHE_TTL_SECONDS)
+    return MemoryBackend(maxsize=settings.CATALOG_CACHE_MAX_ENTRIES, ttl=settings.CATALOG_CACHE_TTL_SECONDS)
+
+
+class CatalogCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self._locks: dict[str, list] = {}
+        self._locks_guard = Lock()
+        # Rutas async (DB_ASYNC_MODE): un único event loop por worker, sin guard
+        self._async_locks: dict[str, list] = {}
+        self.loads = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _acquire(self, key: str) -> Lock:
+        with self._locks_guard:
+            entry = self._locks.setdefault(key, [Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+        return entry[0]
+
+    def _release(self, key: str) -> None:
+        with self._locks_guard:
+            entry = self._locks[key]
+            entry[0].release()
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    def _get(self, full_key: str) -> bytes | None:
+        try:
+            return self.backend.get(full_key)
+        except Exception as e:
+            # Un backend caído no debe tumbar la lectura: se va a la base de datos
+            self.errors += 1
+            logger.warning("Catalog cache get failed: %s", e)
+            return None
+
+    def get_or_load(self, namespace: str, key: str, loader: Callable[[], bytes | None]) -> bytes | None:
+        """Devuelve el JSON cacheado o lo genera con `loader` (None = no existe, no se cachea)"""
+        try:
+            generation = self.backend.generation(namespace)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Catalog cache unavailable: %s", e)
+            return loader()
+
+        full_key = f"{namespace}:{generation}:{key}"
+        value = self._get(full_key)
+        if value is not None:
+            return value
+
+        self._acquire(full_key)
+        try:
+            # Otra petición pudo cargarla mientras esperábamos el lock
+            value = self._get(full_key)
+            if value is not None:
+                self.coalesced += 1
+                return value
+
+            self.loads += 1
+            value = loader()
+            if value is not None:
+                try:
+                    self.backend.set(full_key, value)
+                except Exception as e:
+                    self.errors += 1
+                    logger.warning("Catalog cache set failed: %s", e)
+            return value
+        finally:
+            self._release(full_key)
+
+    async def get_or_load_async(self, namespace: str, key: str, loader: Callable[[], Awaitable[bytes | None]]) -> bytes | None:
+        """Como get_or_load, con `loader` asíncrono y agrupación con asyncio.Lock.
+
+        Las llamadas al backend siguen siendo síncronas: inmediatas en memoria;
+        con Redis bloquean el loop lo que dure un GET/SET.
+        """
+        try:
+            generation = self.backend.generation(namespace)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Catalog cache unavailable: %s", e)
+            return await loader()
+
+        full_key = f"{namespace}:{generation}:{key}"
+        value = self._get(full_key)
+        if value is not None:
+            return value
+
+        entry = self._async_locks.setdefault(full_key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                value = self._get(full_key)
+                if value is not None:
+                    self.coalesced += 1
+                    return value
+
+                self.loads += 1
+                value = await loader()
+                if value is not None:
+                    try:
+                        self.backend.set(full_key, value)
+                    except Exception as e:
+                        self.errors += 1
+                        logger.warning("Catalog cache set failed: %s", e)
+                return value
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._async_locks[full_key]
+
+    def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            try:
+                self.backend.bump(namespace)
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Catalog cache invalidation of %r failed: %s", namespace, e)
+
+    def stats(self) -> dict:
+        return self.backend.stats() | {"loads": self.loads, "coalesced": self.coalesced, "errors": self.errors}
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def to_json(schema, value: Any) -> bytes:
+    """Serializa objetos ORM (o dicts que los contienen) con el esquema de respuesta"""
+    adapter = _adapter(schema)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+catalog_cache = CatalogCache(_build_backend())
@@ -0,0 +1,232 @@
+"""Importación de catálogo en streaming (CSV / NDJSON).
+
+Cada fila describe un tomo y la serie/editorial a la que pertenece. Las filas se
+leen de una en una y se escriben en bloques de `chunk_size` por transacción, así
+que la memoria no crece con el tamaño del fichero (solo con el número de
+editoriales y series distintas, que se cachean por nombre).
+
+Columnas reconocidas:
+  publisher, publisher_country,
+  series_title, author, edition_type, total_volumes, is_completed, description,
+  series_cover_image_url, started_publication_date, ended_publication_date,
+  volume_number, isbn, volume_title, pages, chapters, release_date, volume_cover_image_url
+
+Una fila sin volume_number solo crea/actualiza la serie.
+"""
+import csv
+import io
+import json
+import logging
+from typing import IO, Callable, Iterable, Iterator
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from app.crud import manga_volumes as crud_volumes
+from app.crud import publishers as crud_publishers
+from app.crud.manga_series import bump_volumes_version
+from app.models.manga_series import MangaSeries
+from app.models.publishers import Publisher
+from app.schemas.manga_series import MangaSeriesCreate
+from app.schemas.manga_volumes import MangaVolumeCreate
+from app.services.catalog_cache import catalog_cache
+from app.services.search import series_search, volume_search, publisher_search
+
+logger = logging.getLogger(__name__)
+
+# Máximo de errores detallados en el informe (el total se cuenta siempre)
+MAX_REPORTED_ERRORS = 100
+
+_SERIES_FIELDS = {
+    "series_title": "title",
+    "author": "author",
+    "edition_type": "edition_type",
+    "total_volumes": "total_volumes",
+    "is_completed": "is_completed",
+    "description": "description",
+    "series_cover_image_url": "cover_image_url",
+    "started_publication_date": "started_publication_date",
+    "ended_publication_date": "ended_publication_date",
+}
+
+_VOLUME_FIELDS = {
+    "volume_number": "volume_number",
+    "isbn": "isbn",
+    "volume_title": "title",
+    "pages": "pages",
+    "chapters": "chapters",
+    "release_date": "release_date",
+    "volume_cover_image_url": "cover_image_url",
+}
+
+
+def iter_rows(stream: IO, fmt: str) -> Iterator[tuple[int, dict]]:
+    """Lee (número de línea, fila) sin cargar el fichero entero"""
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="") if isinstance(stream.read(0), bytes) else stream
+
+    if fmt == "csv":
+        reader = csv.DictReader(text_stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "ndjson":
+        for line_number, line in enumerate(text_stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _clean(row: dict) -> dict:
+    # En CSV las celdas vacías llegan como "": equivalen a ausentes
+    return {key.strip(): value for key, value in row.items() if key and value not in ("", None)}
+
+
+class CatalogImporter:
+    def __init__(self, db: Session, chunk_size: int = 1000, dry_run: bool = False, on_conflict: str = "update",
+                 progress: Callable[[dict], None] | None = None):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.on_conflict = on_conflict
+        self.progress = progress
+        self._publishers: dict[str, int] = {}
+        self._series: dict[tuple, int] = {}
+        self.report = {
+            "dry_run": dry_run,
+            "rows": 0,
+            "chunks": 0,
+            "publishers_created": 0,
+            "series_created": 0,
+            "series_updated": 0,
+            "volumes_created": 0,
+            "volumes_updated": 0,
+            "volumes_skipped": 0,
+            "errors_count": 0,
+            "errors": [],
+        }
+
+    def _error(self, line: int, detail: str) -> None:
+        self.report["errors_count"] += 1
+        if len(self.report["errors"]) < MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"line": line, "detail": detail})
+
+    def _publisher_id(self, row: dict) -> int | None:
+        name = row.get("publisher")
+        if not name:
+            return None
+        if name not in self._publishers:
+            publisher = crud_publishers.get_publisher_by_name(self.db, name)
+            if not publisher:
+                publisher = Publisher(name=name, country=row.get("publisher_country"), is_active=True)
+                self.db.add(publisher)
+                self.db.flush()
+                self.report["publishers_created"] += 1
+            self._publishers[name] = publisher.id
+        return self._publishers[name]
+
+    def _series_id(self, row: dict, publisher_id: int | None) -> int:
+        data = MangaSeriesCreate(publisher_id=publisher_id, **{field: row[column] for column, field in _SERIES_FIELDS.items() if column in row})
+        key = (data.title, publisher_id, data.edition_type)
+
+        if key not in self._series:
+            series = self.db.query(MangaSeries).filter(
+                MangaSeries.title == data.title,
+                MangaSeries.publisher_id == publisher_id,
+                MangaSeries.edition_type == data.edition_type
+            ).first()
+
+            provided = data.model_dump(exclude_unset=True)
+            if series:
+                # Upsert: la primera aparición de la serie actualiza los campos informados
+                changed = {field: value for field, value in provided.items() if getattr(series, field) != value}
+                for field, value in changed.items():
+                    setattr(series, field, value)
+                if changed:
+                    self.report["series_updated"] += 1
+                    # Los tomos incrustan su serie: cambia la respuesta de sus listados
+                    bump_volumes_version(self.db, [series.id])
+            else:
+                series = MangaSeries(**data.model_dump())
+                self.db.add(series)
+                self.report["series_created"] += 1
+            self.db.flush()
+            self._series[key] = series.id
+
+        return self._series[key]
+
+    def _write_chunk(self, chunk: list[tuple[int, MangaVolumeCreate]]) -> None:
+        if chunk:
+            results = crud_volumes.create_volumes_bulk(self.db, [volume for _, volume in chunk], self.on_conflict, commit=False)
+            for (line, _), result in zip(chunk, results):
+                if result["status"] == "error":
+                    self._error(line, result["detail"])
+                else:
+                    self.report[f"volumes_{result['status']}"] += 1
+
+        # En dry-run todo va en una transacción que se deshace al final
+        if not self.dry_run:
+            self.db.commit()
+        self.db.expunge_all()
+        self.report["chunks"] += 1
+
+        logger.info("Catalog import: %(rows)d rows, %(volumes_created)d created, %(volumes_updated)d updated, %(errors_count)d errors", self.report)
+        if self.progress:
+            self.progress(self.report)
+
+    def run(self, rows: Iterable[tuple[int, dict]]) -> dict:
+        chunk: list[tuple[int, MangaVolumeCreate]] = []
+        pending_rows = 0
+
+        try:
+            for line, raw in rows:
+                self.report["rows"] += 1
+                pending_rows += 1
+                if raw is None:
+                    self._error(line, "Invalid JSON object")
+                    continue
+                row = _clean(raw)
+
+                if "series_title" not in row:
+                    self._error(line, "series_title is required")
+                    continue
+
+                try:
+                    series_id = self._series_id(row, self._publisher_id(row))
+                    if "volume_number" in row:
+                        volume = MangaVolumeCreate(series_id=series_id, **{field: row[column] for column, field in _VOLUME_FIELDS.items() if column in row})
+                        chunk.append((line, volume))
+                except ValidationError as e:
+                    self._error(line, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+                    continue
+
+                if pending_rows >= self.chunk_size:
+                    self._write_chunk(chunk)
+                    chunk, pending_rows = [], 0
+
+            if pending_rows or not self.report["chunks"]:
+                self._write_chunk(chunk)
+        except Exception:
+            self.db.rollback()
+            raise
+
+        if self.dry_run:
+            self.db.rollback()
+        else:
+            # Los índices en memoria se recargan en la siguiente búsqueda
+            series_search.invalidate()
+            volume_search.invalidate()
+            publisher_search.invalidate()
+            # La importación también actualiza filas: fuera todo lo cacheado
+            catalog_cache.invalidate("publishers", "series", "volumes")
+
+        return self.report
+
+
+def import_catalog(db: Session, stream: IO, fmt: str, chunk_size: int = 1000, dry_run: bool = False,
+                   on_conflict: str = "update", progress: Callable[[dict], None] | None = None) -> dict:
+    """Importa un fichero CSV/NDJSON de catálogo y devuelve el informe"""
+    importer = CatalogImporter(db, chunk_size=chunk_size, dry_run=dry_run, on_conflict=on_conflict, progress=progress)
+    return importer.run(iter_rows(stream, fmt))
@@ -1,19 +1,129 @@
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+"""Verificación de ID tokens de Google y Apple.
+
+Las claves públicas (JWKS) se cachean respetando Cache-Control / Expires. Una
+caché caducada se sigue usando mientras se refresca en segundo plano; un `kid`
+desconocido (rotación de claves) fuerza un refresco. Ambos refrescos, fallidos
+o no, se limitan a un intento cada OAUTH_JWKS_MIN_REFRESH_SECONDS. La
+verificación corre en el threadpool para no bloquear el event loop.
+
+En tests se puede sustituir la descarga con `google_jwks.fetcher = stub` /
+`apple_jwks.fetcher = stub`, donde `stub(url)` devuelve `(jwks_dict, headers)`,
+o apuntar GOOGLE_JWKS_URL / APPLE_JWKS_URL a un servidor local.
+"""
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable
 import jwt
 import requests
+from fastapi.concurrency import run_in_threadpool
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
 
-async def verify_google_token(token: str) -> dict:
-    """Verifica el token de Google y devuelve los datos del usuario"""
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+APPLE_ISSUER = "https://appleid.apple.com"
+
+
+def _http_fetch(url: str) -> tuple[dict, dict]:
+    response = requests.get(url, timeout=5)
+    response.raise_for_status()
+    return response.json(), dict(response.headers)
+
+
+def _max_age(headers: dict) -> float:
+    """Segundos de validez según Cache-Control (max-age) o Expires"""
+    headers = {key.lower(): value for key, value in headers.items()}
+
+    for directive in headers.get("cache-control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name.lower() == "max-age" and value.isdigit():
+            return float(value)
+
+    if "expires" in headers:
+        try:
+            return max(0.0, parsedate_to_datetime(headers["expires"]).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+
+    return float(settings.OAUTH_JWKS_DEFAULT_TTL_SECONDS)
+
+
+class JWKSCache:
+    def __init__(self, url: str, fetcher: Callable[[str], tuple[dict, dict]] = _http_fetch):
+        self.url = url
+        self.fetcher = fetcher
+        self._keys: dict[str, dict] = {}
+        self._expires_at = 0.0
+        self._last_fetch = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def _refresh(self) -> None:
+        # Se anota el intento antes de descargar: un fallo también cuenta para el límite
+        with self._lock:
+            self._last_fetch = time.monotonic()
+        jwks, headers = self.fetcher(self.url)
+        keys = {key["kid"]: key for key in jwks.get("keys", []) if "kid" in key}
+        with self._lock:
+            self._keys = keys
+            self._expires_at = time.monotonic() + _max_age(headers)
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing or time.monotonic() - self._last_fetch < settings.OAUTH_JWKS_MIN_REFRESH_SECONDS:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.warning("Background JWKS refresh of %s failed: %s", self.url, e)
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get_key(self, kid: str) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            key = self._keys.get(kid)
+            expired = now >= self._expires_at
+            can_refetch = now - self._last_fetch >= settings.OAUTH_JWKS_MIN_REFRESH_SECONDS
+
+        if key is not None:
+            if expired:
+                # Se sirve la clave conocida y se renueva el juego sin esperar
+                self._refresh_in_background()
+            return key
+
+        # kid desconocido: refresco síncrono (ya estamos fuera del event loop)
+        if can_refetch or not self._keys:
+            self._refresh()
+            with self._lock:
+                key = self._keys.get(kid)
+
+        if key is None:
+            raise ValueError("Public key not found")
+        return key
+
+
+google_jwks = JWKSCache(settings.GOOGLE_JWKS_URL)
+apple_jwks = JWKSCache(settings.APPLE_JWKS_URL)
+
+
+def _decode(token: str, jwks: JWKSCache, audience: list[str] | str, issuer: list[str] | str) -> dict:
+    header = jwt.get_unverified_header(token)
+    public_key = jwt.algorithms.RSAAlgorithm.from_jwk(jwks.get_key(header["kid"]))
+    return jwt.decode(token, public_key, algorithms=["RS256"], audience=audience, issuer=issuer)
+
+
+def _verify_google_token_sync(token: str) -> dict:
     try:
-        # Verificar token con Google
-        idinfo = id_token.verify_oauth2_token(
-            token,
-            google_requests.Request(),
-            settings.GOOGLE_CLIENT_ID
-        )
+        idinfo = _decode(token, google_jwks, settings.GOOGLE_CLIENT_ID, GOOGLE_ISSUERS)
 
         return {
             "email": idinfo["email"],
@@ -24,41 +134,10 @@ async def verify_google_token(token: str) -> dict:
         raise ValueError(f"Invalid Google token: {str(e)}")
 
 
-async def verify_apple_token(identity_token: str) -> dict:
-    """Verifica el token de Apple y devuelve los datos del usuario"""
+def _verify_apple_token_sync(identity_token: str) -> dict:
     try:
-        # Apple usa JWT estándar
-        # En producción deberías verificar con las claves públicas de Apple (JWKS)
-        # Por ahora, decodificamos sin verificar firma (solo para desarrollo)
-
-        # Decodificar header para obtener el kid (key id)
-        unverified_header = jwt.get_unverified_header(identity_token)
-
-        # Obtener las claves públicas de Apple
-        keys_url = "https://appleid.apple.com/auth/keys"
-        response = requests.get(keys_url)
-        apple_keys = response.json()
-
-        # Encontrar la clave correcta
-        public_key = None
-        for key in apple_keys['keys']:
-            if key['kid'] == unverified_header['kid']:
-                public_key = jwt.algorithms.RSAAlgorithm.from_jwk(key)
-                break
-
-        if not public_key:
-            raise ValueError("Public key not found")
-
         valid_audiences = [settings.APPLE_CLIENT_ID, "host.exp.Exponent"]
-
-        # Verificar y decodificar el token
-        decoded = jwt.decode(
-            identity_token,
-            public_key,
-            algorithms=['RS256'],
-            audience=valid_audiences,  # Bundle ID de tu app
-            issuer='https://appleid.apple.com'
-        )
+        decoded = _decode(identity_token, apple_jwks, valid_audiences, APPLE_ISSUER)
 
         return {
             "email": decoded.get("email"),
@@ -69,4 +148,14 @@ async def verify_apple_token(identity_token: str) -> dict:
     except jwt.InvalidTokenError as e:
         raise ValueError(f"Invalid Apple token: {str(e)}")
     except Exception as e:
-        raise ValueError(f"Error verifying Apple token: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Error verifying Apple token: {str(e)}")
+
+
+async def verify_google_token(token: str) -> dict:
+    """Verifica el token de Google y devuelve los datos del usuario"""
+    return await run_in_threadpool(_verify_google_token_sync, token)
+
+
+async def verify_apple_token(identity_token: str) -> dict:
+    """Verifica el token de Apple y devuelve los datos del usuario"""
+    return await run_in_threadpool(_verify_apple_token_sync, identity_token)
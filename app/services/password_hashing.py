@@ -0,0 +1,108 @@
+"""Pool dedicado para hash/verificación de contraseñas con argon2.
+
+argon2 es caro a propósito (CPU y memoria). Si se ejecutara en el threadpool
+compartido, una ráfaga de logins dejaría sin hilos al resto de rutas síncronas.
+Aquí corre en un ThreadPoolExecutor propio (argon2-cffi libera el GIL, así que
+los hilos trabajan en paralelo) y las rutas lo esperan con `await`, sin ocupar
+ningún hilo mientras tanto.
+
+La cola está acotada: con PASSWORD_HASH_WORKERS trabajando y
+PASSWORD_HASH_MAX_QUEUE esperando, la siguiente petición recibe
+PasswordHashingBusy (503 + Retry-After en app.main).
+"""
+import asyncio
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable
+from app.core.config import settings
+from app.utils.security import pwd_context
+
+
+class PasswordHashingBusy(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+class PasswordHashingPool:
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = Lock()
+        self._pending = 0
+        self._running = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Creación perezosa: importar el módulo no arranca hilos
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    def _retry_after(self) -> int:
+        avg_run = self._run_total / self.completed if self.completed else 1.0
+        return max(1, math.ceil(avg_run * self._pending / self.max_workers))
+
+    async def _submit(self, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordHashingBusy(self._retry_after())
+            self._pending += 1
+            self.peak_queued = max(self.peak_queued, self._pending - self.max_workers)
+        submitted_at = time.monotonic()
+
+        def task():
+            started_at = time.monotonic()
+            with self._lock:
+                self._running += 1
+                self._wait_total += started_at - submitted_at
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+                    self.completed += 1
+                    self._run_total += time.monotonic() - started_at
+
+        return await asyncio.wrap_future(self._get_executor().submit(task))
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str | None) -> bool:
+        if not hashed_password:
+            return False
+        return await self._submit(pwd_context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str | None) -> tuple[bool, str | None]:
+        """Verifica y, si el hash usa parámetros antiguos, devuelve el nuevo hash"""
+        if not hashed_password:
+            return False, None
+        return await self._submit(pwd_context.verify_and_update, password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "peak_queued": self.peak_queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(1000 * self._wait_total / self.completed, 2) if self.completed else 0.0,
+                "avg_run_ms": round(1000 * self._run_total / self.completed, 2) if self.completed else 0.0,
+            }
+
+
+password_hasher = PasswordHashingPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
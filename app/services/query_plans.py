@@ -0,0 +1,96 @@
+"""Comprobación de planes de las consultas calientes de la colección.
+
+Ejecuta las funciones CRUD reales para un usuario, captura el SQL que emiten y
+lo pasa por EXPLAIN. En PostgreSQL se desactiva enable_seqscan dentro de la
+transacción: si aun así aparece un Seq Scan es que no hay índice utilizable
+(con tablas pequeñas el planificador elegiría un scan secuencial de todos modos).
+En SQLite se marca cualquier `SCAN <tabla>` sin índice.
+"""
+import re
+from datetime import datetime, timezone
+from typing import Callable
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.crud import stats as crud_stats
+from app.crud import user_collection as crud_collection
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Posición inicial de /collection/changes: (sync_version, volume_id) de cada flujo
+_SYNC_START = (0, 0, 0, 0)
+
+# Nombre -> llamada con (db, user_id)
+HOT_QUERIES: dict[str, Callable[[Session, int], object]] = {
+    "collection": lambda db, uid: crud_collection.get_user_collection(db, uid, limit=50),
+    "collection (cursor)": lambda db, uid: crud_collection.get_user_collection(db, uid, limit=50, after=(_EPOCH, 0)),
+    "owned": lambda db, uid: crud_collection.get_user_owned(db, uid),
+    "wishlist": lambda db, uid: crud_collection.get_user_wishlist(db, uid),
+    "reading": lambda db, uid: crud_collection.get_user_reading(db, uid),
+    "by-series": lambda db, uid: crud_collection.get_collection_by_series(db, uid),
+    "gaps (series)": lambda db, uid: crud_collection.get_owned_series_page(db, uid),
+    "changes": lambda db, uid: crud_collection.get_collection_changes(db, uid, since=_SYNC_START),
+    "stats: summary (recompute)": lambda db, uid: crud_stats.compute_collection_stats(db, uid),
+    "stats: publishers by volumes": lambda db, uid: crud_stats.get_top_publishers_by_volumes(db, uid),
+    "stats: publishers by series": lambda db, uid: crud_stats.get_top_publishers_by_series(db, uid),
+    "stats: authors by volumes": lambda db, uid: crud_stats.get_top_authors_by_volumes(db, uid),
+    "stats: authors by series": lambda db, uid: crud_stats.get_top_authors_by_series(db, uid),
+    "stats: series progress": lambda db, uid: crud_stats.get_series_progress(db, uid),
+}
+
+_PG_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+_SQLITE_SCAN = re.compile(r"\bSCAN (\w+)(?!.*\bINDEX\b)")
+
+
+def _capture(db: Session, call: Callable[[Session, int], object], user_id: int) -> list[tuple[str, object]]:
+    """SELECTs emitidos por una llamada CRUD, con sus parámetros de driver"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        call(db, user_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def _explain(db: Session, statement: str, parameters) -> list[str]:
+    connection = db.connection()
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).all()
+        return [row[0] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [row[-1] for row in rows]
+
+
+def full_scans(db: Session, plan: list[str]) -> set[str]:
+    """Tablas recorridas enteras (sin índice) según el plan"""
+    pattern = _PG_SEQ_SCAN if db.get_bind().dialect.name == "postgresql" else _SQLITE_SCAN
+    return {match.group(1) for line in plan for match in pattern.finditer(line)}
+
+
+def check_hot_queries(db: Session, user_id: int, tables: set[str] | None = None) -> list[dict]:
+    """EXPLAIN de cada consulta caliente; `full_scans` lista las tablas vigiladas sin índice.
+
+    Por defecto solo se vigila user_manga_volumes; el resto del plan se
+    devuelve para inspección. La transacción se deshace al terminar.
+    """
+    tables = tables if tables is not None else {"user_manga_volumes"}
+    report = []
+    try:
+        for name, call in HOT_QUERIES.items():
+            for statement, parameters in _capture(db, call, user_id):
+                plan = _explain(db, statement, parameters)
+                report.append({
+                    "query": name,
+                    "statement": statement,
+                    "plan": plan,
+                    "full_scans": sorted(full_scans(db, plan) & tables)
+                })
+    finally:
+        db.rollback()
+    return report
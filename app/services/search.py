@@ -0,0 +1,306 @@
+"""Búsqueda de catálogo (series, tomos, editoriales).
+
+Con PostgreSQL se usan los índices trigram sobre `shelf_search_fold(...)` creados
+en app.core.migrations y los resultados se ordenan por `word_similarity`. En
+cualquier otro motor (SQLite en tests/desarrollo), o si la extensión no está
+disponible, se usa un índice en memoria con el mismo plegado de texto.
+
+El autocompletado siempre se sirve desde memoria con dos arrays ordenados
+recorridos con bisect: el del campo principal (los mejores candidatos) y el de
+claves (cada sufijo que empieza en una palabra). Solo la primera
+carga bloquea la petición; pasado SEARCH_INDEX_TTL_SECONDS (o tras invalidate())
+el índice se reconstruye en un hilo con su propia sesión y, mientras tanto, se
+sigue sirviendo el anterior.
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from threading import Lock
+from sqlalchemy import func, or_, text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.manga_series import MangaSeries
+from app.models.manga_volumes import MangaVolume
+from app.models.publishers import Publisher
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM = re.compile(r"[\W_]+")
+_LONG_O = re.compile(r"o[ou]")
+
+
+def _strip_latin_accents(value: str) -> str:
+    # Solo se quitan diacríticos de letras latinas: el dakuten de ガ no es un acento
+    chars: list[str] = []
+    for ch in unicodedata.normalize("NFKD", value):
+        if unicodedata.combining(ch) and chars and chars[-1] <= "ɏ":
+            continue
+        chars.append(ch)
+    return unicodedata.normalize("NFC", "".join(chars))
+
+
+def fold(value: str | None) -> str:
+    """Normaliza texto para buscar: sin mayúsculas, acentos ni puntuación, romaji plegado.
+
+    "Tōkyō Ghoul", "Toukyou ghoul" y "TOKYO-GHOUL" dan lo mismo ("tokyo ghoul").
+    Debe coincidir con la función SQL shelf_search_fold.
+    """
+    if not value:
+        return ""
+    folded = _NON_ALNUM.sub(" ", _strip_latin_accents(value).casefold())
+    return _LONG_O.sub("o", folded).replace("uu", "u").strip()
+
+
+def _compact(value: str | None) -> str:
+    """Para campos de código (ISBN): solo caracteres alfanuméricos"""
+    return _NON_ALNUM.sub("", value or "").lower()
+
+
+def _like_pattern(value: str) -> str:
+    """`%value%` con los comodines de LIKE escapados (usar con escape="\\")"""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _remove_sorted(keys: list, item: tuple) -> None:
+    i = bisect.bisect_left(keys, item)
+    if i < len(keys) and keys[i] == item:
+        del keys[i]
+
+
+def _score(query: str, terms: list[str], field: str) -> float:
+    if not field:
+        return 0.0
+    if field == query:
+        return 1.0
+    if field.startswith(query):
+        return 0.9
+    if f" {query}" in f" {field}":
+        return 0.8
+    if query in field:
+        return 0.6
+    matched = sum(1 for term in terms if term in field)
+    return 0.5 * matched / len(terms) if terms else 0.0
+
+
+class CatalogSearch:
+    """Búsqueda sobre un modelo de catálogo con backend elegido en tiempo de consulta"""
+
+    def __init__(self, model, fields: tuple[str, ...], code_fields: tuple[str, ...] = ()):
+        self.model = model
+        self.fields = fields
+        self.code_fields = code_fields
+        self._docs: dict[int, tuple[str, ...]] = {}
+        self._labels: dict[int, str | None] = {}
+        self._prefixes: list[tuple[str, int]] = []
+        # Campo principal plegado de cada fila, ordenado: primer nivel del autocompletado
+        self._heads: list[tuple[str, int]] = []
+        self._loaded_at: float | None = None
+        self._stale = False
+        # Filas añadidas durante una recarga (None si no hay ninguna en curso)
+        self._pending: list[tuple[int, list]] | None = None
+        self._lock = Lock()
+        self._refreshing = Lock()
+
+    # ----- índice en memoria -----
+
+    def _document(self, values) -> tuple[str, ...]:
+        folded = tuple(fold(value) for value in values[:len(self.fields)])
+        return folded + tuple(_compact(value) for value in values[len(self.fields):])
+
+    @staticmethod
+    def _prefix_keys(doc: tuple[str, ...]) -> set[str]:
+        keys = set()
+        for field in doc:
+            for match in re.finditer(r"\S+", field):
+                keys.add(field[match.start():])
+        return keys
+
+    def _build(self, db: Session) -> tuple[dict, dict, list, list]:
+        columns = [getattr(self.model, name) for name in self.fields + self.code_fields]
+        rows = db.query(self.model.id, *columns).all()
+        docs = {row[0]: self._document(row[1:]) for row in rows}
+        labels = {row[0]: row[1] for row in rows}
+        prefixes = sorted((key, doc_id) for doc_id, doc in docs.items() for key in self._prefix_keys(doc))
+        heads = sorted((doc[0], doc_id) for doc_id, doc in docs.items())
+        return docs, labels, prefixes, heads
+
+    def _unindex_row(self, row_id: int) -> None:
+        # Llamar con self._lock tomado
+        doc = self._docs.pop(row_id, None)
+        if doc is None:
+            return
+        self._labels.pop(row_id, None)
+        for key in self._prefix_keys(doc):
+            _remove_sorted(self._prefixes, (key, row_id))
+        _remove_sorted(self._heads, (doc[0], row_id))
+
+    def _index_row(self, row_id: int, values: list) -> None:
+        # Llamar con self._lock tomado; si la fila ya estaba se sustituyen sus claves
+        self._unindex_row(row_id)
+        doc = self._document(values)
+        self._docs[row_id] = doc
+        self._labels[row_id] = values[0]
+        for key in self._prefix_keys(doc):
+            bisect.insort(self._prefixes, (key, row_id))
+        bisect.insort(self._heads, (doc[0], row_id))
+
+    def _reload(self, db: Session) -> None:
+        """Construye el índice fuera del lock y lo sustituye de golpe"""
+        with self._lock:
+            self._pending = []
+        docs, labels, prefixes, heads = self._build(db)
+        with self._lock:
+            self._docs, self._labels, self._prefixes, self._heads = docs, labels, prefixes, heads
+            # Filas creadas mientras se leía el catálogo
+            for row_id, values in self._pending:
+                self._index_row(row_id, values)
+            self._pending = None
+            self._loaded_at = time.monotonic()
+
+    def _refresh_in_background(self) -> None:
+        def run():
+            try:
+                with SessionLocal() as db:
+                    self._reload(db)
+            except Exception:
+                logger.exception("Search index refresh failed for %s", self.model.__tablename__)
+            finally:
+                self._refreshing.release()
+
+        if self._refreshing.acquire(blocking=False):
+            self._stale = False
+            threading.Thread(target=run, daemon=True).start()
+
+    def _ensure_loaded(self, db: Session) -> None:
+        """Carga el índice la primera vez; si está caducado lo refresca en segundo plano y sirve el actual"""
+        if self._loaded_at is None:
+            with self._refreshing:
+                if self._loaded_at is None:
+                    self._reload(db)
+            return
+        if self._stale or time.monotonic() - self._loaded_at >= settings.SEARCH_INDEX_TTL_SECONDS:
+            self._refresh_in_background()
+
+    def add(self, obj) -> None:
+        """Indexa una fila recién creada o actualizada (si el índice ya estaba cargado)"""
+        values = [getattr(obj, name) for name in self.fields + self.code_fields]
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((obj.id, values))
+            if self._loaded_at is None:
+                return
+            self._index_row(obj.id, values)
+
+    def invalidate(self) -> None:
+        """Marca el índice como caducado; el próximo uso lo recarga en segundo plano"""
+        self._stale = True
+
+    def _search_memory(self, db: Session, query: str, skip: int, limit: int) -> list:
+        self._ensure_loaded(db)
+        folded = fold(query)
+        terms = folded.split()
+        code = _compact(query)
+        n_fields = len(self.fields)
+
+        with self._lock:
+            docs = list(self._docs.items())
+
+        scored = []
+        for doc_id, doc in docs:
+            score = max((_score(folded, terms, field) for field in doc[:n_fields]), default=0.0)
+            if code and any(code in field for field in doc[n_fields:]):
+                score = max(score, 0.7)
+            if score > 0:
+                scored.append((-score, doc_id))
+
+        scored.sort()
+        page_ids = [doc_id for _, doc_id in scored[skip:skip + limit]]
+        if not page_ids:
+            return []
+
+        rows = {row.id: row for row in db.query(self.model).filter(self.model.id.in_(page_ids)).all()}
+        return [rows[doc_id] for doc_id in page_ids if doc_id in rows]
+
+    def autocomplete(self, db: Session, prefix: str, limit: int = 10) -> list[dict]:
+        """Top-k sugerencias cuyo texto (o alguna de sus palabras) empieza por `prefix`.
+
+        Se prefieren las que empiezan por el prefijo en el campo principal y,
+        dentro de eso, los textos más cortos.
+        """
+        self._ensure_loaded(db)
+        queries = {fold(prefix), _compact(prefix) if self.code_fields else ""} - {""}
+        if not queries:
+            return []
+
+        def rank(doc_id: int) -> tuple:
+            return len(self._docs[doc_id][0]), self._docs[doc_id][0], doc_id
+
+        with self._lock:
+            # Primero las que empiezan por el prefijo en el campo principal, entre todas ellas
+            first: set[int] = set()
+            for query in queries:
+                first.update(self._scan(self._heads, query))
+            chosen = heapq.nsmallest(limit, first, key=rank)
+            # Si no llegan a k, se completa con las que lo tienen en otra palabra o campo
+            if len(chosen) < limit:
+                rest: set[int] = set()
+                for query in queries:
+                    rest.update(self._scan(self._prefixes, query))
+                chosen += heapq.nsmallest(limit - len(chosen), rest - first, key=rank)
+            return [{"id": doc_id, "title": self._labels[doc_id]} for doc_id in chosen]
+
+    @staticmethod
+    def _scan(keys: list[tuple[str, int]], query: str):
+        """Ids del rango de `keys` cuya clave empieza por `query`"""
+        i = bisect.bisect_left(keys, (query,))
+        while i < len(keys) and keys[i][0].startswith(query):
+            yield keys[i][1]
+            i += 1
+
+    # ----- PostgreSQL -----
+
+    def _search_postgres(self, db: Session, query: str, skip: int, limit: int) -> list:
+        folded_query = func.shelf_search_fold(query)
+        conditions = []
+        scores = []
+
+        for name in self.fields:
+            column = func.shelf_search_fold(getattr(self.model, name))
+            conditions.append(column.like(func.concat("%", folded_query, "%")))
+            conditions.append(folded_query.op("<%")(column))
+            scores.append(func.coalesce(func.word_similarity(folded_query, column), 0))
+
+        for name in self.code_fields:
+            conditions.append(getattr(self.model, name).ilike(_like_pattern(query), escape="\\"))
+
+        score = func.greatest(*scores) if len(scores) > 1 else scores[0]
+
+        return db.query(self.model).filter(or_(*conditions)).order_by(score.desc(), self.model.id).offset(skip).limit(limit).all()
+
+    def search(self, db: Session, query: str, skip: int = 0, limit: int = 20) -> list:
+        if _postgres_search_available(db):
+            return self._search_postgres(db, query, skip, limit)
+        return self._search_memory(db, query, skip, limit)
+
+
+_postgres_ready: bool | None = None
+
+
+def _postgres_search_available(db: Session) -> bool:
+    global _postgres_ready
+    if settings.SEARCH_BACKEND == "memory" or db.get_bind().dialect.name != "postgresql":
+        return False
+    if _postgres_ready is None:
+        _postgres_ready = bool(db.execute(text("SELECT to_regprocedure('shelf_search_fold(text)') IS NOT NULL")).scalar())
+    return _postgres_ready
+
+
+series_search = CatalogSearch(MangaSeries, ("title", "author"))
+volume_search = CatalogSearch(MangaVolume, ("title",), code_fields=("isbn",))
+publisher_search = CatalogSearch(Publisher, ("name",))
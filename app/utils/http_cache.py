@@ -0,0 +1,60 @@
+"""Utilidades para GET condicional (ETag / Last-Modified) y Cache-Control"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response, status
+from app.core.config import settings
+
+# Datos por usuario: cacheables solo por el cliente y siempre revalidando
+PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def catalog_cache_control() -> str:
+    """El catálogo es igual para todos los usuarios: lo pueden servir CDNs"""
+    return f"public, max-age={settings.CATALOG_HTTP_MAX_AGE_SECONDS}"
+
+
+def make_etag(*parts) -> str:
+    """ETag fuerte a partir de las piezas que determinan la respuesta (versiones, query...)"""
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def content_etag(content: bytes) -> str:
+    return f'"{hashlib.sha1(content).hexdigest()}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite devuelve fechas sin zona
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    """Evalúa If-None-Match (y, si no viene, If-Modified-Since) contra la versión actual"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP-date tiene resolución de segundos
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+
+    return False
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str, last_modified: datetime | None = None) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return response
+
+
+def not_modified(etag: str, cache_control: str, last_modified: datetime | None = None) -> Response:
+    return set_cache_headers(Response(status_code=status.HTTP_304_NOT_MODIFIED), etag, cache_control, last_modified)
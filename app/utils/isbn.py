@@ -0,0 +1,30 @@
+import re
+
+_ISBN_CHARS = re.compile(r"[^0-9Xx]")
+
+
+def _isbn13_check_digit(first12: str) -> str:
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(first12))
+    return str((10 - total % 10) % 10)
+
+
+def to_isbn13(value: str | None) -> str | None:
+    """Forma canónica ISBN-13 (solo dígitos) de un ISBN-10/13 con o sin guiones.
+
+    Devuelve None si el valor no tiene forma de ISBN. No se rechazan ISBN-13
+    con dígito de control incorrecto: hay catálogos que los traen así y deben
+    seguir encontrándose por su código escaneado.
+    """
+    if not value:
+        return None
+
+    compact = _ISBN_CHARS.sub("", value).upper()
+
+    if len(compact) == 13 and compact.isdigit():
+        return compact
+
+    if len(compact) == 10 and compact[:9].isdigit() and (compact[9].isdigit() or compact[9] == "X"):
+        first12 = "978" + compact[:9]
+        return first12 + _isbn13_check_digit(first12)
+
+    return None
@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Any, Callable, Iterable
+import base64
+import json
+
+
+def _default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(*values: Any) -> str:
+    """Codifica la clave del último elemento como cursor opaco"""
+    raw = json.dumps(list(values), default=_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Iterable[Callable[[Any], Any]]) -> tuple:
+    """Decodifica un cursor y convierte cada valor al tipo de su columna.
+
+    Lanza ValueError si el cursor está corrupto o no encaja con la clave.
+    """
+    types = tuple(types)
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError("Malformed cursor") from e
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Malformed cursor")
+
+    try:
+        return tuple(cast(value) for cast, value in zip(types, values))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Malformed cursor") from e
+
+
+def build_page(items: list, limit: int, key: Callable[[Any], tuple]) -> dict:
+    """Devuelve la página con el cursor del siguiente tramo (None si no hay más)"""
+    next_cursor = encode_cursor(*key(items[-1])) if items and len(items) == limit else None
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,12 @@
+from typing import Iterable
+
+
+def to_ranges(numbers: Iterable[int]) -> list[tuple[int, int]]:
+    """Comprime números en rangos inclusivos: [1, 2, 3, 5, 7, 8] -> [(1, 3), (5, 5), (7, 8)]"""
+    ranges: list[tuple[int, int]] = []
+    for number in sorted(set(numbers)):
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], number)
+        else:
+            ranges.append((number, number))
+    return ranges
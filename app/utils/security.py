@@ -2,8 +2,21 @@ from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from app.core.config import settings
+from app.utils.cache import TTLCache
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Los hashes con otros parámetros siguen verificando y needs_update() los marca
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+# user_id -> AuthenticatedUser. Las escrituras que cambian estos campos
+# invalidan la entrada solo en el worker que las atiende; los demás pueden
+# seguir viendo el rol/estado anterior hasta AUTH_CACHE_TTL_SECONDS
+principal_cache = TTLCache(maxsize=settings.AUTH_CACHE_MAX_ENTRIES, ttl=settings.AUTH_CACHE_TTL_SECONDS)
 
 def hash_password(password:str) -> str:
     return pwd_context.hash(password)
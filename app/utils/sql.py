@@ -0,0 +1,26 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# SQLSTATE foreign_key_violation
+_PG_FOREIGN_KEY_VIOLATION = "23503"
+
+
+def dialect_insert(db: Session, model):
+    """INSERT con soporte de ON CONFLICT para el motor de la sesión (PostgreSQL o SQLite)"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"ON CONFLICT is not supported for the {dialect} dialect")
+
+
+def is_foreign_key_violation(error: IntegrityError) -> bool:
+    """True si el IntegrityError lo ha provocado una FK (y no un UNIQUE, NOT NULL, CHECK...)"""
+    orig = error.orig
+    # psycopg2 expone pgcode; psycopg 3 y asyncpg, sqlstate
+    code = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    if code is not None:
+        return code == _PG_FOREIGN_KEY_VIOLATION
+    return "FOREIGN KEY constraint failed" in str(orig)
@@ -0,0 +1,106 @@
+"""p50/p99 de las lecturas calientes con y sin DB_ASYNC_MODE bajo concurrencia.
+
+Siembra una base (SQLite temporal salvo --database-url) y la carga dos veces,
+cada una en un proceso aparte porque el modo se lee al importar la app: una con
+las rutas síncronas (threadpool + pool síncrono) y otra con las asíncronas
+(AsyncSession). Las peticiones van en proceso por ASGI (httpx.ASGITransport),
+sin red ni servidor: se mide la app, no uvicorn.
+
+    python scripts/bench_async.py [--requests 2000] [--concurrency 20] [--database-url URL]
+
+Necesita el driver asíncrono del dialecto (aiosqlite / asyncpg) y greenlet.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import configure_database, seed_catalog, seed_user
+
+ROUTES = ("/series/?limit=50", "/volumes/?limit=50", "/collection/?limit=50")
+
+
+def seed(entries: int) -> dict:
+    import app.models  # noqa: F401 (registra las tablas en Base.metadata)
+    from app.core.database import Base, SessionLocal, engine
+    from app.utils.security import create_access_token
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        volume_ids = seed_catalog(db, series=entries // 20, volumes_per_series=20)
+        user_id = seed_user(db, volume_ids)
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+async def load(headers: dict, requests: int, concurrency: int) -> dict:
+    import httpx
+    from app.main import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for route in ROUTES:
+            timings: list[float] = []
+            errors = 0
+            queue = iter(range(requests))
+
+            async def worker():
+                nonlocal errors
+                for _ in queue:
+                    start = time.perf_counter()
+                    try:
+                        response = await client.get(route, headers=headers)
+                        failed = response.status_code >= 500
+                    except Exception:
+                        failed = True
+                    timings.append((time.perf_counter() - start) * 1000)
+                    errors += failed
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            timings.sort()
+            results[route] = {
+                "p50": timings[len(timings) // 2],
+                "p99": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+                "errors": errors,
+            }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        # Proceso hijo: el entorno (DATABASE_URL, DB_ASYNC_MODE) ya viene fijado
+        results = asyncio.run(load(json.loads(args.run), args.requests, args.concurrency))
+        print(json.dumps(results))
+        return
+
+    database_url = configure_database(args.database_url)
+    headers = seed(args.entries)
+    print(f"{database_url} | {args.entries} volumes, {args.requests} requests per route, concurrency {args.concurrency}")
+
+    for mode in ("false", "true"):
+        env = os.environ | {"DB_ASYNC_MODE": mode}
+        output = subprocess.run(
+            [sys.executable, __file__, "--run", json.dumps(headers), "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+            env=env, check=True, stdout=subprocess.PIPE, text=True
+        ).stdout
+        for route, timing in json.loads(output.strip().splitlines()[-1]).items():
+            label = f"{'async' if mode == 'true' else 'sync'} {route}"
+            print(f"{label:<45} p50 {timing['p50']:8.2f} ms   p99 {timing['p99']:8.2f} ms   5xx {timing['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Latencia de /collection/stats/summary para un usuario con muchas entradas.
+
+Compara las siete consultas originales (seis count() y un sum()), la
+agregación condicional en un solo recorrido (compute_collection_stats) y la
+lectura de la fila de contadores (get_collection_stats).
+
+    python scripts/bench_collection_stats.py [--entries 10000] [--database-url URL]
+"""
+import argparse
+import os
+import sys
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import configure_database, measure, seed_catalog, seed_user
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    database_url = configure_database(args.database_url)
+
+    from sqlalchemy import distinct, func
+    from app.core.database import Base, SessionLocal, engine
+    from app.crud import stats as crud_stats
+    from app.models import MangaVolume, UserMangaVolume
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    volume_ids = seed_catalog(db, series=args.entries // 50, volumes_per_series=50)
+    user_id = seed_user(db, volume_ids)
+    crud_stats.rebuild_collection_stats(db, user_id=user_id)
+
+    # El distinct() a nivel de columna de la versión original avisa en SQLAlchemy 2.x
+    warnings.filterwarnings("ignore", message="Column-expression-level unary distinct")
+
+    def seven_queries():
+        # Implementación anterior: un recorrido por contador
+        entries = db.query(UserMangaVolume).filter(UserMangaVolume.user_id == user_id)
+        entries.count()
+        db.query(distinct(MangaVolume.series_id)).join(
+            UserMangaVolume, UserMangaVolume.volume_id == MangaVolume.id
+        ).filter(UserMangaVolume.user_id == user_id).count()
+        for flag in (UserMangaVolume.is_owned, UserMangaVolume.is_wishlist, UserMangaVolume.is_reading, UserMangaVolume.is_completed):
+            entries.filter(flag == True).count()
+        db.query(func.sum(UserMangaVolume.purchase_price)).filter(
+            UserMangaVolume.user_id == user_id, UserMangaVolume.purchase_price.isnot(None)
+        ).scalar()
+
+    print(f"{database_url} | user with {len(volume_ids)} entries")
+    measure("seven queries (before)", seven_queries, args.repeat)
+    measure("single aggregate scan", lambda: crud_stats.compute_collection_stats(db, user_id), args.repeat)
+    measure("counters row (user_collection_stats)", lambda: crud_stats.get_collection_stats(db, user_id), args.repeat)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
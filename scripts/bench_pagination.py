@@ -0,0 +1,59 @@
+"""Página 1 frente a página 500: paginación por offset y por cursor.
+
+Mide GET /volumes/ (clave `(id,)`) y GET /collection/ (clave
+`(added_at, volume_id)`) a nivel CRUD con páginas de --page-size elementos.
+El cursor de la página N se obtiene del último elemento de la página N-1,
+como haría un cliente.
+
+    python scripts/bench_pagination.py [--page 500] [--page-size 20] [--database-url URL]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import configure_database, measure, seed_catalog, seed_user
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    database_url = configure_database(args.database_url)
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.crud import manga_volumes as crud_volumes
+    from app.crud import user_collection as crud_collection
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    size, skip = args.page_size, (args.page - 1) * args.page_size
+    volume_ids = seed_catalog(db, series=max(1, args.page * size // 20), volumes_per_series=20)
+    user_id = seed_user(db, volume_ids)
+
+    last_volume = crud_volumes.get_all_volumes(db, skip=skip - 1, limit=1)[0]
+    last_entry = crud_collection.get_user_collection(db, user_id, skip=skip - 1, limit=1)[0]
+    volume_after = (last_volume.id,)
+    entry_after = (last_entry.added_at, last_entry.volume_id)
+    # El cursor debe llevar a la misma página que el offset
+    assert [v.id for v in crud_volumes.get_all_volumes(db, limit=size, after=volume_after)] == \
+        [v.id for v in crud_volumes.get_all_volumes(db, skip=skip, limit=size)]
+
+    print(f"{database_url} | {len(volume_ids)} volumes, user with {len(volume_ids)} entries, pages of {size}")
+    measure("volumes page 1", lambda: crud_volumes.get_all_volumes(db, limit=size), args.repeat)
+    measure(f"volumes page {args.page} (offset)", lambda: crud_volumes.get_all_volumes(db, skip=skip, limit=size), args.repeat)
+    measure(f"volumes page {args.page} (cursor)", lambda: crud_volumes.get_all_volumes(db, limit=size, after=volume_after), args.repeat)
+    measure("collection page 1", lambda: crud_collection.get_user_collection(db, user_id, limit=size), args.repeat)
+    measure(f"collection page {args.page} (offset)", lambda: crud_collection.get_user_collection(db, user_id, skip=skip, limit=size), args.repeat)
+    measure(f"collection page {args.page} (cursor)", lambda: crud_collection.get_user_collection(db, user_id, limit=size, after=entry_after), args.repeat)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
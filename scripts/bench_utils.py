@@ -0,0 +1,66 @@
+"""Utilidades compartidas por los benchmarks de scripts/.
+
+Cada benchmark crea su propia base (SQLite temporal salvo --database-url) y la
+siembra con inserciones masivas antes de importar nada de `app`, porque
+Settings y el engine se crean al importar.
+"""
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable
+
+
+def configure_database(database_url: str | None) -> str:
+    if database_url is None:
+        path = tempfile.NamedTemporaryFile(prefix="mangashelf-bench-", suffix=".db", delete=False).name
+        database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "bench")
+    return database_url
+
+
+def seed_catalog(db, series: int, volumes_per_series: int) -> list[int]:
+    """Crea `series` series con `volumes_per_series` tomos; devuelve los ids de tomo"""
+    from app.models import MangaSeries, MangaVolume, Publisher
+
+    publisher = Publisher(name=f"Bench publisher {time.time_ns()}")
+    db.add(publisher)
+    db.flush()
+    series_rows = [MangaSeries(title=f"Bench series {i:05d}", publisher_id=publisher.id, total_volumes=volumes_per_series) for i in range(series)]
+    db.add_all(series_rows)
+    db.flush()
+    db.bulk_insert_mappings(MangaVolume, [
+        {"series_id": s.id, "volume_number": v} for s in series_rows for v in range(1, volumes_per_series + 1)
+    ])
+    db.commit()
+    ids = db.query(MangaVolume.id).filter(MangaVolume.series_id.in_([s.id for s in series_rows])).all()
+    return [row.id for row in ids]
+
+
+def seed_user(db, volume_ids: list[int]) -> int:
+    """Usuario con todos esos tomos en la colección (flags variados)"""
+    from app.models import User, UserMangaVolume
+
+    user = User(username=f"bench{time.time_ns()}", email=f"bench{time.time_ns()}@example.com", hashed_password="!")
+    db.add(user)
+    db.commit()
+    db.bulk_insert_mappings(UserMangaVolume, [
+        {"user_id": user.id, "volume_id": volume_id, "is_owned": i % 2 == 0, "is_wishlist": i % 2 == 1,
+         "is_reading": i % 7 == 0, "is_completed": i % 3 == 0, "purchase_price": 7.95 if i % 2 == 0 else None}
+        for i, volume_id in enumerate(volume_ids)
+    ])
+    db.commit()
+    return user.id
+
+
+def measure(label: str, fn: Callable[[], object], repeat: int) -> None:
+    fn()  # calentamiento (caché de sentencias, páginas en memoria)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<45} median {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms")
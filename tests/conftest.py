@@ -0,0 +1,91 @@
+"""Fixtures comunes: la app arranca contra una base SQLite temporal.
+
+Las variables de entorno se fijan antes de importar `app`, porque Settings y
+los engines se crean al importar.
+"""
+import itertools
+import os
+import tempfile
+from contextlib import contextmanager
+
+_db_file = tempfile.NamedTemporaryFile(prefix="mangashelf-test-", suffix=".db", delete=False)
+_db_file.close()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.core.database import SessionLocal, engine
+from app.models import MangaSeries, MangaVolume, Publisher, User, UserMangaVolume
+from app.models.user import UserRole
+from app.utils.security import create_access_token
+
+_ids = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@contextmanager
+def count_queries(bind=engine):
+    """Captura las sentencias SQL ejecutadas dentro del bloque"""
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def make_user(db):
+    """Crea un usuario (sin pasar por argon2) y devuelve (id, cabeceras con Bearer)"""
+    def factory(role: UserRole = UserRole.USER) -> tuple[int, dict]:
+        n = next(_ids)
+        user = User(username=f"user{n}", email=f"user{n}@example.com", hashed_password="!", role=role)
+        db.add(user)
+        db.commit()
+        return user.id, {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    return factory
+
+
+@pytest.fixture
+def make_series(db):
+    """Crea una editorial, una serie y `volumes` tomos; devuelve (serie, [tomos])"""
+    def factory(volumes: int = 10, total_volumes: int | None = None) -> tuple[MangaSeries, list[MangaVolume]]:
+        n = next(_ids)
+        publisher = Publisher(name=f"Publisher {n}")
+        series = MangaSeries(title=f"Series {n}", author=f"Author {n}", publisher=publisher,
+                             total_volumes=total_volumes or volumes)
+        series.volumes = [MangaVolume(volume_number=v, isbn13=f"9{n:06d}{v:06d}") for v in range(1, volumes + 1)]
+        db.add(series)
+        db.commit()
+        return series, list(series.volumes)
+    return factory
+
+
+@pytest.fixture
+def add_entries(db):
+    """Mete tomos en la colección de un usuario directamente en la tabla"""
+    def factory(user_id: int, volumes: list[MangaVolume], **flags) -> None:
+        db.add_all([UserMangaVolume(user_id=user_id, volume_id=volume.id, **flags) for volume in volumes])
+        db.commit()
+    return factory
@@ -0,0 +1,16 @@
+import pytest
+from app.dependencies import auth
+from app.routers.aio import manga_series, manga_volumes, publishers, user_collection
+
+
+def _dependencies(dependant):
+    for sub in dependant.dependencies:
+        yield sub.call
+        yield from _dependencies(sub)
+
+
+@pytest.mark.parametrize("module", [manga_series, manga_volumes, publishers, user_collection])
+def test_aio_routes_authenticate_without_the_sync_session(module):
+    for route in module.router.routes:
+        calls = set(_dependencies(route.dependant))
+        assert not calls & {auth.get_current_user, auth.get_current_active_user}, route.path
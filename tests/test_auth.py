@@ -0,0 +1,77 @@
+import itertools
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.crud import refresh_tokens as crud_refresh_tokens
+from app.models import User
+from app.models.refresh_tokens import RefreshToken
+
+_names = itertools.count()
+
+
+def _refresh(client, token: str):
+    return client.post("/auth/refresh", json={"refresh_token": token})
+
+
+@pytest.fixture
+def session(db, make_user):
+    """Usuario con una sesión abierta: (id, cabeceras, refresh token)"""
+    user_id, headers = make_user()
+    return user_id, headers, crud_refresh_tokens.create_refresh_token(db, user_id)
+
+
+def test_refresh_rotates_the_token(client, session):
+    _, _, token = session
+    response = _refresh(client, token)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["access_token"] and body["refresh_token"] != token
+
+    # El nuevo sigue la cadena; el anterior ya no sirve
+    assert _refresh(client, body["refresh_token"]).status_code == 200
+
+
+def test_reusing_a_rotated_token_revokes_the_family(client, db, session):
+    user_id, _, token = session
+    other_session = crud_refresh_tokens.create_refresh_token(db, user_id)
+    rotated = _refresh(client, token).json()["refresh_token"]
+
+    assert _refresh(client, token).status_code == 401
+    # El token legítimo de esa familia queda revocado; otras sesiones no
+    assert _refresh(client, rotated).status_code == 401
+    assert _refresh(client, other_session).status_code == 200
+
+
+def test_expired_and_unknown_tokens_are_rejected(client, db, session):
+    _, _, token = session
+    db.query(RefreshToken).filter(RefreshToken.token_hash == crud_refresh_tokens._hash_token(token)).update(
+        {RefreshToken.expires_at: datetime.now(timezone.utc) - timedelta(seconds=1)}
+    )
+    db.commit()
+    assert _refresh(client, token).status_code == 401
+    assert _refresh(client, "not-a-token").status_code == 401
+
+
+def test_inactive_user_cannot_refresh(client, db, session):
+    user_id, _, token = session
+    db.query(User).filter(User.id == user_id).update({User.is_active: False})
+    db.commit()
+    assert _refresh(client, token).status_code == 401
+
+
+def test_soft_delete_revokes_sessions(client, session):
+    _, headers, token = session
+    assert client.delete("/users/me", headers=headers).status_code == 204
+    assert _refresh(client, token).status_code == 401
+
+
+def test_password_change_revokes_sessions(client):
+    n = next(_names)
+    credentials = {"username": f"auth{n}", "password": "old-password"}
+    assert client.post("/auth/register", json=credentials | {"email": f"auth{n}@example.com"}).status_code == 201
+    tokens = client.post("/auth/login", data=credentials).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    response = client.post("/users/me/change-password", json={"current_password": "old-password", "new_password": "new-password"}, headers=headers)
+    assert response.status_code == 204
+    assert _refresh(client, tokens["refresh_token"]).status_code == 401
+    assert _refresh(client, client.post("/auth/login", data=credentials | {"password": "new-password"}).json()["refresh_token"]).status_code == 200
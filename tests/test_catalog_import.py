@@ -0,0 +1,89 @@
+import io
+import itertools
+import json
+from app.models import MangaSeries, MangaVolume, Publisher
+from app.models.user import UserRole
+from app.services.catalog_cache import catalog_cache
+from app.services.catalog_import import import_catalog
+from app.services.search import series_search, volume_search
+
+_names = itertools.count()
+
+
+def _ndjson(*rows) -> io.BytesIO:
+    lines = [row if isinstance(row, str) else json.dumps(row) for row in rows]
+    return io.BytesIO("\n".join(lines).encode())
+
+
+def _volumes(db, title: str) -> dict[int, MangaVolume]:
+    series = db.query(MangaSeries).filter(MangaSeries.title == title).one()
+    return {volume.volume_number: volume for volume in db.query(MangaVolume).filter(MangaVolume.series_id == series.id)}
+
+
+def test_csv_import_creates_and_updates(db):
+    title = f"Import Saga {next(_names)}"
+    csv_file = io.BytesIO((
+        "publisher,series_title,total_volumes,volume_number,isbn,volume_title\n"
+        f"Import Press,{title},3,1,,{title} 1\n"
+        f"Import Press,{title},,2,,\n"
+        f"Import Press,{title},,,,\n"
+    ).encode())
+
+    report = import_catalog(db, csv_file, "csv", chunk_size=2)
+    assert (report["rows"], report["chunks"], report["series_created"], report["volumes_created"], report["errors_count"]) == (3, 2, 1, 2, 0)
+    assert set(_volumes(db, title)) == {1, 2}
+
+    # Reimportar actualiza: la fila solo de serie (su primera aparición) cambia la serie
+    again = _ndjson({"publisher": "Import Press", "series_title": title, "total_volumes": 4},
+                    {"publisher": "Import Press", "series_title": title, "volume_number": 2, "volume_title": "Renamed"})
+    report = import_catalog(db, again, "ndjson")
+    assert (report["publishers_created"], report["series_created"], report["series_updated"], report["volumes_updated"]) == (0, 0, 1, 1)
+    db.expire_all()
+    assert _volumes(db, title)[2].title == "Renamed"
+    assert db.query(MangaSeries.total_volumes).filter(MangaSeries.title == title).scalar() == 4
+
+
+def test_ndjson_reports_errors_per_line(db):
+    title = f"Import Errors {next(_names)}"
+    report = import_catalog(db, _ndjson(
+        {"series_title": title, "volume_number": 1},
+        "{not json",
+        {"volume_number": 2},
+        {"series_title": title, "volume_number": "second"},
+        {"series_title": title, "volume_number": 1, "isbn": "8467900026"},
+    ), "ndjson", on_conflict="skip")
+
+    assert report["volumes_created"] == 1 and report["volumes_skipped"] == 0
+    assert report["errors_count"] == 4
+    assert [error["line"] for error in report["errors"]] == [2, 3, 4, 5]
+    assert report["errors"][0]["detail"] == "Invalid JSON object"
+    assert report["errors"][1]["detail"] == "series_title is required"
+    assert report["errors"][2]["detail"].startswith("volume_number")
+    assert report["errors"][3]["detail"] == "Duplicate (series_id, volume_number) in batch"
+
+
+def test_dry_run_writes_nothing(db):
+    title = f"Import Dry {next(_names)}"
+    generation = catalog_cache.backend.generation("volumes")
+    report = import_catalog(db, _ndjson(
+        {"publisher": f"Dry Press {title}", "series_title": title, "volume_number": 1},
+        {"publisher": f"Dry Press {title}", "series_title": title, "volume_number": 2},
+    ), "ndjson", chunk_size=1, dry_run=True)
+
+    assert report["dry_run"] and (report["publishers_created"], report["series_created"], report["volumes_created"]) == (1, 1, 2)
+    assert db.query(MangaSeries).filter(MangaSeries.title == title).count() == 0
+    assert db.query(Publisher).filter(Publisher.name == f"Dry Press {title}").count() == 0
+    assert catalog_cache.backend.generation("volumes") == generation
+
+
+def test_import_invalidates_cache_and_search(client, db, make_user):
+    _, headers = make_user(UserRole.ADMIN)
+    series_search._stale = volume_search._stale = False
+    generations = {namespace: catalog_cache.backend.generation(namespace) for namespace in ("publishers", "series", "volumes")}
+
+    title = f"Import Route {next(_names)}"
+    response = client.post("/import/catalog", files={"file": ("catalog.csv", f"series_title,volume_number\n{title},1\n")}, headers=headers)
+    assert response.status_code == 200 and response.json()["volumes_created"] == 1
+
+    assert series_search._stale and volume_search._stale
+    assert all(catalog_cache.backend.generation(namespace) > generation for namespace, generation in generations.items())
@@ -0,0 +1,66 @@
+import tempfile
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+import app.main
+from app.core import database
+from app.core.config import settings
+from app.core.database import TimedQueuePool, engine_options, pool_status
+from app.core.metrics import db_pool_checkout_timeouts
+from app.models.user import UserRole
+
+
+def test_engine_options_per_dialect(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 3)
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 1500)
+
+    assert engine_options("sqlite:///app.db") == {}
+
+    postgres = engine_options("postgresql+psycopg2://shelf@db/shelf")
+    assert postgres["poolclass"] is TimedQueuePool
+    assert (postgres["pool_size"], postgres["max_overflow"]) == (7, 3)
+    assert postgres["connect_args"] == {"options": "-c statement_timeout=1500"}
+
+    # statement_timeout es una opción de PostgreSQL: MySQL solo recibe el pool
+    mysql = engine_options("mysql+pymysql://shelf@db/shelf")
+    assert mysql["poolclass"] is TimedQueuePool and "connect_args" not in mysql
+
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 0)
+    assert "connect_args" not in engine_options("postgresql://shelf@db/shelf")
+
+
+def test_pool_status_and_checkout_timeouts():
+    path = tempfile.NamedTemporaryFile(prefix="mangashelf-pool-", suffix=".db", delete=False).name
+    pooled = create_engine(f"sqlite:///{path}", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    try:
+        assert pool_status(pooled)["saturation"] == 0
+        timeouts = db_pool_checkout_timeouts._values.get((), 0)
+
+        with pooled.connect():
+            status = pool_status(pooled)
+            assert (status["class"], status["size"], status["checked_out"], status["saturation"]) == ("TimedQueuePool", 1, 1, 1.0)
+            with pytest.raises(PoolTimeoutError):
+                pooled.connect()
+        assert db_pool_checkout_timeouts._values[()] == timeouts + 1
+        assert pool_status(pooled)["checked_out"] == 0
+    finally:
+        pooled.dispose()
+
+    # Pools sin tamaño fijo solo informan de su clase
+    assert pool_status(create_engine("sqlite://")) == {"class": "SingletonThreadPool"}
+
+
+def test_health_db(client, monkeypatch, make_user):
+    _, headers = make_user(UserRole.ADMIN)
+    body = client.get("/health/db", headers=headers).json()
+    assert body["status"] == "ok" and body["latency_ms"] >= 0 and body["replicas"] == []
+    assert body["pool"]["class"] == type(database.engine.pool).__name__
+    assert body["pool"].keys() == pool_status(database.engine).keys()
+
+    # Sin conexión a la BD: 503 con el tipo de error
+    broken = create_engine("sqlite:////nonexistent-dir/shelf.db")
+    monkeypatch.setattr(app.main, "engine", broken)
+    response = client.get("/health/db", headers=headers)
+    assert response.status_code == 503
+    assert response.json()["status"] == "unavailable" and response.json()["error"] == "OperationalError"
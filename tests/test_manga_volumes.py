@@ -0,0 +1,107 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app.core.database import SessionLocal
+from app.crud import manga_volumes as crud_volumes
+from app.models import MangaVolume
+from app.models.user import UserRole
+from app.schemas.manga_volumes import MangaVolumeCreate
+from app.services.search import volume_search
+from app.utils.isbn import to_isbn13
+from app.utils.sql import dialect_insert
+
+
+def test_bulk_detects_isbn_conflicts_in_any_form(db, make_series):
+    series, _ = make_series(volumes=1)
+    crud_volumes.create_volume(db, MangaVolumeCreate(series_id=series.id, volume_number=2, isbn="9788467900015"))
+
+    results = crud_volumes.create_volumes_bulk(db, [
+        MangaVolumeCreate(series_id=series.id, volume_number=3, isbn="978-84-679-0001-5"),
+        MangaVolumeCreate(series_id=series.id, volume_number=4, isbn="8467900026"),
+        MangaVolumeCreate(series_id=series.id, volume_number=5, isbn=to_isbn13("8467900026")),
+    ], on_conflict="skip")
+
+    assert [(result["status"], result["detail"]) for result in results] == [
+        ("skipped", results[0]["detail"]),
+        ("created", None),
+        ("error", "Duplicate ISBN in batch"),
+    ]
+    assert results[0]["detail"].startswith("ISBN already used by volume")
+
+
+def test_isbn13_is_unique(db, make_series):
+    series, volumes = make_series(volumes=1)
+    db.add(MangaVolume(series_id=series.id, volume_number=2, isbn13=volumes[0].isbn13))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+
+def test_bulk_update_reindexes_changed_titles(db, make_series):
+    series, volumes = make_series(volumes=1)
+    volumes[0].title = "Zqold Chronicles"
+    db.commit()
+    volume_search.add(volumes[0])
+    assert [hit["id"] for hit in volume_search.autocomplete(db, "zqold")] == [volumes[0].id]
+
+    results = crud_volumes.create_volumes_bulk(db, [
+        MangaVolumeCreate(series_id=series.id, volume_number=1, title="Zqnew Chronicles"),
+    ], on_conflict="update")
+    assert results[0]["status"] == "updated"
+    assert volume_search.autocomplete(db, "zqold") == []
+    assert [hit["id"] for hit in volume_search.autocomplete(db, "zqnew")] == [volumes[0].id]
+
+
+def test_bulk_route_status_reflects_what_was_written(client, make_user, make_series):
+    _, headers = make_user(UserRole.ADMIN)
+    series, _ = make_series(volumes=1)
+    existing = [{"series_id": series.id, "volume_number": 1}]
+
+    response = client.post("/volumes/bulk", params={"on_conflict": "skip"}, json=existing, headers=headers)
+    assert response.status_code == 200 and response.json()["skipped"] == 1
+    response = client.post("/volumes/bulk", params={"on_conflict": "update"}, json=existing, headers=headers)
+    assert response.status_code == 200 and response.json()["updated"] == 1
+    response = client.post("/volumes/bulk", json=[{"series_id": series.id, "volume_number": 2}], headers=headers)
+    assert response.status_code == 201 and response.json()["created"] == 1
+
+
+@pytest.mark.parametrize("on_conflict", ["error", "update"])
+def test_bulk_reports_concurrent_isbn_clash_as_conflict(client, monkeypatch, make_user, make_series, on_conflict):
+    _, headers = make_user(UserRole.ADMIN)
+    series, _ = make_series(volumes=1)
+    isbn = f"8{series.id:06d}000050"
+
+    def racing_insert(db, model):
+        # Otra transacción ocupa el ISBN entre la validación y el INSERT
+        with SessionLocal() as other:
+            other.add(MangaVolume(series_id=series.id, volume_number=50, isbn13=isbn))
+            other.commit()
+        return dialect_insert(db, model)
+
+    monkeypatch.setattr(crud_volumes, "dialect_insert", racing_insert)
+    response = client.post("/volumes/bulk", params={"on_conflict": on_conflict}, json=[
+        {"series_id": series.id, "volume_number": 1 if on_conflict == "update" else 2, "isbn": isbn},
+        {"series_id": series.id, "volume_number": 99},
+    ], headers=headers)
+
+    assert response.status_code == 409, response.json()
+    report = response.json()["detail"]
+    assert [(result["status"], result["detail"]) for result in report["results"]] == [
+        ("error", "Conflicts with a concurrent write"),
+        ("error", "Conflicts with a concurrent write"),
+    ]
+
+
+def test_isbn_batch_falls_back_to_the_raw_code(client, db, make_user, make_series):
+    _, headers = make_user()
+    _, volumes = make_series(volumes=2)
+    # Código de catálogo que no tiene forma de ISBN (no hay isbn13)
+    volumes[1].isbn = "LEGACY-0042"
+    db.commit()
+
+    found = crud_volumes.get_volumes_by_isbns(db, [volumes[0].isbn13, "LEGACY-0042", "UNKNOWN-1"])
+    assert {key: volume.id for key, volume in found.items()} == {volumes[0].isbn13: volumes[0].id, "LEGACY-0042": volumes[1].id}
+    assert crud_volumes.get_volume_by_isbn(db, "LEGACY-0042").id == volumes[1].id
+
+    response = client.post("/volumes/isbn/batch", json={"isbns": ["LEGACY-0042", "UNKNOWN-1"]}, headers=headers)
+    results = response.json()["results"]
+    assert [(result["isbn13"], result["volume"]["id"] if result["volume"] else None) for result in results] == [(None, volumes[1].id), (None, None)]
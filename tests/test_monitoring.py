@@ -0,0 +1,52 @@
+import logging
+from app.core.config import settings
+from app.models.user import UserRole
+
+
+def test_server_timing_header(client, make_user):
+    _, headers = make_user()
+    response = client.get("/collection/", headers=headers)
+    timing = response.headers["server-timing"]
+    assert timing.startswith("db;dur=") and 'queries"' in timing and "app;dur=" in timing
+
+
+def test_monitoring_routes_require_admin_or_token(client, monkeypatch, make_user):
+    _, user_headers = make_user()
+    _, admin_headers = make_user(UserRole.ADMIN)
+    monkeypatch.setattr(settings, "MONITORING_TOKEN", "scraper-secret")
+
+    for path in ("/metrics", "/health/db"):
+        assert client.get(path).status_code == 401
+        assert client.get(path, headers=user_headers).status_code == 403
+        assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+        assert client.get(path, headers=admin_headers).status_code == 200
+        assert client.get(path, headers={"Authorization": "Bearer scraper-secret"}).status_code == 200
+
+
+def test_metrics_expose_per_route_series(client, make_user, make_series):
+    _, headers = make_user()
+    _, volumes = make_series(volumes=1)
+    client.post("/collection/", json={"volume_id": volumes[0].id}, headers=headers)
+    client.get("/collection/", headers=headers)
+    _, admin_headers = make_user(UserRole.ADMIN)
+
+    body = client.get("/metrics", headers=admin_headers).text
+    assert 'http_request_duration_seconds_count{method="GET",route="/collection/",status="200"}' in body
+    assert 'db_queries_per_request_bucket{method="GET",route="/collection/",le="+Inf"}' in body
+    # Solo las escrituras cuentan filas afectadas
+    assert 'db_rows_affected_total{method="POST",route="/collection/"}' in body
+    assert 'db_rows_affected_total{method="GET",route="/collection/"}' not in body
+
+
+def test_slow_queries_are_logged_with_their_route(client, monkeypatch, caplog, make_user):
+    _, headers = make_user()
+    monkeypatch.setattr(settings, "DB_SLOW_QUERY_MS", 1e-9)
+    with caplog.at_level(logging.WARNING, logger="app.core.database"):
+        client.get("/collection/", headers=headers)
+    messages = [record.getMessage() for record in caplog.records if record.getMessage().startswith("Slow query")]
+    assert messages and all("on route /collection/:" in message for message in messages)
+
+    monkeypatch.setattr(settings, "DB_SLOW_QUERY_MS", 0)
+    caplog.clear()
+    client.get("/collection/", headers=headers)
+    assert not [record for record in caplog.records if record.getMessage().startswith("Slow query")]
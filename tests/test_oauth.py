@@ -0,0 +1,22 @@
+import time
+from app.services.oauth import JWKSCache
+
+
+def test_failed_background_refreshes_are_throttled():
+    calls = []
+
+    def fetcher(url):
+        calls.append(url)
+        if len(calls) == 1:
+            return {"keys": [{"kid": "k1", "kty": "RSA"}]}, {"Cache-Control": "max-age=0"}
+        raise ConnectionError("JWKS endpoint down")
+
+    jwks = JWKSCache("https://jwks.invalid", fetcher)
+    jwks._refresh()
+    jwks._last_fetch -= 3600  # fuera de la ventana de OAUTH_JWKS_MIN_REFRESH_SECONDS
+
+    # Caducada: se sigue sirviendo la clave y solo se lanza un refresco (que falla)
+    for _ in range(20):
+        assert jwks.get_key("k1")["kid"] == "k1"
+        time.sleep(0.005)
+    assert len(calls) == 2
@@ -0,0 +1,17 @@
+from sqlalchemy import inspect
+from app.services.query_plans import HOT_QUERIES, check_hot_queries
+
+
+def test_hot_queries_do_not_scan_whole_tables(db, make_user, make_series, add_entries):
+    user_id, _ = make_user()
+    for _ in range(3):
+        _, volumes = make_series(volumes=5)
+        add_entries(user_id, volumes, is_owned=True, is_reading=True)
+
+    # Cualquier tabla, no solo user_manga_volumes
+    tables = set(inspect(db.get_bind()).get_table_names())
+    report = check_hot_queries(db, user_id, tables)
+
+    assert {entry["query"] for entry in report} == set(HOT_QUERIES)
+    scans = {entry["query"]: entry["full_scans"] for entry in report if entry["full_scans"]}
+    assert scans == {}
@@ -0,0 +1,70 @@
+import tempfile
+import time
+import pytest
+from app.core import database
+from app.core.replicas import READ_AFTER_WRITE_HEADER, ReadAfterWritePins, Replica, ReplicaSet
+from app.utils.security import create_access_token
+
+
+@pytest.fixture
+def lagging_replica(monkeypatch):
+    """Réplica en rotación que no recibe nada: un SQLite vacío con el esquema"""
+    path = tempfile.NamedTemporaryFile(prefix="mangashelf-replica-", suffix=".db", delete=False).name
+    replica_engine = database.build_engine(f"sqlite:///{path}")
+    database.Base.metadata.create_all(bind=replica_engine)
+    replica = Replica("replica", replica_engine)
+    replica.in_rotation, replica.lag = True, 0.0
+    replicas = ReplicaSet(database.engine, [replica])
+    replicas._last_check = time.monotonic() + 3600  # sin comprobaciones de retraso durante el test
+    monkeypatch.setattr(database, "replica_set", replicas)
+    # Cada petición como si llegara a otro worker: sin pins en memoria
+    monkeypatch.setattr(database, "read_after_write", ReadAfterWritePins("test-secret-key"))
+    monkeypatch.setattr(ReadAfterWritePins, "is_pinned", lambda self, key: False)
+    yield replica_engine
+    replica_engine.dispose()
+
+
+def test_new_user_and_entry_are_readable_from_another_worker(client, lagging_replica, make_user, make_series):
+    # El usuario solo existe en el primario: get_current_user no debe leerlo de la réplica
+    _, headers = make_user()
+    _, volumes = make_series(volumes=1)
+
+    response = client.post("/collection/", json={"volume_id": volumes[0].id}, headers=headers)
+    assert response.status_code == 201
+    assert response.headers[READ_AFTER_WRITE_HEADER]
+
+    # Sin sello: la lista sale de la réplica, pero la entrada concreta se busca en el primario
+    client.cookies.clear()
+    assert client.get("/collection/", headers=headers).json() == []
+    assert client.get(f"/collection/{volumes[0].id}", headers=headers).status_code == 200
+
+    # Con el sello devuelto por la escritura, todo va al primario
+    sealed = headers | {READ_AFTER_WRITE_HEADER: response.headers[READ_AFTER_WRITE_HEADER]}
+    assert [entry["volume_id"] for entry in client.get("/collection/", headers=sealed).json()] == [volumes[0].id]
+
+
+def test_pins_are_keyed_by_principal_and_seals_are_signed():
+    pins = ReadAfterWritePins("secret")
+    first = {"authorization": f"Bearer {create_access_token({'sub': '42'})}"}
+    second = {"authorization": f"Bearer {create_access_token({'sub': '42', 'device': 'tablet'})}"}
+    assert pins.client_key(first, "10.0.0.1") == pins.client_key(second, "10.0.0.2") == "user:42"
+
+    seal = pins.seal()
+    until, _, signature = seal.partition(".")
+    assert pins.seal_is_valid(seal)
+    assert not ReadAfterWritePins("other").seal_is_valid(seal)
+    assert not pins.seal_is_valid(f"{int(until) + 3600}.{signature}")
+    assert not pins.seal_is_valid(None)
+
+
+def test_catalog_cache_refills_from_the_primary(client, lagging_replica, make_user, make_series):
+    _, headers = make_user("admin")
+    _, volumes = make_series(volumes=1)
+    volume = volumes[0]
+    assert client.get(f"/volumes/{volume.id}", headers=headers).json()["title"] == volume.title
+
+    # La escritura invalida la caché; la réplica no la ha recibido
+    payload = {"series_id": volume.series_id, "volume_number": volume.volume_number, "title": "Retitled", "isbn13": volume.isbn13}
+    response = client.post("/volumes/bulk", params={"on_conflict": "update"}, json=[payload], headers=headers)
+    assert response.json()["updated"] == 1
+    assert client.get(f"/volumes/{volume.id}", headers=headers).json()["title"] == "Retitled"
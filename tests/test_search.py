@@ -0,0 +1,60 @@
+import time
+from app.models import MangaSeries, MangaVolume
+from app.services.search import CatalogSearch, _like_pattern
+
+
+def test_like_pattern_matches_wildcards_literally(db, make_series):
+    _, volumes = make_series(volumes=2)
+    volumes[0].isbn, volumes[1].isbn = "84-1_5", "84-115"
+    db.commit()
+
+    matches = db.query(MangaVolume.isbn).filter(
+        MangaVolume.isbn.ilike(_like_pattern("1_5"), escape="\\"),
+        MangaVolume.id.in_([volume.id for volume in volumes])
+    ).all()
+    assert [row.isbn for row in matches] == ["84-1_5"]
+
+
+def test_stale_index_is_served_while_refreshing_in_background(db, make_series):
+    index = CatalogSearch(MangaSeries, ("title", "author"))
+    series, _ = make_series(volumes=1)
+    series.title = "Zzyzx Alpha"
+    db.commit()
+    assert [hit["id"] for hit in index.autocomplete(db, "zzyzx")] == [series.id]
+
+    other, _ = make_series(volumes=1)
+    other.title = "Zzyzx Beta"
+    db.commit()
+    index.invalidate()
+
+    # La petición no espera a la recarga: responde con el índice anterior
+    with index._refreshing:
+        assert [hit["id"] for hit in index.autocomplete(db, "zzyzx")] == [series.id]
+    deadline = time.monotonic() + 5
+    while len(index.autocomplete(db, "zzyzx")) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert {hit["id"] for hit in index.autocomplete(db, "zzyzx")} == {series.id, other.id}
+
+
+def test_autocomplete_ranks_the_whole_prefix_range(db):
+    # Cien títulos que ordenan antes alfabéticamente pero son más largos que el bueno
+    db.add_all(MangaSeries(title=f"Onezq a{n:03d} adventure", author="x") for n in range(100))
+    best = MangaSeries(title="Onezq Piece", author="x")
+    db.add(best)
+    db.commit()
+
+    index = CatalogSearch(MangaSeries, ("title", "author"))
+    hits = index.autocomplete(db, "onezq", limit=10)
+    assert len(hits) == 10
+    assert hits[0] == {"id": best.id, "title": "Onezq Piece"}
+
+
+def test_autocomplete_fills_with_matches_outside_the_main_field(db):
+    first = MangaSeries(title="Qwvx Saga", author="Someone")
+    other = MangaSeries(title="Blue Lock", author="Qwvx Writer")
+    db.add_all([first, other])
+    db.commit()
+
+    index = CatalogSearch(MangaSeries, ("title", "author"))
+    assert [hit["id"] for hit in index.autocomplete(db, "qwvx", limit=10)] == [first.id, other.id]
+    assert [hit["id"] for hit in index.autocomplete(db, "qwvx", limit=1)] == [first.id]
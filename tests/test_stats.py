@@ -0,0 +1,24 @@
+from app.crud import stats as crud_stats
+
+
+def _counters(db, user_id: int) -> dict:
+    db.expire_all()
+    return crud_stats.get_collection_stats(db, user_id)
+
+
+def test_counters_follow_collection_writes(client, db, make_user, make_series):
+    user_id, headers = make_user()
+    _, volumes = make_series(volumes=3)
+    _, other = make_series(volumes=1)
+
+    for volume in volumes + other:
+        response = client.post("/collection/", json={"volume_id": volume.id, "is_owned": True}, headers=headers)
+        assert response.status_code == 201
+    assert _counters(db, user_id) == crud_stats._as_response(crud_stats.compute_collection_stats(db, user_id))
+    assert _counters(db, user_id)["total_series"] == 2
+
+    # La serie solo sale del recuento al quitar su última entrada
+    for volume, series_left in zip(volumes, (2, 2, 1)):
+        assert client.delete(f"/collection/{volume.id}", headers=headers).status_code == 204
+        assert _counters(db, user_id)["total_series"] == series_left
+    assert _counters(db, user_id) == crud_stats._as_response(crud_stats.compute_collection_stats(db, user_id))
@@ -0,0 +1,288 @@
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app.crud import stats as crud_stats
+from app.crud import user_collection as crud_collection
+from app.models import UserMangaVolume
+from app.utils.sql import is_foreign_key_violation
+from app.schemas.user_collection import UserCollectionResponse
+from tests.conftest import count_queries
+
+
+def _serialized_page_queries(db, user_id: int, limit: int) -> int:
+    db.expunge_all()
+    with count_queries() as statements:
+        entries = crud_collection.get_user_collection(db, user_id, limit=limit)
+        # Serializar recorre volume -> series -> publisher (aquí saltarían los lazy loads)
+        [UserCollectionResponse.model_validate(entry) for entry in entries]
+    assert len(entries) == limit
+    return len(statements)
+
+
+def test_collection_page_query_count_is_constant(db, make_user, make_series, add_entries):
+    user_id, _ = make_user()
+    for _ in range(5):
+        _, volumes = make_series(volumes=10)
+        add_entries(user_id, volumes, is_owned=True)
+
+    assert _serialized_page_queries(db, user_id, 5) == _serialized_page_queries(db, user_id, 50)
+
+
+def test_concurrent_adds_of_the_same_volume(client, make_user, make_series):
+    _, headers = make_user()
+    _, volumes = make_series(volumes=1)
+    barrier = threading.Barrier(8)
+
+    def add(_):
+        barrier.wait()
+        return client.post("/collection/", json={"volume_id": volumes[0].id, "is_owned": True}, headers=headers).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = sorted(pool.map(add, range(8)))
+    assert statuses == [201] + [400] * 7
+
+
+def test_add_unknown_volume_is_404(client, make_user):
+    _, headers = make_user()
+    response = client.post("/collection/", json={"volume_id": 999999}, headers=headers)
+    assert response.status_code == 404
+
+
+def test_only_foreign_key_violations_are_recognised(db, make_user, make_series):
+    user_id, _ = make_user()
+    _, volumes = make_series(volumes=1)
+    errors = []
+    for row in ({"user_id": user_id, "volume_id": 999999}, {"user_id": user_id, "volume_id": volumes[0].id}):
+        db.add(UserMangaVolume(**row))
+        try:
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            errors.append(e)
+    # La segunda fila entra; repetirla viola la clave primaria, no una FK
+    db.add(UserMangaVolume(user_id=user_id, volume_id=volumes[0].id))
+    with pytest.raises(IntegrityError) as duplicate:
+        db.commit()
+    db.rollback()
+
+    assert [is_foreign_key_violation(e) for e in errors] == [True]
+    assert not is_foreign_key_violation(duplicate.value)
+
+
+def _sync(client, headers, since: str | None = None, limit: int = 500) -> dict:
+    params = {"limit": limit} | ({"since": since} if since is not None else {})
+    response = client.get("/collection/changes", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_changes_report_upserts_and_tombstones(client, make_user, make_series):
+    _, headers = make_user()
+    _, volumes = make_series(volumes=3)
+    for volume in volumes:
+        assert client.post("/collection/", json={"volume_id": volume.id}, headers=headers).status_code == 201
+
+    full = _sync(client, headers)
+    assert [entry["volume_id"] for entry in full["upserts"]] == [volume.id for volume in volumes]
+    assert full["deletions"] == [] and not full["has_more"]
+
+    # Nada nuevo: el mismo token no devuelve nada
+    assert _sync(client, headers, full["next_token"])["upserts"] == []
+
+    client.patch(f"/collection/{volumes[0].id}", json={"is_owned": True}, headers=headers)
+    client.delete(f"/collection/{volumes[1].id}", headers=headers)
+    delta = _sync(client, headers, full["next_token"])
+    assert [(entry["volume_id"], entry["is_owned"]) for entry in delta["upserts"]] == [(volumes[0].id, True)]
+    assert [deletion["volume_id"] for deletion in delta["deletions"]] == [volumes[1].id]
+
+    # Volver a añadirlo borra el tombstone y aparece como alta
+    client.post("/collection/", json={"volume_id": volumes[1].id}, headers=headers)
+    again = _sync(client, headers, delta["next_token"])
+    assert [entry["volume_id"] for entry in again["upserts"]] == [volumes[1].id]
+    assert again["deletions"] == []
+    assert _sync(client, headers)["deletions"] == []
+
+
+def test_changes_page_with_next_token(client, make_user, make_series):
+    _, headers = make_user()
+    _, volumes = make_series(volumes=5)
+    # Un lote: las cinco entradas comparten versión y se paginan por volume_id
+    client.post("/collection/batch", json={"operations": [{"op": "add", "volume_id": volume.id} for volume in volumes]}, headers=headers)
+
+    seen, token, pages = [], None, 0
+    while True:
+        page = _sync(client, headers, token, limit=2)
+        seen += [entry["volume_id"] for entry in page["upserts"]]
+        token, pages = page["next_token"], pages + 1
+        if not page["has_more"]:
+            break
+    assert seen == [volume.id for volume in volumes]
+    assert pages == 3
+
+
+def test_changes_follow_commit_order_not_clock(client, db, make_user, make_series):
+    user_id, headers = make_user()
+    _, volumes = make_series(volumes=2)
+    client.post("/collection/", json={"volume_id": volumes[0].id}, headers=headers)
+    token = _sync(client, headers)["next_token"]
+
+    # Escritura con la hora de un worker retrasado: se sincroniza igual
+    client.post("/collection/", json={"volume_id": volumes[1].id}, headers=headers)
+    db.query(UserMangaVolume).filter(UserMangaVolume.user_id == user_id, UserMangaVolume.volume_id == volumes[1].id).update(
+        {UserMangaVolume.updated_at: datetime(2000, 1, 1, tzinfo=timezone.utc)}
+    )
+    db.commit()
+    assert [entry["volume_id"] for entry in _sync(client, headers, token)["upserts"]] == [volumes[1].id]
+
+
+def _collection(client, headers) -> dict[int, dict]:
+    return {entry["volume_id"]: entry for entry in client.get("/collection/", headers=headers).json()}
+
+
+def test_batch_applies_mixed_operations(client, db, make_user, make_series):
+    user_id, headers = make_user()
+    series, volumes = make_series(volumes=5)
+    client.post("/collection/", json={"volume_id": volumes[0].id}, headers=headers)
+    client.post("/collection/", json={"volume_id": volumes[1].id, "is_owned": True}, headers=headers)
+
+    response = client.post("/collection/batch", json={"operations": [
+        {"op": "add", "volume_id": volumes[2].id, "is_owned": True, "purchase_price": "7.95"},
+        {"op": "add", "series_id": series.id, "volume_from": 4, "volume_to": 5, "is_wishlist": True},
+        {"op": "update", "volume_id": volumes[0].id, "is_owned": True, "is_reading": True},
+        {"op": "remove", "volume_id": volumes[1].id},
+    ]}, headers=headers)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["added"], report["updated"], report["removed"], report["skipped"], report["failed"]) == (3, 1, 1, 0, 0)
+    assert [(result["index"], result["volume_id"], result["status"]) for result in report["results"]] == [
+        (0, volumes[2].id, "added"),
+        (1, volumes[3].id, "added"),
+        (1, volumes[4].id, "added"),
+        (2, volumes[0].id, "updated"),
+        (3, volumes[1].id, "removed"),
+    ]
+
+    collection = _collection(client, headers)
+    assert set(collection) == {volumes[0].id, volumes[2].id, volumes[3].id, volumes[4].id}
+    assert collection[volumes[0].id]["is_reading"] and collection[volumes[0].id]["started_reading_at"]
+    assert collection[volumes[3].id]["is_wishlist"] and not collection[volumes[3].id]["is_owned"]
+
+    # Contadores guardados = recálculo completo, y la baja deja su tombstone
+    db.expire_all()
+    stats = crud_stats.get_collection_stats(db, user_id)
+    assert stats == crud_stats._as_response(crud_stats.compute_collection_stats(db, user_id))
+    assert (stats["total_volumes"], stats["total_series"], stats["owned_count"], stats["wishlist_count"], stats["reading_count"]) == (4, 1, 2, 2, 1)
+    assert float(stats["total_spent"]) == 7.95
+    assert [deletion["volume_id"] for deletion in _sync(client, headers)["deletions"]] == [volumes[1].id]
+
+    # Volver a añadirlo en otro lote quita el tombstone
+    client.post("/collection/batch", json={"operations": [{"op": "add", "volume_id": volumes[1].id}]}, headers=headers)
+    assert _sync(client, headers)["deletions"] == []
+
+
+def test_batch_with_an_error_writes_nothing(client, db, make_user, make_series):
+    user_id, headers = make_user()
+    _, volumes = make_series(volumes=3)
+    client.post("/collection/", json={"volume_id": volumes[0].id, "is_owned": True}, headers=headers)
+    db.expire_all()
+    stats_before = crud_stats.get_collection_stats(db, user_id)
+    before = _collection(client, headers)
+
+    response = client.post("/collection/batch", json={"operations": [
+        {"op": "add", "volume_id": volumes[1].id},
+        {"op": "remove", "volume_id": volumes[0].id},
+        {"op": "update", "volume_id": volumes[2].id, "is_owned": True},
+    ]}, headers=headers)
+
+    assert response.status_code == 409
+    report = response.json()["detail"]
+    assert report["failed"] == 1
+    assert [(result["volume_id"], result["status"], result["detail"]) for result in report["results"]] == [
+        (volumes[1].id, "skipped", "Batch rejected"),
+        (volumes[0].id, "skipped", "Batch rejected"),
+        (volumes[2].id, "error", "Volume not in collection"),
+    ]
+
+    assert _collection(client, headers) == before
+    assert _sync(client, headers)["deletions"] == []
+    db.expire_all()
+    assert crud_stats.get_collection_stats(db, user_id) == stats_before
+
+
+def test_gaps_at_start_middle_and_end(client, db, make_user, make_series, add_entries):
+    user_id, headers = make_user()
+    # Catálogo incompleto: faltan los tomos 11 y 12 de los 12 anunciados
+    series, volumes = make_series(volumes=10, total_volumes=12)
+    add_entries(user_id, [volumes[n - 1] for n in (3, 4, 6, 7, 8, 10)], is_owned=True)
+    add_entries(user_id, [volumes[0]], is_wishlist=True)
+
+    missing = crud_collection.get_missing_volumes(db, user_id, [series.id])
+    assert sorted(missing[series.id]) == [1, 2, 5, 9, 11, 12]
+    assert client.get("/collection/gaps", headers=headers).json() == [{
+        "series_id": series.id, "series_title": series.title, "total_volumes": 12,
+        "missing_count": 6, "missing_ranges": [[1, 2], [5, 5], [9, 9], [11, 12]],
+    }]
+
+
+def test_gaps_without_total_volumes_use_the_catalog(client, db, make_user, make_series, add_entries):
+    user_id, headers = make_user()
+    series, volumes = make_series(volumes=5)
+    series.total_volumes = None
+    db.commit()
+    add_entries(user_id, [volumes[1], volumes[4]], is_owned=True)
+    # Una serie solo en la wishlist no sale en los huecos
+    _, wished = make_series(volumes=2)
+    add_entries(user_id, wished, is_wishlist=True)
+
+    gaps = client.get("/collection/gaps", headers=headers).json()
+    assert [(gap["series_id"], gap["total_volumes"], gap["missing_ranges"]) for gap in gaps] == [(series.id, None, [[1, 1], [3, 4]])]
+
+
+def test_gaps_cursor_pages(client, db, make_user, make_series, add_entries):
+    user_id, headers = make_user()
+    owned = [make_series(volumes=3) for _ in range(5)]
+    for _, volumes in owned:
+        add_entries(user_id, volumes[:1], is_owned=True)
+    expected = [series.id for series, _ in sorted(owned, key=lambda pair: (pair[0].title, pair[0].id))]
+    assert [series.id for series in crud_collection.get_owned_series_page(db, user_id, limit=10)] == expected
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = client.get("/collection/gaps", params={"cursor": cursor, "limit": 2}, headers=headers).json()
+        assert all(gap["missing_ranges"] == [[2, 3]] for gap in page["items"])
+        seen += [gap["series_id"] for gap in page["items"]]
+        cursor = page["next_cursor"]
+    assert seen == expected
+
+
+def test_by_series_aggregates_non_contiguous_volumes(client, db, make_user, make_series, add_entries):
+    user_id, headers = make_user()
+    first, volumes = make_series(volumes=8, total_volumes=10)
+    add_entries(user_id, [volumes[0], volumes[2]], is_owned=True, is_completed=True)
+    add_entries(user_id, [volumes[1], volumes[4]], is_owned=True)
+    add_entries(user_id, [volumes[6]], is_wishlist=True)
+    add_entries(user_id, [volumes[7]])
+    second, volumes = make_series(volumes=3)
+    second.total_volumes = None
+    db.commit()
+    add_entries(user_id, [volumes[1]], is_owned=True)
+    wished, volumes = make_series(volumes=2)
+    add_entries(user_id, volumes, is_wishlist=True)
+
+    # En SQLite los números poseídos llegan por group_concat (array_agg en PostgreSQL)
+    summaries = {summary["series_id"]: summary for summary in client.get("/collection/by-series", headers=headers).json()}
+    columns = ("catalog_volumes", "in_collection", "owned_count", "read_count", "wishlist_count", "owned_ranges", "completion_percentage")
+    assert {series_id: tuple(summary[column] for column in columns) for series_id, summary in summaries.items()} == {
+        first.id: (8, 6, 4, 2, 1, [[1, 3], [5, 5]], 40.0),
+        second.id: (3, 1, 1, 0, 0, [[2, 2]], 33.33),
+        wished.id: (2, 2, 0, 0, 2, [], 0.0),
+    }
+
+    page = client.get("/collection/by-series", params={"cursor": "", "limit": 2}, headers=headers).json()
+    rest = client.get("/collection/by-series", params={"cursor": page["next_cursor"], "limit": 2}, headers=headers).json()
+    expected = sorted([first, second, wished], key=lambda series: (series.title, series.id))
+    assert [summary["series_id"] for summary in page["items"] + rest["items"]] == [series.id for series in expected]
+    assert rest["next_cursor"] is None